@@ -127,6 +127,9 @@ psql -v ON_ERROR_STOP=1 --username "$POSTGRES_USER" --dbname "edupath_prepa" <<-
         time_spent INTEGER,
         activities_completed INTEGER,
         score DECIMAL(5,2),
+        module_id VARCHAR(50),
+        participation_rate DECIMAL(5,2),
+        quiz_attempts INTEGER,
         created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
     );
     
@@ -135,7 +138,13 @@ psql -v ON_ERROR_STOP=1 --username "$POSTGRES_USER" --dbname "edupath_prepa" <<-
         process_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
         students_processed INTEGER,
         status VARCHAR(50),
-        error_message TEXT
+        error_message TEXT,
+        run_id VARCHAR(100),
+        shard_index INTEGER,
+        duration_ms DECIMAL(12,2),
+        rows_per_sec DECIMAL(12,2),
+        peak_memory_mb DECIMAL(10,2),
+        metrics JSONB
     );
 EOSQL
 
@@ -147,6 +156,7 @@ psql -v ON_ERROR_STOP=1 --username "$POSTGRES_USER" --dbname "edupath_profiler"
         cluster_id INTEGER,
         pca_components JSONB,
         profile_confidence DECIMAL(5,2),
+        model_version VARCHAR(50),
         created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
         updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
     );
@@ -157,6 +167,7 @@ psql -v ON_ERROR_STOP=1 --username "$POSTGRES_USER" --dbname "edupath_profiler"
         student_count INTEGER,
         avg_engagement DECIMAL(5,2),
         avg_success_rate DECIMAL(5,2),
+        model_version VARCHAR(50),
         calculated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
     );
 EOSQL
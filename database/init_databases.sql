@@ -66,6 +66,9 @@ CREATE TABLE IF NOT EXISTS session_data (
     time_spent INTEGER,
     activities_completed INTEGER,
     score DECIMAL(5,2),
+    module_id VARCHAR(50),
+    participation_rate DECIMAL(5,2),
+    quiz_attempts INTEGER,
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
 );
 
@@ -74,7 +77,13 @@ CREATE TABLE IF NOT EXISTS processing_logs (
     process_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     students_processed INTEGER,
     status VARCHAR(50),
-    error_message TEXT
+    error_message TEXT,
+    run_id VARCHAR(100),
+    shard_index INTEGER,
+    duration_ms DECIMAL(12,2),
+    rows_per_sec DECIMAL(12,2),
+    peak_memory_mb DECIMAL(10,2),
+    metrics JSONB
 );
 
 -- Base de données pour StudentProfiler
@@ -88,6 +97,7 @@ CREATE TABLE IF NOT EXISTS student_profiles (
     cluster_id INTEGER,
     pca_components JSONB,
     profile_confidence DECIMAL(5,2),
+    model_version VARCHAR(50),
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
 );
@@ -98,6 +108,7 @@ CREATE TABLE IF NOT EXISTS profile_statistics (
     student_count INTEGER,
     avg_engagement DECIMAL(5,2),
     avg_success_rate DECIMAL(5,2),
+    model_version VARCHAR(50),
     calculated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
 );
 
@@ -2,14 +2,11 @@ from flask import Flask, jsonify, request
 from flask_cors import CORS
 import pandas as pd
 import numpy as np
-import xgboost as xgb
 import os
 from dotenv import load_dotenv
-import requests
-import joblib
-from database import save_prediction, save_model_history, create_alert
-import mlflow
-import mlflow.xgboost
+from database import save_prediction, save_predictions, create_alert, create_alerts
+from feature_client import fetch_student_features, fetch_features
+from failure_model import FEATURE_COLUMNS, MODEL_VERSION, load_failure_model
 
 load_dotenv()
 
@@ -17,143 +14,58 @@ app = Flask(__name__)
 CORS(app)
 
 PORT = int(os.getenv('PORT', 3004))
-PREPA_DATA_URL = os.getenv('PREPA_DATA_URL', 'http://localhost:3002')
+# Nombre maximal d'étudiants par appel à /predict/batch
+MAX_BATCH_SIZE = int(os.getenv('MAX_BATCH_SIZE', 10000))
 
-# Modèle global
+# Modèle servi (XGBoost + version du registre), échangé atomiquement
 model = None
 
-def create_training_data():
-    """Crée des données d'entraînement simulées"""
-    # Simuler des données historiques pour l'entraînement
-    np.random.seed(42)
-    
-    n_samples = 100
-    data = []
-    
-    for i in range(n_samples):
-        # Features similaires à celles de PrepaData
-        avg_score = np.random.uniform(30, 100)
-        participation = np.random.uniform(0.3, 1.0)
-        time_spent = np.random.uniform(15, 70)
-        assignments = np.random.randint(2, 11)
-        quiz_attempts = np.random.randint(1, 9)
-        risk_score = np.random.uniform(0, 100)
-        
-        # Label: risque d'échec (1 = échec, 0 = succès)
-        # Basé sur une combinaison des features
-        failure_prob = (
-            (100 - avg_score) * 0.4 +
-            (1 - participation) * 100 * 0.3 +
-            risk_score * 0.3
-        ) / 100
-        
-        will_fail = 1 if failure_prob > 0.5 else 0
-        
-        data.append({
-            'average_score': avg_score,
-            'average_participation': participation,
-            'total_time_spent': time_spent,
-            'total_assignments': assignments,
-            'total_quiz_attempts': quiz_attempts,
-            'risk_score': risk_score,
-            'will_fail': will_fail
-        })
-    
-    return pd.DataFrame(data)
-
-def train_model():
-    """Entraîne le modèle XGBoost"""
+def load_model(version=MODEL_VERSION):
+    """Charge le modèle (registre MLflow, sinon copie locale), None si absent"""
     global model
-    
-    print("Entraînement du modèle XGBoost...")
-    df = create_training_data()
-    
-    # Features
-    feature_cols = [
-        'average_score', 'average_participation', 'total_time_spent',
-        'total_assignments', 'total_quiz_attempts', 'risk_score'
-    ]
-    
-    X = df[feature_cols].values
-    y = df['will_fail'].values
-    
-    # Entraînement XGBoost
-    model = xgb.XGBClassifier(
-        n_estimators=100,
-        max_depth=5,
-        learning_rate=0.1,
-        random_state=42
-    )
-    
-    # Entraîner avec MLflow tracking
-    with mlflow.start_run():
-        model.fit(X, y)
-        
-        # Métriques
-        accuracy = model.score(X, y)
-        predictions = model.predict(X)
-        
-        # Enregistrer les métriques dans MLflow
-        mlflow.log_metric("accuracy", accuracy)
-        mlflow.log_metric("n_samples", len(df))
-        mlflow.log_param("max_depth", 5)
-        mlflow.log_param("learning_rate", 0.1)
-        
-        # Enregistrer le modèle
-        mlflow.xgboost.log_model(model, "model")
-        
-        run_id = mlflow.active_run().info.run_id
-        
-        # Sauvegarder dans PostgreSQL
-        save_model_history(
-            "XGBoost Risk Predictor",
-            "1.0",
-            run_id,
-            {"accuracy": accuracy, "n_samples": len(df)},
-            is_active=True
-        )
-        
-        print(f"Modèle entraîné avec {len(df)} échantillons")
-        print(f"Précision: {accuracy:.2%}")
-        print(f"MLflow Run ID: {run_id}")
+    loaded = load_failure_model(version)
+    if loaded is None:
+        print(f"⚠️ Aucun modèle disponible (version {version or 'la plus récente'}) : "
+              "lancer python src/train_model.py")
+        return None
+    model = loaded
+    print(f"🧠 Modèle de risque version {loaded.version} actif ({loaded.source})")
+    return loaded
 
-def predict_failure(student_id, module_id=None):
+def predict_failure(student_id, module_id=None, current=None):
     """Prédit le risque d'échec pour un étudiant"""
-    global model
-    
-    if model is None:
-        train_model()
+    current = current or model
     
     # Récupérer les features de l'étudiant
     try:
-        response = requests.get(f'{PREPA_DATA_URL}/features/{student_id}', timeout=5)
-        if response.status_code != 200:
+        # Features du module demandé (index par module de PrepaData)
+        features = fetch_student_features(student_id, module_id)
+        if features is None:
             return None
         
-        features = response.json()['features']
-        
         # Préparer les features pour la prédiction
-        feature_cols = [
-            'average_score', 'average_participation', 'total_time_spent',
-            'total_assignments', 'total_quiz_attempts', 'risk_score'
-        ]
-        
-        X = np.array([[features[col] for col in feature_cols]])
+        X = np.array([[features[col] for col in FEATURE_COLUMNS]])
         
-        # Prédiction
-        failure_prob = model.predict_proba(X)[0][1]  # Probabilité d'échec
-        will_fail = model.predict(X)[0]
+        return build_predictions(current.predict_proba(X))[0]
         
-        return {
-            'will_fail': bool(will_fail),
+    except Exception as e:
+        print(f"Erreur lors de la prédiction: {e}")
+        return None
+
+def build_predictions(failure_probs):
+    """Prédictions à partir des probabilités d'échec (une par étudiant)
+
+    La classe prédite est celle de XGBoost : échec si probabilité > 0.5.
+    """
+    return [
+        {
+            'will_fail': bool(failure_prob > 0.5),
             'failure_probability': float(failure_prob),
             'success_probability': float(1 - failure_prob),
             'risk_level': get_risk_level(failure_prob)
         }
-        
-    except Exception as e:
-        print(f"Erreur lors de la prédiction: {e}")
-        return None
+        for failure_prob in failure_probs
+    ]
 
 def get_risk_level(probability):
     """Détermine le niveau de risque"""
@@ -164,6 +76,9 @@ def get_risk_level(probability):
     else:
         return 'Low'
 
+def high_risk_message(prediction):
+    return f'Étudiant à haut risque d\'échec (probabilité: {prediction["failure_probability"]:.2%})'
+
 @app.route('/predict', methods=['POST'])
 def predict():
     """Endpoint pour prédire le risque d'échec"""
@@ -177,7 +92,13 @@ def predict():
                 'error': 'student_id est requis'
             }), 400
         
-        prediction = predict_failure(student_id, module_id)
+        current = model
+        if current is None:
+            return jsonify({
+                'error': 'Aucun modèle de prédiction chargé'
+            }), 503
+        
+        prediction = predict_failure(student_id, module_id, current)
         
         if prediction is None:
             return jsonify({
@@ -192,7 +113,7 @@ def predict():
             prediction['success_probability'],
             prediction['failure_probability'],
             prediction['risk_level'],
-            '1.0'
+            current.version
         )
         
         # Créer une alerte si risque élevé
@@ -200,7 +121,7 @@ def predict():
             create_alert(
                 str(student_id),
                 'high_risk',
-                f'Étudiant à haut risque d\'échec (probabilité: {prediction["failure_probability"]:.2%})',
+                high_risk_message(prediction),
                 'high'
             )
         
@@ -208,7 +129,8 @@ def predict():
             'status': 'success',
             'student_id': student_id,
             'module_id': module_id,
-            'prediction': prediction
+            'prediction': prediction,
+            'model_version': current.version
         })
     except Exception as e:
         return jsonify({
@@ -216,16 +138,133 @@ def predict():
             'message': str(e)
         }), 500
 
+@app.route('/predict/batch', methods=['POST'])
+def predict_batch():
+    """Endpoint pour prédire le risque d'échec de plusieurs étudiants
+
+    Corps : {"student_ids": [1, 2, 3], "module_id": "MATH101"} (features lues
+    sur PrepaData, module optionnel) ou {"students": [{"student_id": 1,
+    "average_score": 72, ...}]}. Une seule inférence pour tout le lot ; les
+    résultats sont renvoyés dans l'ordre de la requête.
+    """
+    data = request.get_json(silent=True) or {}
+    students = data.get('students')
+    student_ids = data.get('student_ids')
+    module_id = data.get('module_id')
+    
+    if students is not None:
+        if not isinstance(students, list) or not all(
+                isinstance(s, dict) and 'student_id' in s for s in students):
+            return jsonify({
+                'error': 'students doit être une liste de features avec student_id'
+            }), 400
+        student_ids = [s['student_id'] for s in students]
+    elif not isinstance(student_ids, list):
+        return jsonify({
+            'error': 'student_ids doit être une liste d\'identifiants'
+        }), 400
+    if len(student_ids) > MAX_BATCH_SIZE:
+        return jsonify({
+            'error': f'{MAX_BATCH_SIZE} étudiants au plus par requête'
+        }), 400
+    
+    current = model
+    if current is None:
+        return jsonify({
+            'error': 'Aucun modèle de prédiction chargé'
+        }), 503
+    
+    try:
+        if students is None:
+            by_id = fetch_features(student_ids, module_id)
+        else:
+            by_id = {str(s['student_id']): s for s in students}
+        
+        # Une ligne par étudiant distinct ayant toutes les features
+        frame = pd.DataFrame.from_dict(by_id, orient='index').reindex(columns=FEATURE_COLUMNS)
+        frame = frame.apply(pd.to_numeric, errors='coerce').dropna()
+        predictions = dict(zip(frame.index, build_predictions(
+            current.predict_proba(frame.to_numpy()) if len(frame) else [])))
+        
+        module_id = module_id or 'ALL'
+        save_predictions([
+            (key, module_id, p['success_probability'], p['failure_probability'], p['risk_level'])
+            for key, p in predictions.items()
+        ], current.version)
+        high_risk = [(key, 'high_risk', high_risk_message(p), 'high')
+                     for key, p in predictions.items() if p['risk_level'] == 'High']
+        if high_risk:
+            create_alerts(high_risk)
+        
+        results = []
+        for student_id in student_ids:
+            prediction = predictions.get(str(student_id))
+            if prediction is not None:
+                results.append({'status': 'success', 'student_id': student_id,
+                                'prediction': prediction})
+            else:
+                results.append({'status': 'error', 'student_id': student_id,
+                                'error': f'Features de l\'étudiant {student_id} introuvables ou incomplètes'})
+        
+        return jsonify({
+            'status': 'success',
+            'module_id': module_id,
+            'model_version': current.version,
+            'count': len(results),
+            'predictions': results
+        })
+    except Exception as e:
+        return jsonify({
+            'status': 'error',
+            'message': str(e)
+        }), 500
+
+@app.route('/model', methods=['GET'])
+def get_model():
+    """Endpoint décrivant le modèle de prédiction servi"""
+    if model is None:
+        return jsonify({
+            'error': 'Aucun modèle de prédiction chargé'
+        }), 404
+    
+    return jsonify({
+        'status': 'success',
+        'model': model.info()
+    })
+
+@app.route('/admin/model/reload', methods=['POST'])
+def reload_model():
+    """Recharge le modèle sans interruption de service
+
+    Corps optionnel : {"version": "3"} ; sans version, MODEL_VERSION (ou la
+    plus récente du registre).
+    """
+    data = request.get_json(silent=True) or {}
+    version = data.get('version') or MODEL_VERSION
+    
+    loaded = load_model(version)
+    if loaded is None:
+        return jsonify({
+            'error': f'Modèle {version or "enregistré"} introuvable'
+        }), 404
+    
+    return jsonify({
+        'status': 'success',
+        'model': loaded.info()
+    })
+
 @app.route('/health', methods=['GET'])
 def health():
     """Endpoint de santé"""
     return jsonify({
         'status': 'ok',
-        'service': 'PathPredictor'
+        'service': 'PathPredictor',
+        'model_version': model.version if model else None
     })
 
-# Initialiser le modèle au démarrage
+# Charger le modèle au démarrage (aussi dans chaque worker gunicorn)
+load_model()
+
 if __name__ == '__main__':
-    train_model()
     app.run(host='0.0.0.0', port=PORT, debug=True)
 
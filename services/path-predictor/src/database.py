@@ -3,7 +3,7 @@ Module de connexion PostgreSQL et MLflow pour PathPredictor
 """
 import os
 import psycopg2
-from psycopg2.extras import RealDictCursor
+from psycopg2.extras import RealDictCursor, execute_values
 from psycopg2.pool import SimpleConnectionPool
 from contextlib import contextmanager
 from dotenv import load_dotenv
@@ -112,6 +112,24 @@ def save_prediction(student_id, module_id, success_prob, failure_prob, risk_leve
         print(f'Error saving prediction: {e}')
         return None
 
+def save_predictions(rows, model_version):
+    """Sauvegarde un lot de prédictions en une requête
+
+    rows : tuples (student_id, module_id, success_prob, failure_prob, risk_level).
+    """
+    try:
+        with get_db_connection() as conn:
+            with conn.cursor() as cur:
+                execute_values(cur, """
+                    INSERT INTO predictions 
+                    (student_id, module_id, success_probability, failure_probability, risk_level, model_version)
+                    VALUES %s;
+                """, [row + (model_version,) for row in rows], page_size=1000)
+                return len(rows)
+    except Exception as e:
+        print(f'Error saving predictions: {e}')
+        return None
+
 def save_model_history(model_name, model_version, mlflow_run_id, metrics, is_active=False):
     """Sauvegarde l'historique d'un modèle"""
     try:
@@ -144,6 +162,23 @@ def create_alert(student_id, alert_type, message, severity='medium'):
         print(f'Error creating alert: {e}')
         return None
 
+def create_alerts(alerts):
+    """Crée un lot d'alertes en une requête
+
+    alerts : tuples (student_id, alert_type, message, severity).
+    """
+    try:
+        with get_db_connection() as conn:
+            with conn.cursor() as cur:
+                execute_values(cur, """
+                    INSERT INTO alerts (student_id, alert_type, message, severity)
+                    VALUES %s;
+                """, alerts, page_size=1000)
+                return len(alerts)
+    except Exception as e:
+        print(f'Error creating alerts: {e}')
+        return None
+
 # Initialiser le pool au chargement du module
 init_pool()
 
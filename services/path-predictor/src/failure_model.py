@@ -0,0 +1,201 @@
+"""
+Modèle XGBoost de risque d'échec de PathPredictor
+
+Le modèle est entraîné hors du service (src/train_model.py) et enregistré
+dans le registre MLflow sous MODEL_NAME. Au démarrage, le service charge la
+version MODEL_VERSION (la plus récente si vide) depuis le registre et en
+garde une copie locale dans MODEL_CACHE_DIR : sans accès à MLflow, la copie
+locale est servie.
+"""
+import os
+import re
+import glob
+import time
+import joblib
+import numpy as np
+import pandas as pd
+import xgboost as xgb
+from dotenv import load_dotenv
+
+load_dotenv()
+
+MODEL_NAME = os.getenv('MODEL_NAME', 'path-predictor-risk')
+# Version du registre à servir (vide : la plus récente)
+MODEL_VERSION = os.getenv('MODEL_VERSION') or None
+MODEL_CACHE_DIR = os.getenv(
+    'MODEL_CACHE_DIR', os.path.join(os.path.dirname(__file__), '..', 'models')
+)
+# Vide : registre MLflow désactivé (copie locale uniquement)
+MLFLOW_TRACKING_URI = os.getenv('MLFLOW_TRACKING_URI', 'http://mlflow:5000')
+# Registre injoignable : basculer vite sur la copie locale au démarrage
+os.environ.setdefault('MLFLOW_HTTP_REQUEST_MAX_RETRIES', '1')
+os.environ.setdefault('MLFLOW_HTTP_REQUEST_TIMEOUT', '10')
+
+FEATURE_COLUMNS = [
+    'average_score', 'average_participation', 'total_time_spent',
+    'total_assignments', 'total_quiz_attempts', 'risk_score'
+]
+
+
+class FailureModel:
+    """Classifieur XGBoost chargé et sa provenance (version, run MLflow)"""
+
+    def __init__(self, model, version, run_id=None, metrics=None, source='local'):
+        self.model = model
+        self.version = str(version)
+        self.run_id = run_id
+        self.metrics = metrics or {}
+        self.source = source
+        self.loaded_at = time.time()
+
+    def predict_proba(self, X):
+        """Probabilité d'échec (classe 1) de chaque ligne de X"""
+        return self.model.predict_proba(np.asarray(X, dtype='float64'))[:, 1]
+
+    def info(self):
+        return {
+            'name': MODEL_NAME,
+            'version': self.version,
+            'mlflow_run_id': self.run_id,
+            'metrics': self.metrics,
+            'source': self.source,
+            'loaded_at': self.loaded_at,
+            'feature_columns': FEATURE_COLUMNS
+        }
+
+
+def create_training_data():
+    """Crée des données d'entraînement simulées"""
+    # Simuler des données historiques pour l'entraînement
+    np.random.seed(42)
+
+    n_samples = 100
+    data = []
+
+    for i in range(n_samples):
+        # Features similaires à celles de PrepaData
+        avg_score = np.random.uniform(30, 100)
+        participation = np.random.uniform(0.3, 1.0)
+        time_spent = np.random.uniform(15, 70)
+        assignments = np.random.randint(2, 11)
+        quiz_attempts = np.random.randint(1, 9)
+        risk_score = np.random.uniform(0, 100)
+
+        # Label: risque d'échec (1 = échec, 0 = succès)
+        # Basé sur une combinaison des features
+        failure_prob = (
+            (100 - avg_score) * 0.4 +
+            (1 - participation) * 100 * 0.3 +
+            risk_score * 0.3
+        ) / 100
+
+        will_fail = 1 if failure_prob > 0.5 else 0
+
+        data.append({
+            'average_score': avg_score,
+            'average_participation': participation,
+            'total_time_spent': time_spent,
+            'total_assignments': assignments,
+            'total_quiz_attempts': quiz_attempts,
+            'risk_score': risk_score,
+            'will_fail': will_fail
+        })
+
+    return pd.DataFrame(data)
+
+
+def train_model(df):
+    """Entraîne le classifieur XGBoost, retourne (modèle, métriques)"""
+    X = df[FEATURE_COLUMNS].values
+    y = df['will_fail'].values
+
+    model = xgb.XGBClassifier(
+        n_estimators=100,
+        max_depth=5,
+        learning_rate=0.1,
+        random_state=42
+    )
+    model.fit(X, y)
+    return model, {'accuracy': float(model.score(X, y)), 'n_samples': len(df)}
+
+
+def cache_path(version):
+    return os.path.join(MODEL_CACHE_DIR, f'{MODEL_NAME}-{version}.joblib')
+
+
+def list_cached_models():
+    """Copies locales disponibles, de la plus récente à la plus ancienne"""
+    paths = glob.glob(os.path.join(MODEL_CACHE_DIR, f'{MODEL_NAME}-*.joblib'))
+    return sorted(paths, key=os.path.getmtime, reverse=True)
+
+
+def save_local(loaded):
+    """Copie locale d'un modèle (écriture temporaire puis renommage atomique)"""
+    os.makedirs(MODEL_CACHE_DIR, exist_ok=True)
+    path = cache_path(loaded.version)
+    tmp_path = f'{path}.{os.getpid()}.tmp'
+    joblib.dump({'model': loaded.model, 'version': loaded.version,
+                 'run_id': loaded.run_id, 'metrics': loaded.metrics}, tmp_path)
+    os.replace(tmp_path, path)
+    return path
+
+
+def load_local(version=None):
+    """Copie locale d'une version (la plus récente si None), None si absente"""
+    if version is not None:
+        path = cache_path(version)
+        if not os.path.exists(path):
+            return None
+    else:
+        paths = list_cached_models()
+        if not paths:
+            return None
+        path = paths[0]
+    try:
+        saved = joblib.load(path)
+        return FailureModel(saved['model'], saved['version'], saved.get('run_id'),
+                            saved.get('metrics'), source='local')
+    except Exception as e:
+        print(f'⚠️ Lecture du modèle {path} impossible: {e}')
+        return None
+
+
+def load_from_registry(version=None):
+    """Version du registre MLflow (la plus récente si None), None si indisponible"""
+    if not MLFLOW_TRACKING_URI:
+        return None
+    try:
+        import mlflow
+        import mlflow.xgboost
+        from mlflow.tracking import MlflowClient
+
+        client = MlflowClient()
+        if version is None:
+            versions = client.search_model_versions(f"name='{MODEL_NAME}'")
+            if not versions:
+                return None
+            registered = max(versions, key=lambda v: int(v.version))
+        else:
+            registered = client.get_model_version(MODEL_NAME, str(version))
+
+        model = mlflow.xgboost.load_model(f'models:/{MODEL_NAME}/{registered.version}')
+        metrics = client.get_run(registered.run_id).data.metrics if registered.run_id else {}
+        return FailureModel(model, registered.version, registered.run_id, metrics,
+                            source='registry')
+    except Exception as e:
+        print(f'⚠️ Registre MLflow indisponible: {e}')
+        return None
+
+
+def load_failure_model(version=MODEL_VERSION):
+    """Modèle à servir : registre MLflow, sinon copie locale (None si aucun)"""
+    if version is not None and not re.fullmatch(r'\d+', str(version)):
+        return None
+    loaded = load_from_registry(version)
+    if loaded is not None:
+        try:
+            save_local(loaded)
+        except Exception as e:
+            print(f'⚠️ Copie locale du modèle impossible: {e}')
+        return loaded
+    return load_local(version)
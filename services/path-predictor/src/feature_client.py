@@ -0,0 +1,85 @@
+"""
+Client des features PrepaData pour PathPredictor
+
+Les features d'un lot d'étudiants sont lues en une requête via
+POST /features/batch (réponse NDJSON). Les features d'un module, et le cas
+où l'endpoint batch n'existe pas, passent par GET /features/<id> avec au
+plus FEATURE_FETCH_CONCURRENCY requêtes simultanées sur une session HTTP
+dont les connexions sont réutilisées.
+"""
+import os
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import requests
+from requests.adapters import HTTPAdapter
+from dotenv import load_dotenv
+
+load_dotenv()
+
+PREPA_DATA_URL = os.getenv('PREPA_DATA_URL', 'http://localhost:3002')
+FEATURE_FETCH_CONCURRENCY = int(os.getenv('FEATURE_FETCH_CONCURRENCY', 8))
+FEATURE_FETCH_TIMEOUT = int(os.getenv('FEATURE_FETCH_TIMEOUT', 60))
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def get_session():
+    """Session HTTP partagée (pool de connexions keep-alive)"""
+    global _session
+    with _session_lock:
+        if _session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=FEATURE_FETCH_CONCURRENCY)
+            session.mount('http://', adapter)
+            session.mount('https://', adapter)
+            _session = session
+        return _session
+
+
+def fetch_student_features(student_id, module_id=None):
+    """Features d'un étudiant (d'un module si module_id), None si absent"""
+    try:
+        params = {'module_id': module_id} if module_id else None
+        response = get_session().get(f'{PREPA_DATA_URL}/features/{student_id}',
+                                     params=params, timeout=5)
+        if response.status_code != 200:
+            return None
+        return response.json()['features']
+    except Exception as e:
+        print(f"Erreur lors de la récupération des features pour l'étudiant {student_id}: {e}")
+        return None
+
+
+def fetch_features(student_ids, module_id=None):
+    """Features de plusieurs étudiants : {str(student_id): features}
+
+    Les étudiants introuvables sont absents du résultat.
+    """
+    student_ids = list(dict.fromkeys(student_ids))
+    if not module_id:
+        try:
+            with get_session().post(f'{PREPA_DATA_URL}/features/batch',
+                                    json={'student_ids': student_ids},
+                                    stream=True, timeout=(5, FEATURE_FETCH_TIMEOUT)) as response:
+                if response.status_code not in (404, 405):
+                    response.raise_for_status()
+                    features = {}
+                    for line in response.iter_lines():
+                        if not line:
+                            continue
+                        item = json.loads(line)
+                        if item.get('status') == 'success':
+                            features[str(item['student_id'])] = item['features']
+                    return features
+            print("⚠️ /features/batch indisponible, récupération étudiant par étudiant")
+        except Exception as e:
+            print(f"❌ Erreur lors de la récupération des features: {e}")
+            return {}
+
+    with ThreadPoolExecutor(max_workers=FEATURE_FETCH_CONCURRENCY) as executor:
+        results = executor.map(lambda student_id: fetch_student_features(student_id, module_id),
+                               student_ids)
+        return {str(student_id): features
+                for student_id, features in zip(student_ids, results) if features is not None}
@@ -0,0 +1,82 @@
+"""
+Entraînement du modèle de risque d'échec de PathPredictor (job hors service)
+
+Entraîne le classifieur XGBoost, enregistre le run et la nouvelle version
+dans le registre MLflow (MODEL_NAME), l'historique dans PostgreSQL, puis
+une copie locale dans MODEL_CACHE_DIR. Sans MLflow (--offline ou registre
+injoignable), seule la copie locale est écrite.
+
+    python src/train_model.py [--offline] [--if-missing]
+"""
+import sys
+import time
+import argparse
+from dotenv import load_dotenv
+from database import save_model_history
+from failure_model import (
+    MODEL_NAME, MLFLOW_TRACKING_URI, FailureModel, create_training_data, train_model,
+    save_local, load_failure_model
+)
+
+load_dotenv()
+
+
+def register_model(model, metrics):
+    """Run MLflow + nouvelle version du registre, retourne (version, run_id)"""
+    import mlflow
+    import mlflow.xgboost
+
+    with mlflow.start_run() as run:
+        mlflow.log_metric("accuracy", metrics['accuracy'])
+        mlflow.log_metric("n_samples", metrics['n_samples'])
+        mlflow.log_param("max_depth", 5)
+        mlflow.log_param("learning_rate", 0.1)
+        info = mlflow.xgboost.log_model(model, "model", registered_model_name=MODEL_NAME)
+    version = getattr(info, 'registered_model_version', None)
+    if version is None:
+        # Versions MLflow sans registered_model_version dans ModelInfo
+        from mlflow.tracking import MlflowClient
+        versions = MlflowClient().search_model_versions(f"run_id='{run.info.run_id}'")
+        version = max(int(v.version) for v in versions)
+    return str(version), run.info.run_id
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Entraînement du modèle XGBoost de PathPredictor')
+    parser.add_argument('--offline', action='store_true',
+                        help='ne pas utiliser MLflow (copie locale uniquement)')
+    parser.add_argument('--if-missing', action='store_true',
+                        help='ne rien faire si un modèle est déjà enregistré')
+    args = parser.parse_args(argv)
+
+    if args.if_missing:
+        existing = load_failure_model(None)
+        if existing is not None:
+            print(f"✅ {MODEL_NAME} version {existing.version} déjà disponible ({existing.source})")
+            return 0
+
+    print("Entraînement du modèle XGBoost...")
+    df = create_training_data()
+    model, metrics = train_model(df)
+
+    version, run_id = None, None
+    if not args.offline and MLFLOW_TRACKING_URI:
+        try:
+            version, run_id = register_model(model, metrics)
+        except Exception as e:
+            print(f"⚠️ Enregistrement MLflow impossible: {e}")
+    if version is None:
+        # Version locale : horodatage (les versions du registre sont des entiers)
+        version = time.strftime('%Y%m%d%H%M%S', time.gmtime())
+
+    path = save_local(FailureModel(model, version, run_id, metrics))
+    save_model_history("XGBoost Risk Predictor", version, run_id, metrics, is_active=True)
+
+    print(f"Modèle entraîné avec {metrics['n_samples']} échantillons")
+    print(f"Précision: {metrics['accuracy']:.2%}")
+    print(f"💾 {MODEL_NAME} version {version} (MLflow Run ID: {run_id}): {path}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,87 @@
+import os
+from types import SimpleNamespace
+import mlflow.tracking
+import mlflow.xgboost
+import pytest
+import failure_model
+from conftest import trained_model
+from failure_model import FailureModel, load_failure_model, save_local
+
+
+class FakeRegistry:
+    """Client MLflow minimal : versions enregistrées de MODEL_NAME"""
+
+    def __init__(self, versions):
+        self.versions = {str(v): SimpleNamespace(version=str(v), run_id=f'run-{v}')
+                         for v in versions}
+
+    def search_model_versions(self, query):
+        return list(self.versions.values())
+
+    def get_model_version(self, name, version):
+        if version not in self.versions:
+            raise LookupError(f'{name} version {version} introuvable')
+        return self.versions[version]
+
+    def get_run(self, run_id):
+        return SimpleNamespace(data=SimpleNamespace(metrics={'accuracy': 0.9}))
+
+
+@pytest.fixture
+def registry(monkeypatch):
+    """Registre MLflow activé, servant les versions 1 et 2"""
+    fake = FakeRegistry([1, 2])
+    loaded = []
+    monkeypatch.setattr(failure_model, 'MLFLOW_TRACKING_URI', 'http://mlflow.test')
+    monkeypatch.setattr(mlflow.tracking, 'MlflowClient', lambda: fake)
+    monkeypatch.setattr(mlflow.xgboost, 'load_model',
+                        lambda uri: loaded.append(uri) or trained_model()[0])
+    fake.loaded = loaded
+    return fake
+
+
+@pytest.fixture
+def registry_down(monkeypatch):
+    def unavailable():
+        raise ConnectionError('registre injoignable')
+
+    monkeypatch.setattr(failure_model, 'MLFLOW_TRACKING_URI', 'http://mlflow.test')
+    monkeypatch.setattr(mlflow.tracking, 'MlflowClient', unavailable)
+
+
+def test_latest_registry_version_is_served_and_cached(registry, cache_dir):
+    loaded = load_failure_model(None)
+
+    assert loaded.source == 'registry'
+    assert loaded.version == '2' and loaded.run_id == 'run-2'
+    assert registry.loaded == [f'models:/{failure_model.MODEL_NAME}/2']
+    assert os.path.exists(failure_model.cache_path('2'))
+
+
+def test_pinned_registry_version(registry, cache_dir):
+    assert load_failure_model('1').version == '1'
+    assert load_failure_model('7') is None
+
+
+def test_local_copy_when_registry_is_down(registry_down, cache_dir):
+    model, metrics = trained_model()
+    save_local(FailureModel(model, '3', 'run-3', metrics))
+
+    latest = load_failure_model(None)
+    pinned = load_failure_model('3')
+
+    assert latest.source == 'local' and latest.version == '3' and latest.run_id == 'run-3'
+    assert pinned.version == '3'
+    assert load_failure_model('4') is None
+    X = [[70, 0.7, 35, 5, 3, 30]]
+    assert latest.predict_proba(X) == pytest.approx(FailureModel(model, '3').predict_proba(X))
+
+
+def test_no_model_available(registry_down, cache_dir):
+    assert load_failure_model(None) is None
+
+
+@pytest.mark.parametrize('version', ['latest', '../1', '1.0', '2; DROP'])
+def test_invalid_version_is_rejected_before_any_lookup(registry, cache_dir, version):
+    assert load_failure_model(version) is None
+    assert registry.loaded == []
@@ -0,0 +1,94 @@
+from conftest import make_student
+
+
+def stub_prepa_data(monkeypatch, app, students):
+    """Remplace fetch_features : {str(student_id): features} des étudiants connus"""
+    calls = []
+
+    def fetch_features(student_ids, module_id=None):
+        calls.append((list(student_ids), module_id))
+        return {str(s['student_id']): s for s in students if s['student_id'] in student_ids}
+
+    monkeypatch.setattr(app, 'fetch_features', fetch_features)
+    return calls
+
+
+def count_inferences(monkeypatch, app):
+    rows = []
+    predict_proba = app.model.predict_proba
+    monkeypatch.setattr(app.model, 'predict_proba', lambda X: rows.append(len(X)) or predict_proba(X))
+    return rows
+
+
+def test_results_follow_request_order_with_duplicates(predictor_app, monkeypatch):
+    calls = stub_prepa_data(monkeypatch, predictor_app,
+                            [make_student(1, 90, 5), make_student(2, 35, 80), make_student(3)])
+    inferences = count_inferences(monkeypatch, predictor_app)
+
+    response = predictor_app.app.test_client().post(
+        '/predict/batch', json={'student_ids': [3, 1, 404, 3, 2], 'module_id': 'MATH101'})
+
+    assert response.status_code == 200
+    body = response.get_json()
+    predictions = body['predictions']
+    assert [p['student_id'] for p in predictions] == [3, 1, 404, 3, 2]
+    assert [p['status'] for p in predictions] == ['success', 'success', 'error', 'success', 'success']
+    assert predictions[0]['prediction'] == predictions[3]['prediction']
+    assert body['module_id'] == 'MATH101' and body['model_version'] == '1'
+    assert calls == [([3, 1, 404, 3, 2], 'MATH101')]
+    assert inferences == [3]
+
+
+def test_batch_matches_single_predictions(predictor_app, monkeypatch):
+    students = [make_student(i, 40 + 10 * i, 60 - 10 * i) for i in range(1, 6)]
+    stub_prepa_data(monkeypatch, predictor_app, students)
+    monkeypatch.setattr(predictor_app, 'fetch_student_features',
+                        lambda student_id, module_id=None: students[student_id - 1])
+
+    batch = predictor_app.app.test_client().post(
+        '/predict/batch', json={'student_ids': [1, 2, 3, 4, 5]}).get_json()['predictions']
+
+    for student_id, result in zip(range(1, 6), batch):
+        single = predictor_app.predict_failure(student_id)
+        assert result['prediction']['failure_probability'] == single['failure_probability']
+        assert result['prediction']['risk_level'] == single['risk_level']
+
+
+def test_incomplete_rows_are_reported(predictor_app, monkeypatch):
+    missing = make_student(2)
+    del missing['risk_score']
+    invalid = make_student(3)
+    invalid['average_score'] = 'n/a'
+    saved = []
+    monkeypatch.setattr(predictor_app, 'save_predictions',
+                        lambda rows, version: saved.extend(rows) or len(rows))
+
+    response = predictor_app.app.test_client().post(
+        '/predict/batch', json={'students': [make_student(1), missing, invalid]})
+
+    predictions = response.get_json()['predictions']
+    assert [p['status'] for p in predictions] == ['success', 'error', 'error']
+    assert 'incomplètes' in predictions[1]['error']
+    assert [row[0] for row in saved] == ['1']
+
+
+def test_high_risk_students_get_one_alert_each(predictor_app, monkeypatch):
+    stub_prepa_data(monkeypatch, predictor_app, [make_student(1, 20, 95), make_student(2, 95, 2)])
+    alerts = []
+    monkeypatch.setattr(predictor_app, 'create_alerts', lambda rows: alerts.extend(rows) or len(rows))
+
+    predictor_app.app.test_client().post('/predict/batch', json={'student_ids': [1, 1, 2]})
+
+    assert [alert[0] for alert in alerts] == ['1']
+
+
+def test_batch_validation(predictor_app, monkeypatch):
+    client = predictor_app.app.test_client()
+    monkeypatch.setattr(predictor_app, 'MAX_BATCH_SIZE', 2)
+
+    assert client.post('/predict/batch', json={'student_ids': 1}).status_code == 400
+    assert client.post('/predict/batch', json={'students': [{'average_score': 1}]}).status_code == 400
+    assert client.post('/predict/batch', json={'student_ids': [1, 2, 3]}).status_code == 400
+
+    monkeypatch.setattr(predictor_app, 'model', None)
+    assert client.post('/predict/batch', json={'student_ids': [1]}).status_code == 503
@@ -0,0 +1,48 @@
+"""
+Configuration gunicorn de PrepaData (serveur de production)
+
+    gunicorn -c gunicorn.conf.py app:app
+
+Workers gthread : chaque processus sert ses requêtes avec un pool de
+threads (lectures de features en O(1)) ; les recalculs complets sont confiés
+au pool de processus de compute_pool (COMPUTE_WORKERS). Le jeu de données
+est en mémoire de chaque worker : les sessions ingérées via POST /sessions ne
+sont visibles que du worker qui les reçoit jusqu'au prochain rechargement,
+d'où un seul worker par défaut.
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'src'))
+
+bind = f"0.0.0.0:{os.getenv('PORT', 3002)}"
+worker_class = 'gthread'
+workers = int(os.getenv('WEB_CONCURRENCY', 1))
+threads = int(os.getenv('GUNICORN_THREADS', 16))
+# Contre-pression : la limite doit laisser des threads libres, sinon les
+# requêtes excédentaires attendent dans la file de gunicorn sans jamais
+# atteindre le limiteur (503 + Retry-After). Par défaut, la moitié des
+# threads traite les requêtes, l'autre moitié reçoit et rejette l'excédent.
+max_concurrent_requests = int(os.environ.setdefault(
+    'MAX_CONCURRENT_REQUESTS', str(max(1, threads // 2))))
+if max_concurrent_requests >= threads:
+    print(f"⚠️ MAX_CONCURRENT_REQUESTS={max_concurrent_requests} >= GUNICORN_THREADS={threads}: "
+          "les requêtes excédentaires ne seront jamais rejetées")
+# Connexions acceptées par worker bornées : la file interne du pool de
+# threads reste courte
+worker_connections = threads * 2
+timeout = int(os.getenv('GUNICORN_TIMEOUT', 120))
+keepalive = 5
+accesslog = '-'
+
+
+def post_worker_init(worker):
+    # Chargement après le fork : les threads d'arrière-plan (rechargement,
+    # TTL) ne survivent pas à un fork et doivent démarrer dans le worker
+    from app import warm_up
+    warm_up()
+
+
+def worker_exit(server, worker):
+    from compute_pool import shutdown
+    shutdown()
@@ -1,135 +1,506 @@
-from flask import Flask, jsonify, request
+from flask import Flask, Response, jsonify, request, send_file
 from flask_cors import CORS
 import pandas as pd
 import numpy as np
 import os
+import json
+import threading
+from datetime import date
+import requests
 from dotenv import load_dotenv
+from feature_engine import FeatureStore, ModuleFeatureIndex, features_to_indicators, current_day
+from data_loader import load_activity_store, sessions_to_frame, empty_activity_store
+from dataset_cache import DatasetCache
+from trend_engine import TrendCache, compute_trends, TREND_WINDOW_DAYS
+from database import (
+    insert_session_data, save_student_indicators_bulk,
+    save_processing_log, get_processing_logs
+)
+from run_metrics import RunMetrics
+from compute_pool import compute_cohort_tables, compute_cohort_trends, run_compute
+from risk_models import get_risk_model, activate_risk_model, list_risk_models
+from request_limits import ConcurrencyLimiter
+from distribution_stats import DISTRIBUTION_FEATURES
+from feature_snapshots import write_snapshot, load_latest_snapshot, latest_snapshot_path
 
 load_dotenv()
 
 app = Flask(__name__)
 CORS(app)
+# Contre-pression : 503 + Retry-After au-delà de MAX_CONCURRENT_REQUESTS
+limiter = ConcurrencyLimiter()
+limiter.init_app(app)
 
 PORT = int(os.getenv('PORT', 3002))
 
-# Cache pour les données
-data_cache = None
-
-def get_dummy_data():
-    """Crée des données factices pour les étudiants"""
-    # Données de base (IDs 1-10)
-    base_ids = [str(i) for i in range(1, 11)]
-    base_scores = [75 + (i % 3) * 5 for i in range(10)]
-    base_participation = [0.7 + (i % 3) * 0.1 for i in range(10)]
-    base_time = [30 + (i % 3) * 10 for i in range(10)]
-    base_assignments = [3 + (i % 2) for i in range(10)]
-    base_quiz = [2 + (i % 2) for i in range(10)]
-    base_access = [2 + (i % 4) for i in range(10)]
-    
-    # Données réelles pour les étudiants (12345, 12346, 12347, 12400-12403)
-    # Étudiant 12345 (Mohamed Alami) → AT RISK (scores faibles)
-    # Étudiant 12346 (Fatima Benali) → HIGH PERFORMER
-    # Étudiant 12347 (Youssef Kadiri) → AVERAGE
-    # Étudiant 12400 (Hassan Guedad) → AVERAGE
-    # Étudiant 12401 (Ayoub Bouhdary) → AVERAGE
-    # Étudiant 12402 (Student User) → AVERAGE
-    # Étudiant 12403 (Mohssine Guedad) → AVERAGE
-    real_ids = ['12345', '12346', '12347', '12400', '12401', '12402', '12403']
-    real_scores = [37.67, 95.0, 70.0, 75.0, 72.0, 68.0, 77.0]  # Moyenne des quiz scores
-    real_participation = [0.3, 0.95, 0.7, 0.65, 0.68, 0.62, 0.70]
-    real_time = [11, 57.5, 36.5, 25.0, 28.0, 22.0, 30.0]
-    real_assignments = [1, 9, 6, 5, 5, 4, 6]
-    real_quiz = [3, 3, 3, 3, 3, 3, 3]
-    real_access = [10, 1, 3, 4, 3, 5, 2]
-    
-    data = {
-        'student_id': base_ids + real_ids,
-        'score': base_scores + real_scores,
-        'participation_rate': base_participation + real_participation,
-        'time_spent_hours': base_time + real_time,
-        'assignment_submitted': base_assignments + real_assignments,
-        'quiz_attempts': base_quiz + real_quiz,
-        'last_access_days_ago': base_access + real_access
-    }
-    return pd.DataFrame(data)
+MODULE_KEYS = ModuleFeatureIndex.KEYS
+DATASET_TTL_SECONDS = int(os.getenv('DATASET_TTL_SECONDS', 0))
+# URLs appelées (POST) après chaque rafraîchissement, séparées par des virgules
+DOWNSTREAM_NOTIFY_URLS = [u.strip() for u in os.getenv('DOWNSTREAM_NOTIFY_URLS', '').split(',') if u.strip()]
 
-def load_data():
-    """Charge les données"""
-    global data_cache
-    
-    if data_cache is not None:
-        return data_cache
+def build_dataset(metrics=None):
+    """Charge les lignes d'activité puis calcule la table des features"""
+    metrics = metrics or RunMetrics()
+    with metrics.stage('load'):
+        activity = load_activity_store()
+    print(f"✅ {len(activity)} lignes chargées depuis '{activity.source}' "
+          f"({len(activity.index)} étudiants, {activity.memory_usage_mb():.1f} Mo)")
     
-    # Utiliser les données factices
-    data_cache = get_dummy_data()
-    return data_cache
+    with metrics.stage('compute'):
+        # Calcul lié au CPU : exécuté dans le pool de processus si configuré
+        aggregates, trends, module_aggregates, module_trends = run_compute(
+            compute_cohort_tables, activity.frame, MODULE_KEYS, TREND_WINDOW_DAYS,
+            metrics=metrics)
+        features = FeatureStore(aggregates, trends,
+                                ModuleFeatureIndex(module_aggregates, module_trends))
+    metrics.rows = len(activity)
+    metrics.students = len(features)
+    return activity, features
 
-def calculate_features(student_id, df):
-    """Calcule les features pour un étudiant"""
-    student_data = df[df['student_id'] == str(student_id)]
-    
-    if student_data.empty:
+def notify_downstream(dataset, student_ids=None):
+    """Prévient les services abonnés qu'une nouvelle version est disponible
+
+    Avec student_ids (ingestion), seuls ces étudiants sont signalés : les
+    abonnés n'invalident que leurs entrées.
+    """
+    payload = {'event': 'features_refreshed', 'dataset_version': dataset.version}
+    if student_ids is not None:
+        payload = {'event': 'features_updated', 'dataset_version': dataset.version,
+                   'student_ids': list(student_ids)}
+    for url in DOWNSTREAM_NOTIFY_URLS:
+        try:
+            requests.post(url, json=payload, timeout=5)
+        except Exception as e:
+            print(f"⚠️ Notification de {url} impossible: {e}")
+
+def save_snapshot(dataset):
+    """Écrit le snapshot Parquet d'une version (les erreurs ne sont pas bloquantes)"""
+    try:
+        return write_snapshot(dataset)
+    except Exception as e:
+        print(f"⚠️ Écriture du snapshot impossible: {e}")
         return None
+
+def refresh_from_source():
+    """Recharge les données depuis la source puis écrit le snapshot"""
+    try:
+        dataset = data_cache.reload()
+        save_snapshot(dataset)
+        print(f"🔄 Données rechargées depuis '{dataset.activity.source}' (version {dataset.version})")
+    except Exception as e:
+        print(f"❌ Erreur lors du rechargement des données: {e}")
+
+def warm_up():
+    """Prépare le jeu de données avant la première requête
+
+    Si un snapshot Parquet existe, il est servi immédiatement et les données
+    sources sont rechargées en arrière-plan ; sinon le chargement est
+    effectué directement.
+    """
+    snapshot = load_latest_snapshot()
+    if snapshot is None:
+        save_snapshot(load_data())
+        return
     
-    # Conversion des types
-    student_data = student_data.copy()
-    numeric_cols = ['score', 'participation_rate', 'time_spent_hours', 
-                    'assignment_submitted', 'quiz_attempts', 'last_access_days_ago']
-    for col in numeric_cols:
-        student_data[col] = pd.to_numeric(student_data[col], errors='coerce')
-    
-    avg_score = float(student_data['score'].mean())
-    participation = float(student_data['participation_rate'].mean())
-    last_access = float(student_data['last_access_days_ago'].mean())
-    
-    # Calcul du score de risque
-    score_risk = max(0, 100 - avg_score)
-    participation_risk = max(0, (1 - participation) * 50)
-    access_risk = min(50, last_access * 5)
-    risk_score = float((score_risk * 0.5 + participation_risk * 0.3 + access_risk * 0.2))
-    
-    # Déterminer le niveau d'engagement
-    if participation >= 0.85:
-        engagement_level = 'High'
-    elif participation >= 0.70:
-        engagement_level = 'Medium'
-    else:
-        engagement_level = 'Low'
-    
-    # Features agrégées
-    features = {
-        'student_id': int(student_id),
-        'average_score': avg_score,
-        'total_modules': int(len(student_data)),
-        'average_participation': participation,
-        'total_time_spent': float(student_data['time_spent_hours'].sum()),
-        'average_time_per_module': float(student_data['time_spent_hours'].mean()),
-        'total_assignments': int(student_data['assignment_submitted'].sum()),
-        'total_quiz_attempts': int(student_data['quiz_attempts'].sum()),
-        'average_last_access': last_access,
-        'risk_score': risk_score,
-        'engagement_level': engagement_level,
-        'performance_trend': 'Stable'
-    }
+    features, metadata = snapshot
+    dataset = data_cache.publish(empty_activity_store('snapshot'), features)
+    print(f"⚡ {len(features)} étudiants servis depuis le snapshot "
+          f"{metadata.get('dataset_version')} (version {dataset.version})")
+    threading.Thread(target=refresh_from_source, daemon=True).start()
+
+def run_refresh():
+    """Exécution complète : chargement, calcul, upsert, notification (mesurée)"""
+    metrics = RunMetrics()
+    try:
+        dataset = data_cache.reload(metrics=metrics)
+        with metrics.stage('upsert'):
+            saved = save_student_indicators_bulk(
+                features_to_indicators(dataset.features.features))
+        with metrics.stage('snapshot'):
+            save_snapshot(dataset)
+        with metrics.stage('notify'):
+            notify_downstream(dataset)
+    except Exception as e:
+        summary = metrics.summary()
+        save_processing_log(metrics.students, 'failed', str(e), run_id=metrics.run_id,
+                            duration_ms=summary['duration_ms'],
+                            peak_memory_mb=summary['peak_memory_mb'], metrics=summary)
+        raise
     
+    summary = metrics.summary()
+    summary['dataset_version'] = dataset.version
+    summary['indicators_saved'] = saved
+    save_processing_log(metrics.students, 'success' if saved is not None else 'partial',
+                        run_id=metrics.run_id, duration_ms=summary['duration_ms'],
+                        rows_per_sec=summary['rows_per_sec'],
+                        peak_memory_mb=summary['peak_memory_mb'], metrics=summary)
+    print(f"📊 Rafraîchissement {metrics.run_id}: {summary['stages_ms']} "
+          f"({summary['rows_per_sec']} lignes/s, pic {summary['peak_memory_mb']} Mo)")
+    return dataset, summary
+
+# Cache versionné du jeu de données (rechargement explicite + TTL)
+data_cache = DatasetCache(build_dataset, ttl_seconds=DATASET_TTL_SECONDS)
+# Tendances par fenêtre temporelle (recalculées une fois par version)
+trend_cache = TrendCache()
+# Un seul passage au jour suivant à la fois
+day_lock = threading.Lock()
+
+def roll_over_day(dataset):
+    """Redérive les features qui dépendent du jour courant
+
+    Les lignes conservent la date des sessions : au changement de jour, le
+    dernier accès, le risque et les tendances sont recalculés sans
+    recharger les données. Les autres requêtes servent la table de la
+    veille pendant ce temps.
+    """
+    if not day_lock.acquire(blocking=False):
+        return
+    try:
+        day = current_day()
+        if dataset.features.day == day:
+            return
+        trends, module_trends = None, None
+        if activity_loaded(dataset):
+            trends, module_trends = run_compute(
+                compute_cohort_trends, dataset.activity.frame, MODULE_KEYS,
+                TREND_WINDOW_DAYS, day)
+        dataset.features.set_day(day, trends, module_trends)
+        dataset.bump(dataset.features.features)
+        print(f"📅 Features redérivées pour le {date.fromordinal(day)} (version {dataset.version})")
+    finally:
+        day_lock.release()
+
+def load_data():
+    """Retourne la version courante du jeu de données"""
+    dataset = data_cache.get()
+    if dataset.features.day != current_day():
+        roll_over_day(dataset)
+    return dataset
+
+def calculate_features(student_id, store):
+    """Retourne les features précalculées d'un étudiant"""
+    return store.get(student_id)
+
+def module_index_unavailable():
+    return jsonify({
+        'status': 'error',
+        'message': 'Index par module en cours de construction'
+    }), 503
+
+def activity_unavailable():
+    return jsonify({
+        'status': 'error',
+        'message': 'Lignes d\'activité en cours de chargement (démarrage depuis un snapshot)'
+    }), 503
+
+def activity_loaded(dataset):
+    """Faux tant qu'un démarrage depuis un snapshot n'a pas rechargé les lignes"""
+    return dataset.activity.source != 'snapshot'
+
+def requested_risk_model():
+    """Modèle de risque demandé (?risk_model=version) ou None (modèle servi)
+
+    KeyError si la version est inconnue.
+    """
+    version = request.args.get('risk_model')
+    return get_risk_model(version) if version else None
+
+def unknown_risk_model():
+    return jsonify({
+        'error': f'Modèle de risque inconnu: {request.args.get("risk_model")}'
+    }), 400
+
+def with_risk_model(features, risk_model):
+    """Features avec le risk_score d'un autre modèle (côte à côte pendant un déploiement)"""
+    if risk_model is None or features is None:
+        return features
+    features = dict(features)
+    features['risk_score'] = float(risk_model.score(
+        features['average_score'], features['average_participation'],
+        features['average_last_access']))
     return features
 
+def with_dataset_version(response, dataset):
+    """Ajoute l'ETag et la version du jeu de données à la réponse"""
+    response.headers['ETag'] = dataset.etag
+    response.headers['X-Dataset-Version'] = dataset.version
+    return response
+
 @app.route('/features/<int:student_id>', methods=['GET'])
 def get_features(student_id):
-    """Endpoint pour récupérer les features d'un étudiant"""
+    """Endpoint pour récupérer les features d'un étudiant
+
+    Avec ?module_id=X, seules les features du module X sont renvoyées.
+    """
+    module_id = request.args.get('module_id')
+    try:
+        risk_model = requested_risk_model()
+    except KeyError:
+        return unknown_risk_model()
     try:
-        df = load_data()
-        features = calculate_features(student_id, df)
+        dataset = load_data()
+        if request.if_none_match.contains(dataset.version):
+            return with_dataset_version(Response(status=304), dataset)
+        
+        if module_id:
+            if dataset.features.modules is None:
+                return module_index_unavailable()
+            features = dataset.features.modules.get(student_id, module_id)
+            if features is None:
+                return jsonify({
+                    'error': f'Module {module_id} non trouvé pour l\'étudiant {student_id}'
+                }), 404
+        else:
+            features = calculate_features(student_id, dataset.features)
         
         if features is None:
             return jsonify({
                 'error': f'Étudiant {student_id} non trouvé'
             }), 404
         
+        response = {
+            'status': 'success',
+            'student_id': student_id,
+            'dataset_version': dataset.version,
+            'risk_model': (risk_model or dataset.features.risk_model).version,
+            'features': with_risk_model(features, risk_model)
+        }
+        if module_id:
+            response['module_id'] = module_id
+        return with_dataset_version(jsonify(response), dataset)
+    except Exception as e:
+        print(f"Erreur: {str(e)}")
+        return jsonify({
+            'status': 'error',
+            'message': str(e)
+        }), 500
+
+@app.route('/features/<int:student_id>/modules', methods=['GET'])
+def get_module_features(student_id):
+    """Endpoint pour récupérer les features de chaque module d'un étudiant"""
+    try:
+        risk_model = requested_risk_model()
+    except KeyError:
+        return unknown_risk_model()
+    try:
+        dataset = load_data()
+        if request.if_none_match.contains(dataset.version):
+            return with_dataset_version(Response(status=304), dataset)
+        
+        if dataset.features.modules is None:
+            return module_index_unavailable()
+        
+        modules = dataset.features.modules.modules_for(student_id)
+        if not modules:
+            return jsonify({
+                'error': f'Étudiant {student_id} non trouvé'
+            }), 404
+        
+        return with_dataset_version(jsonify({
+            'status': 'success',
+            'student_id': student_id,
+            'dataset_version': dataset.version,
+            'risk_model': (risk_model or dataset.features.risk_model).version,
+            'modules': {
+                module_id: with_risk_model(features, risk_model)
+                for module_id, features in modules.items()
+            }
+        }), dataset)
+    except Exception as e:
+        print(f"Erreur: {str(e)}")
         return jsonify({
+            'status': 'error',
+            'message': str(e)
+        }), 500
+
+@app.route('/features/<int:student_id>/trend', methods=['GET'])
+def get_trend(student_id):
+    """Endpoint pour récupérer la tendance d'un étudiant sur une fenêtre (jours)"""
+    window = request.args.get('window', TREND_WINDOW_DAYS, type=int)
+    if window is None or window <= 0:
+        return jsonify({
+            'error': 'window doit être un nombre de jours positif'
+        }), 400
+    
+    try:
+        dataset = load_data()
+        if str(student_id) not in dataset.features:
+            return jsonify({
+                'error': f'Étudiant {student_id} non trouvé'
+            }), 404
+        if not activity_loaded(dataset):
+            return activity_unavailable()
+        
+        trends = trend_cache.get(dataset, window, today=dataset.features.day)
+        if str(student_id) in trends.index:
+            trend = trends.loc[str(student_id)]
+            result = {
+                'performance_trend': trend['performance_trend'],
+                'n_points': int(trend['n_points']),
+                'score_slope': float(trend['score_slope']),
+                'recent_mean': None if pd.isna(trend['recent_mean']) else float(trend['recent_mean']),
+                'previous_mean': None if pd.isna(trend['previous_mean']) else float(trend['previous_mean'])
+            }
+        else:
+            result = {'performance_trend': 'Stable', 'n_points': 0}
+        
+        return with_dataset_version(jsonify({
             'status': 'success',
             'student_id': student_id,
-            'features': features
+            'window_days': window,
+            'dataset_version': dataset.version,
+            'trend': result
+        }), dataset)
+    except Exception as e:
+        print(f"Erreur: {str(e)}")
+        return jsonify({
+            'status': 'error',
+            'message': str(e)
+        }), 500
+
+@app.route('/features/snapshot', methods=['GET'])
+def get_features_snapshot():
+    """Endpoint pour télécharger le dernier snapshot Parquet des features"""
+    path = latest_snapshot_path()
+    if path is None:
+        return jsonify({
+            'error': 'Aucun snapshot disponible'
+        }), 404
+    
+    return send_file(os.path.abspath(path), mimetype='application/vnd.apache.parquet',
+                     as_attachment=True, download_name=os.path.basename(path),
+                     conditional=True)
+
+@app.route('/features/batch', methods=['POST'])
+def get_features_batch():
+    """Endpoint pour récupérer les features de plusieurs étudiants (NDJSON)
+
+    Corps : {"student_ids": [1, 2, 3]} ou {"student_ids": "all"}.
+    Une ligne JSON par étudiant est envoyée au fil de l'eau.
+    """
+    data = request.get_json(silent=True) or {}
+    student_ids = data.get('student_ids')
+    
+    if student_ids != 'all' and not isinstance(student_ids, list):
+        return jsonify({
+            'error': 'student_ids doit être une liste d\'identifiants ou "all"'
+        }), 400
+    try:
+        risk_model = requested_risk_model()
+    except KeyError:
+        return unknown_risk_model()
+    
+    try:
+        dataset = load_data()
+    except Exception as e:
+        print(f"Erreur: {str(e)}")
+        return jsonify({
+            'status': 'error',
+            'message': str(e)
+        }), 500
+    
+    def generate():
+        ids = None if student_ids == 'all' else student_ids
+        for student_id, features in dataset.features.iter_features(ids):
+            if features is None:
+                line = {
+                    'status': 'error',
+                    'student_id': student_id,
+                    'error': f'Étudiant {student_id} non trouvé'
+                }
+            else:
+                line = {
+                    'status': 'success',
+                    'student_id': features['student_id'],
+                    'features': with_risk_model(features, risk_model)
+                }
+            yield json.dumps(line, ensure_ascii=False) + '\n'
+    
+    return with_dataset_version(
+        Response(generate(), mimetype='application/x-ndjson'), dataset)
+
+@app.route('/students', methods=['GET'])
+def list_students():
+    """Endpoint pour lister les identifiants des étudiants connus"""
+    try:
+        dataset = load_data()
+        student_ids = [int(i) if i.isdigit() else i for i in dataset.features.student_ids()]
+        return with_dataset_version(jsonify({
+            'status': 'success',
+            'dataset_version': dataset.version,
+            'count': len(student_ids),
+            'student_ids': student_ids
+        }), dataset)
+    except Exception as e:
+        print(f"Erreur: {str(e)}")
+        return jsonify({
+            'status': 'error',
+            'message': str(e)
+        }), 500
+
+@app.route('/sessions', methods=['POST'])
+def ingest_sessions():
+    """Ingestion de nouvelles sessions : mise à jour incrémentale des features
+
+    Corps : {"sessions": [{"student_id": 1, "module_id": "MATH101",
+    "session_date": "2024-05-01", "time_spent": 45, "activities_completed": 2,
+    "score": 78, "participation_rate": 0.8, "quiz_attempts": 1}, ...]}
+    """
+    data = request.get_json(silent=True) or {}
+    sessions = data.get('sessions')
+    
+    if not isinstance(sessions, list) or not sessions:
+        return jsonify({
+            'error': 'sessions doit être une liste non vide'
+        }), 400
+    
+    try:
+        today = date.today().isoformat()
+        sessions = [dict(session, session_date=session.get('session_date') or today)
+                    for session in sessions]
+        rows = sessions_to_frame(sessions)
+    except (ValueError, TypeError, AttributeError) as e:
+        return jsonify({
+            'error': f'Sessions invalides: {e}'
+        }), 400
+    
+    try:
+        dataset = load_data()
+        if not activity_loaded(dataset):
+            # Les tendances des étudiants touchés seraient calculées sur les
+            # seules nouvelles lignes : l'appelant réessaie après le rechargement
+            return activity_unavailable()
+        
+        persisted = insert_session_data(sessions) is not None
+        dataset.activity.append(rows)
+        
+        # Tendances recalculées uniquement pour les étudiants touchés
+        affected = rows['student_id'].astype(str).unique()
+        affected_rows = dataset.activity.rows_for_many(affected)
+        day = dataset.features.day
+        trends = compute_trends(affected_rows, TREND_WINDOW_DAYS, today=day)
+        module_trends = compute_trends(affected_rows, TREND_WINDOW_DAYS, keys=MODULE_KEYS,
+                                       today=day)
+        updated = dataset.features.apply_rows(rows, trends['performance_trend'],
+                                              module_trends['performance_trend'])
+        trend_cache.update(dataset, affected, affected_rows, today=day)
+        dataset.bump(rows)
+        
+        # Garder student_indicators à jour pour les étudiants touchés
+        save_student_indicators_bulk(features_to_indicators(updated))
+        
+        students_updated = [int(i) if i.isdigit() else i for i in updated.index]
+        if DOWNSTREAM_NOTIFY_URLS:
+            # Hors du chemin de la requête : un abonné lent ne retarde pas l'ingestion
+            threading.Thread(target=notify_downstream, args=(dataset, students_updated),
+                             daemon=True).start()
+        
+        return jsonify({
+            'status': 'success',
+            'ingested': len(rows),
+            'persisted': persisted,
+            'dataset_version': dataset.version,
+            'students_updated': students_updated
         })
     except Exception as e:
         print(f"Erreur: {str(e)}")
@@ -138,13 +509,189 @@ def get_features(student_id):
             'message': str(e)
         }), 500
 
+@app.route('/stats/distribution', methods=['GET'])
+def get_distribution():
+    """Endpoint des statistiques de distribution des features de la cohorte
+
+    Paramètres : feature (défaut : toutes), percentiles=25,50,75, bins=10,
+    student_id (rang de l'étudiant) ou value (rang d'une valeur).
+    """
+    feature = request.args.get('feature')
+    bins = request.args.get('bins', 10, type=int)
+    try:
+        percentiles = [float(q) for q in request.args.get('percentiles', '25,50,75').split(',') if q]
+    except ValueError:
+        percentiles = None
+    if not percentiles or any(q < 0 or q > 100 for q in percentiles):
+        return jsonify({
+            'error': 'percentiles doit être une liste de valeurs entre 0 et 100'
+        }), 400
+    if feature is not None and feature not in DISTRIBUTION_FEATURES:
+        return jsonify({
+            'error': f'feature doit être parmi: {", ".join(DISTRIBUTION_FEATURES)}'
+        }), 400
+    if bins is None or not 1 <= bins <= 1000:
+        return jsonify({
+            'error': 'bins doit être un entier entre 1 et 1000'
+        }), 400
+    
+    try:
+        dataset = load_data()
+        distribution = dataset.features.distribution
+        names = [feature] if feature else list(distribution.features)
+        stats = {}
+        for name in names:
+            stats[name] = distribution.get(name).summary(percentiles)
+            if feature:
+                stats[name]['histogram'] = distribution.get(name).histogram(bins)
+        
+        response = {
+            'status': 'success',
+            'dataset_version': dataset.version,
+            'distribution': stats
+        }
+        
+        student_id = request.args.get('student_id')
+        value = request.args.get('value', type=float)
+        if student_id is not None:
+            features = dataset.features.get(student_id)
+            if features is None:
+                return jsonify({
+                    'error': f'Étudiant {student_id} non trouvé'
+                }), 404
+            response['student_id'] = features['student_id']
+            response['rank'] = {
+                name: {'value': features[name],
+                       'percentile_rank': distribution.get(name).rank(features[name])}
+                for name in names
+            }
+        elif value is not None and feature:
+            response['rank'] = {
+                feature: {'value': value,
+                          'percentile_rank': distribution.get(feature).rank(value)}
+            }
+        
+        return with_dataset_version(jsonify(response), dataset)
+    except Exception as e:
+        print(f"Erreur: {str(e)}")
+        return jsonify({
+            'status': 'error',
+            'message': str(e)
+        }), 500
+
+@app.route('/admin/reload', methods=['POST'])
+def reload_dataset():
+    """Recharge le jeu de données depuis la source et publie une nouvelle version
+
+    Les indicateurs de toute la cohorte sont ensuite réécrits dans
+    student_indicators en une seule transaction, puis les services abonnés
+    sont notifiés. Les durées de chaque étape sont enregistrées dans
+    processing_logs.
+    """
+    try:
+        dataset, summary = run_refresh()
+        return with_dataset_version(jsonify({
+            'status': 'success',
+            'dataset_version': dataset.version,
+            'rows': len(dataset.activity),
+            'students': len(dataset.features),
+            'indicators_saved': summary['indicators_saved'],
+            'metrics': summary
+        }), dataset)
+    except Exception as e:
+        print(f"Erreur: {str(e)}")
+        return jsonify({
+            'status': 'error',
+            'message': str(e)
+        }), 500
+
+@app.route('/risk-models', methods=['GET'])
+def get_risk_models():
+    """Endpoint listant les versions du modèle de risque et la version servie"""
+    dataset = data_cache.current
+    return jsonify({
+        'status': 'success',
+        'active': get_risk_model().version,
+        'serving': dataset.features.risk_model.version if dataset else None,
+        'models': list_risk_models()
+    })
+
+@app.route('/admin/risk-model', methods=['POST'])
+def set_risk_model():
+    """Change la version du modèle de risque servie (recalcul en une passe)
+
+    Corps : {"version": "v2"}. risk_score est recalculé pour toute la cohorte
+    sans recharger les données, puis réécrit dans student_indicators.
+    """
+    data = request.get_json(silent=True) or {}
+    version = data.get('version')
+    if not isinstance(version, str) or not version:
+        return jsonify({
+            'error': 'version doit être une chaîne (ex. "v2")'
+        }), 400
+    try:
+        risk_model = activate_risk_model(version)
+    except KeyError:
+        return jsonify({
+            'error': f'Modèle de risque inconnu: {version}'
+        }), 400
+    
+    try:
+        dataset = load_data()
+        dataset.features.set_risk_model(risk_model)
+        dataset.bump(dataset.features.features[['risk_score']])
+        saved = save_student_indicators_bulk(
+            features_to_indicators(dataset.features.features))
+        save_snapshot(dataset)
+        notify_downstream(dataset)
+        print(f"⚖️ Modèle de risque {risk_model.version} appliqué à "
+              f"{len(dataset.features)} étudiants (version {dataset.version})")
+        return with_dataset_version(jsonify({
+            'status': 'success',
+            'risk_model': risk_model.to_dict(),
+            'dataset_version': dataset.version,
+            'students': len(dataset.features),
+            'indicators_saved': saved
+        }), dataset)
+    except Exception as e:
+        print(f"Erreur: {str(e)}")
+        return jsonify({
+            'status': 'error',
+            'message': str(e)
+        }), 500
+
+@app.route('/processing-logs', methods=['GET'])
+def list_processing_logs():
+    """Endpoint pour consulter les N dernières exécutions (métriques par étape)"""
+    limit = request.args.get('limit', 20, type=int)
+    if limit is None or limit <= 0:
+        return jsonify({
+            'error': 'limit doit être un entier positif'
+        }), 400
+    
+    logs = get_processing_logs(min(limit, 500))
+    if logs is None:
+        return jsonify({
+            'status': 'error',
+            'message': 'Impossible de lire processing_logs'
+        }), 503
+    
+    return jsonify({
+        'status': 'success',
+        'count': len(logs),
+        'runs': logs
+    })
+
 @app.route('/health', methods=['GET'])
 def health():
     """Endpoint de santé"""
     return jsonify({
         'status': 'ok',
-        'service': 'PrepaData'
+        'service': 'PrepaData',
+        'concurrency': limiter.stats()
     })
 
 if __name__ == '__main__':
+    # Serveur de développement ; en production : gunicorn -c gunicorn.conf.py app:app
+    warm_up()
     app.run(host='0.0.0.0', port=PORT, debug=True)
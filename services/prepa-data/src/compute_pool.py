@@ -0,0 +1,81 @@
+"""
+Pool de processus pour le calcul des features (PrepaData)
+
+Le recalcul complet (agrégats groupby + tendances de toute la cohorte) est
+lié au CPU : exécuté dans un thread du serveur, il bloquerait les autres
+requêtes (GIL). Avec COMPUTE_WORKERS > 0 il est confié à un pool de
+processus ; le processus serveur ne fait plus que reconstruire la table des
+features à partir des agrégats retournés.
+"""
+import os
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from dotenv import load_dotenv
+from feature_engine import aggregate_by_student, compute_module_aggregates
+from run_metrics import run_measured
+from trend_engine import compute_trends, TREND_WINDOW_DAYS
+
+load_dotenv()
+
+# 0 = calcul dans le processus serveur (mode développement)
+COMPUTE_WORKERS = int(os.getenv('COMPUTE_WORKERS', 0))
+COMPUTE_TIMEOUT_SECONDS = int(os.getenv('COMPUTE_TIMEOUT_SECONDS', 600))
+
+_lock = threading.Lock()
+_executor = None
+
+
+def compute_cohort_tables(frame, module_keys, window_days=TREND_WINDOW_DAYS):
+    """Agrégats et tendances de la cohorte (par étudiant et par module)"""
+    module_aggregates = compute_module_aggregates(frame)
+    student_trends, module_trends = compute_cohort_trends(frame, module_keys, window_days)
+    return aggregate_by_student(module_aggregates), student_trends, module_aggregates, module_trends
+
+
+def compute_cohort_trends(frame, module_keys, window_days=TREND_WINDOW_DAYS, today=None):
+    """Tendances de la cohorte au jour `today` (par étudiant et par module)"""
+    return (
+        compute_trends(frame, window_days, today=today)['performance_trend'],
+        compute_trends(frame, window_days, keys=module_keys, today=today)['performance_trend']
+    )
+
+
+def get_executor():
+    """Pool de processus partagé (créé au premier usage) ou None"""
+    global _executor
+    if COMPUTE_WORKERS <= 0:
+        return None
+    with _lock:
+        if _executor is None:
+            # 'spawn' : les processus fils ne copient pas les threads du serveur
+            _executor = ProcessPoolExecutor(
+                max_workers=COMPUTE_WORKERS,
+                mp_context=multiprocessing.get_context('spawn')
+            )
+        return _executor
+
+
+def run_compute(func, *args, metrics=None):
+    """Exécute un calcul dans le pool (ou directement si le pool est désactivé)
+
+    Dans le pool, le pic mémoire du processus fils pendant le calcul est
+    reporté dans `metrics` (RunMetrics).
+    """
+    executor = get_executor()
+    if executor is None:
+        return func(*args)
+    future = executor.submit(run_measured, func, *args)
+    result, peak_mb = future.result(timeout=COMPUTE_TIMEOUT_SECONDS)
+    if metrics is not None:
+        metrics.record_compute_memory(peak_mb)
+    return result
+
+
+def shutdown():
+    """Arrête le pool (fin du worker serveur)"""
+    global _executor
+    with _lock:
+        if _executor is not None:
+            _executor.shutdown(wait=False, cancel_futures=True)
+            _executor = None
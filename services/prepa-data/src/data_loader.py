@@ -0,0 +1,321 @@
+"""
+Chargement des données d'activité étudiantes (PrepaData)
+
+Sources supportées (variable DATA_SOURCE) :
+- postgres : table session_data de la base PrepaData
+- csv      : fichier data/students.csv (une ligne par étudiant x module)
+- dummy    : données factices de démonstration
+- auto     : csv (sinon dummy) complété par les sessions de session_data
+
+Les données sont lues par morceaux (chunks) puis stockées dans un format
+colonne compact : identifiants en catégories, mesures en float64.
+"""
+import os
+import threading
+from datetime import date
+import numpy as np
+import pandas as pd
+from pandas.api.types import union_categoricals
+from dotenv import load_dotenv
+from feature_engine import current_day
+
+load_dotenv()
+
+DATA_SOURCE = os.getenv('DATA_SOURCE', 'auto')
+STUDENTS_CSV_PATH = os.getenv(
+    'STUDENTS_CSV_PATH',
+    os.path.join(os.path.dirname(__file__), '..', 'data', 'students.csv')
+)
+LOAD_CHUNK_SIZE = int(os.getenv('LOAD_CHUNK_SIZE', 200000))
+
+# Colonnes catégorielles (identifiants) et mesures numériques
+CATEGORY_COLUMNS = ['student_id', 'module_id']
+MEASURE_COLUMNS = [
+    'score', 'participation_rate', 'time_spent_hours',
+    'assignment_submitted', 'quiz_attempts', 'last_access_day'
+]
+# Le dernier accès est stocké comme numéro de jour (date.toordinal()) : le
+# nombre de jours écoulés est calculé au moment de dériver les features et
+# les tendances. Les sources sans date (CSV, données factices) donnent
+# last_access_days_ago, converti par rapport au jour du chargement.
+DAYS_AGO_COLUMN = 'last_access_days_ago'
+# Lignes datées (une session de session_data) : seules utilisables pour
+# les tendances. Les lignes du CSV et des données factices résument un
+# module (dernier accès au module), elles ne sont pas datées.
+DATED_COLUMN = 'dated'
+ACTIVITY_COLUMNS = CATEGORY_COLUMNS + MEASURE_COLUMNS + [DATED_COLUMN]
+
+# session_data -> schéma des lignes d'activité (time_spent est en minutes)
+SESSION_DATA_QUERY = """
+    SELECT student_id,
+           COALESCE(module_id, 'ALL') AS module_id,
+           score::float AS score,
+           participation_rate::float AS participation_rate,
+           time_spent / 60.0 AS time_spent_hours,
+           activities_completed AS assignment_submitted,
+           quiz_attempts,
+           session_date - DATE '0001-01-01' + 1 AS last_access_day,
+           TRUE AS dated
+    FROM session_data
+"""
+
+
+def get_dummy_data():
+    """Crée des données factices pour les étudiants"""
+    # Données de base (IDs 1-10)
+    base_ids = [str(i) for i in range(1, 11)]
+    base_scores = [75 + (i % 3) * 5 for i in range(10)]
+    base_participation = [0.7 + (i % 3) * 0.1 for i in range(10)]
+    base_time = [30 + (i % 3) * 10 for i in range(10)]
+    base_assignments = [3 + (i % 2) for i in range(10)]
+    base_quiz = [2 + (i % 2) for i in range(10)]
+    base_access = [2 + (i % 4) for i in range(10)]
+
+    # Données réelles pour les étudiants (12345, 12346, 12347, 12400-12403)
+    # Étudiant 12345 (Mohamed Alami) → AT RISK (scores faibles)
+    # Étudiant 12346 (Fatima Benali) → HIGH PERFORMER
+    # Étudiant 12347 (Youssef Kadiri) → AVERAGE
+    # Étudiant 12400 (Hassan Guedad) → AVERAGE
+    # Étudiant 12401 (Ayoub Bouhdary) → AVERAGE
+    # Étudiant 12402 (Student User) → AVERAGE
+    # Étudiant 12403 (Mohssine Guedad) → AVERAGE
+    real_ids = ['12345', '12346', '12347', '12400', '12401', '12402', '12403']
+    real_scores = [37.67, 95.0, 70.0, 75.0, 72.0, 68.0, 77.0]  # Moyenne des quiz scores
+    real_participation = [0.3, 0.95, 0.7, 0.65, 0.68, 0.62, 0.70]
+    real_time = [11, 57.5, 36.5, 25.0, 28.0, 22.0, 30.0]
+    real_assignments = [1, 9, 6, 5, 5, 4, 6]
+    real_quiz = [3, 3, 3, 3, 3, 3, 3]
+    real_access = [10, 1, 3, 4, 3, 5, 2]
+
+    data = {
+        'student_id': base_ids + real_ids,
+        'score': base_scores + real_scores,
+        'participation_rate': base_participation + real_participation,
+        'time_spent_hours': base_time + real_time,
+        'assignment_submitted': base_assignments + real_assignments,
+        'quiz_attempts': base_quiz + real_quiz,
+        DAYS_AGO_COLUMN: base_access + real_access
+    }
+    return pd.DataFrame(data)
+
+
+def normalize_chunk(chunk, today=None):
+    """Convertit un morceau de données au schéma typé des lignes d'activité"""
+    chunk = chunk.copy()
+    if 'module_id' not in chunk.columns:
+        chunk['module_id'] = 'ALL'
+    if 'last_access_day' not in chunk.columns and DAYS_AGO_COLUMN in chunk.columns:
+        today = current_day() if today is None else today
+        chunk['last_access_day'] = today - pd.to_numeric(chunk[DAYS_AGO_COLUMN], errors='coerce')
+
+    typed = {}
+    for col in CATEGORY_COLUMNS:
+        typed[col] = chunk[col].astype(str).astype('category')
+    for col in MEASURE_COLUMNS:
+        values = chunk[col] if col in chunk.columns else np.nan
+        values = pd.Series(values, index=chunk.index)
+        typed[col] = pd.to_numeric(values, errors='coerce').astype('float64')
+    dated = chunk[DATED_COLUMN] if DATED_COLUMN in chunk.columns else False
+    typed[DATED_COLUMN] = pd.Series(dated, index=chunk.index).fillna(False).astype(bool)
+    return pd.DataFrame(typed, index=chunk.index)
+
+
+def concat_chunks(chunks):
+    """Concatène des morceaux typés en unifiant les catégories"""
+    if not chunks:
+        return normalize_chunk(pd.DataFrame(columns=ACTIVITY_COLUMNS))
+
+    columns = {}
+    for col in CATEGORY_COLUMNS:
+        columns[col] = union_categoricals([c[col] for c in chunks])
+    for col in MEASURE_COLUMNS + [DATED_COLUMN]:
+        columns[col] = np.concatenate([c[col].to_numpy() for c in chunks])
+    return pd.DataFrame(columns)
+
+
+def sessions_to_frame(sessions, today=None):
+    """Convertit des événements session_data (JSON) en lignes d'activité typées"""
+    today = today or date.today()
+    raw = pd.DataFrame(sessions)
+    if 'student_id' not in raw.columns or raw['student_id'].isna().any():
+        raise ValueError('student_id est requis pour chaque session')
+
+    if 'session_date' in raw.columns:
+        session_dates = pd.to_datetime(raw['session_date']).dt.date.fillna(today)
+    else:
+        session_dates = pd.Series([today] * len(raw), index=raw.index)
+
+    column = lambda name: raw[name] if name in raw.columns else np.nan
+    rows = pd.DataFrame({
+        'student_id': raw['student_id'],
+        'module_id': raw['module_id'].fillna('ALL') if 'module_id' in raw.columns else 'ALL',
+        'score': column('score'),
+        'participation_rate': column('participation_rate'),
+        'time_spent_hours': pd.to_numeric(column('time_spent'), errors='coerce') / 60.0,
+        'assignment_submitted': column('activities_completed'),
+        'quiz_attempts': column('quiz_attempts'),
+        'last_access_day': [d.toordinal() for d in session_dates],
+        DATED_COLUMN: True
+    }, index=raw.index)
+    return normalize_chunk(rows)
+
+
+class ActivityStore:
+    """Lignes d'activité en colonnes, triées et indexées par étudiant
+
+    Les lignes ajoutées (ingestion) sont mises en attente et fusionnées
+    paresseusement lors de la prochaine lecture du frame. Les lignes en
+    attente sont indexées par étudiant dès l'ajout : rows_for ne parcourt
+    que celles de l'étudiant demandé, quel que soit le nombre d'ingestions
+    depuis la dernière fusion.
+    """
+
+    def __init__(self, frame, source='unknown'):
+        self.source = source
+        self._lock = threading.Lock()
+        self._pending = []
+        self._pending_index = {}
+        self._set_frame(frame)
+
+    def _set_frame(self, frame):
+        codes = frame['student_id'].cat.codes.to_numpy()
+        order = np.argsort(codes, kind='stable')
+        self._frame = frame.take(order).reset_index(drop=True)
+        self._index = self._build_index(self._frame['student_id'])
+
+    def _compact(self):
+        """Fusionne les lignes en attente dans le frame trié"""
+        with self._lock:
+            if self._pending:
+                pending, self._pending = self._pending, []
+                self._pending_index = {}
+                self._set_frame(concat_chunks([self._frame] + pending))
+
+    @property
+    def frame(self):
+        self._compact()
+        return self._frame
+
+    @property
+    def index(self):
+        self._compact()
+        return self._index
+
+    def append(self, rows):
+        """Ajoute des lignes d'activité typées (fusion différée)
+
+        Le coût dépend du nombre de lignes ajoutées, pas de la taille du store.
+        """
+        positions = rows.groupby(rows['student_id'].astype(str), observed=True,
+                                 sort=False).indices
+        with self._lock:
+            self._pending.append(rows)
+            for student_id, rows_positions in positions.items():
+                self._pending_index.setdefault(student_id, []).append((rows, rows_positions))
+
+    @staticmethod
+    def _build_index(student_ids):
+        """Index student_id -> (début, fin) des lignes contiguës"""
+        codes = student_ids.cat.codes.to_numpy()
+        if len(codes) == 0:
+            return {}
+        starts = np.concatenate([[0], np.flatnonzero(np.diff(codes)) + 1])
+        stops = np.append(starts[1:], len(codes))
+        categories = student_ids.cat.categories
+        return {
+            str(categories[codes[start]]): (int(start), int(stop))
+            for start, stop in zip(starts, stops)
+        }
+
+    def rows_for(self, student_id):
+        """Lignes d'activité d'un étudiant (tranche du frame + lignes en attente)"""
+        student_id = str(student_id)
+        with self._lock:
+            frame, index = self._frame, self._index
+            pending = list(self._pending_index.get(student_id, ()))
+        bounds = index.get(student_id)
+        rows = frame.iloc[bounds[0]:bounds[1]] if bounds else frame.iloc[0:0]
+        extra = [chunk.take(positions) for chunk, positions in pending]
+        if not extra:
+            return rows
+        return concat_chunks([rows] + extra)
+
+    def rows_for_many(self, student_ids):
+        """Lignes d'activité de plusieurs étudiants"""
+        return concat_chunks([self.rows_for(student_id) for student_id in student_ids])
+
+    def memory_usage_mb(self):
+        return float(self.frame.memory_usage(deep=True).sum() / 1024 ** 2)
+
+    def __len__(self):
+        return len(self._frame) + sum(len(rows) for rows in self._pending)
+
+
+def empty_activity_store(source='empty'):
+    """Store vide (ex. service démarré depuis un snapshot de features)"""
+    return ActivityStore(concat_chunks([]), source=source)
+
+
+def read_csv_chunks(path, chunksize=LOAD_CHUNK_SIZE):
+    """Lit le CSV des étudiants par morceaux typés"""
+    usecols = lambda col: col in ACTIVITY_COLUMNS or col == DAYS_AGO_COLUMN
+    chunks = []
+    for chunk in pd.read_csv(path, usecols=usecols, chunksize=chunksize,
+                             dtype={'student_id': str, 'module_id': str}):
+        chunks.append(normalize_chunk(chunk))
+    return concat_chunks(chunks)
+
+
+def read_postgres_chunks(chunksize=LOAD_CHUNK_SIZE):
+    """Lit la table session_data par morceaux typés
+
+    Curseur nommé (côté serveur) : le client ne reçoit que `chunksize` lignes
+    à la fois au lieu du résultat complet.
+    """
+    from database import get_db_connection
+
+    chunks = []
+    with get_db_connection() as conn:
+        with conn.cursor(name='prepa_session_data') as cur:
+            cur.itersize = chunksize
+            cur.execute(SESSION_DATA_QUERY)
+            while True:
+                records = cur.fetchmany(chunksize)
+                if not records:
+                    break
+                columns = [column[0] for column in cur.description]
+                chunks.append(normalize_chunk(pd.DataFrame.from_records(records, columns=columns)))
+    return concat_chunks(chunks)
+
+
+def read_base_chunks(source):
+    """Lignes de base : le CSV des étudiants, sinon les données factices (auto)"""
+    if os.path.exists(STUDENTS_CSV_PATH):
+        return read_csv_chunks(STUDENTS_CSV_PATH), 'csv'
+    if source == 'csv':
+        raise FileNotFoundError(f'Fichier introuvable: {STUDENTS_CSV_PATH}')
+    print(f'⚠️ {STUDENTS_CSV_PATH} introuvable, utilisation des données factices')
+    return normalize_chunk(get_dummy_data()), 'dummy'
+
+
+def load_activity_store(source=None):
+    """Charge les lignes d'activité depuis la source configurée
+
+    En mode auto, les sessions de session_data (dont celles ingérées par
+    POST /sessions) s'ajoutent à la cohorte du CSV au lieu de la remplacer.
+    """
+    source = source or DATA_SOURCE
+    if source == 'postgres':
+        return ActivityStore(read_postgres_chunks(), source='postgres')
+    if source == 'dummy':
+        return ActivityStore(normalize_chunk(get_dummy_data()), source='dummy')
+
+    frame, name = read_base_chunks(source)
+    if source == 'auto':
+        try:
+            sessions = read_postgres_chunks()
+            if len(sessions) > 0:
+                frame, name = concat_chunks([frame, sessions]), f'{name}+postgres'
+        except Exception as e:
+            print(f'⚠️ session_data indisponible, {name} seul: {e}')
+    return ActivityStore(frame, source=name)
@@ -1,9 +1,11 @@
 """
 Module de connexion PostgreSQL pour PrepaData
 """
+import io
+import json
 import os
 import psycopg2
-from psycopg2.extras import RealDictCursor
+from psycopg2.extras import RealDictCursor, execute_values
 from psycopg2.pool import SimpleConnectionPool
 from contextlib import contextmanager
 from dotenv import load_dotenv
@@ -77,6 +79,18 @@ def init_tables():
                     );
                 """)
                 
+                # Colonnes nécessaires au calcul des features depuis session_data
+                cur.execute("""
+                    ALTER TABLE session_data
+                        ADD COLUMN IF NOT EXISTS module_id VARCHAR(50),
+                        ADD COLUMN IF NOT EXISTS participation_rate DECIMAL(5,2),
+                        ADD COLUMN IF NOT EXISTS quiz_attempts INTEGER;
+                """)
+                cur.execute("""
+                    CREATE INDEX IF NOT EXISTS idx_session_data_student
+                    ON session_data (student_id);
+                """)
+                
                 cur.execute("""
                     CREATE TABLE IF NOT EXISTS processing_logs (
                         id SERIAL PRIMARY KEY,
@@ -87,6 +101,17 @@ def init_tables():
                     );
                 """)
                 
+                # Métriques par shard / par exécution
+                cur.execute("""
+                    ALTER TABLE processing_logs
+                        ADD COLUMN IF NOT EXISTS run_id VARCHAR(100),
+                        ADD COLUMN IF NOT EXISTS shard_index INTEGER,
+                        ADD COLUMN IF NOT EXISTS duration_ms DECIMAL(12,2),
+                        ADD COLUMN IF NOT EXISTS rows_per_sec DECIMAL(12,2),
+                        ADD COLUMN IF NOT EXISTS peak_memory_mb DECIMAL(10,2),
+                        ADD COLUMN IF NOT EXISTS metrics JSONB;
+                """)
+                
         print('✅ PrepaData database tables initialized')
     except Exception as e:
         print(f'❌ Error initializing tables: {e}')
@@ -129,21 +154,123 @@ def save_student_indicators(student_id, indicators):
         print(f'Error saving student indicators: {e}')
         return None
 
-def save_processing_log(students_processed, status, error_message=None):
-    """Sauvegarde un log de traitement"""
+INDICATOR_COLUMNS = [
+    'engagement_rate', 'success_rate', 'access_frequency', 'avg_time_spent',
+    'avg_score', 'participation_rate', 'risk_score', 'trend'
+]
+
+def save_student_indicators_bulk(indicators):
+    """Sauvegarde les indicateurs de toute une cohorte en une transaction
+
+    indicators : DataFrame indexé par student_id (colonnes INDICATOR_COLUMNS).
+    Les lignes sont copiées (COPY) dans une table temporaire puis fusionnées
+    dans student_indicators par un seul INSERT ... ON CONFLICT.
+    """
+    if len(indicators) == 0:
+        return 0
+    
+    buffer = io.StringIO()
+    frame = indicators[INDICATOR_COLUMNS].copy()
+    frame.insert(0, 'student_id', indicators.index.astype(str))
+    frame.to_csv(buffer, index=False, header=False)
+    buffer.seek(0)
+    
+    columns = ', '.join(['student_id'] + INDICATOR_COLUMNS)
+    updates = ',\n'.join(f'{col} = EXCLUDED.{col}' for col in INDICATOR_COLUMNS)
+    try:
+        with get_db_connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute("""
+                    CREATE TEMP TABLE student_indicators_staging (
+                        student_id VARCHAR(50),
+                        engagement_rate DECIMAL(5,2),
+                        success_rate DECIMAL(5,2),
+                        access_frequency DECIMAL(5,2),
+                        avg_time_spent DECIMAL(10,2),
+                        avg_score DECIMAL(5,2),
+                        participation_rate DECIMAL(5,2),
+                        risk_score DECIMAL(5,2),
+                        trend VARCHAR(20)
+                    ) ON COMMIT DROP;
+                """)
+                cur.copy_expert(
+                    f"COPY student_indicators_staging ({columns}) FROM STDIN WITH (FORMAT csv)",
+                    buffer
+                )
+                cur.execute(f"""
+                    INSERT INTO student_indicators ({columns})
+                    SELECT {columns} FROM student_indicators_staging
+                    ON CONFLICT (student_id)
+                    DO UPDATE SET
+                        {updates},
+                        updated_at = CURRENT_TIMESTAMP;
+                """)
+                return cur.rowcount
+    except Exception as e:
+        print(f'Error saving student indicators (bulk): {e}')
+        return None
+
+def insert_session_data(sessions):
+    """Insère un lot de sessions dans session_data (une seule requête)"""
+    try:
+        with get_db_connection() as conn:
+            with conn.cursor() as cur:
+                execute_values(cur, """
+                    INSERT INTO session_data
+                    (student_id, module_id, session_date, time_spent,
+                     activities_completed, score, participation_rate, quiz_attempts)
+                    VALUES %s;
+                """, [(
+                    str(session['student_id']),
+                    session.get('module_id'),
+                    session['session_date'],
+                    session.get('time_spent'),
+                    session.get('activities_completed'),
+                    session.get('score'),
+                    session.get('participation_rate'),
+                    session.get('quiz_attempts')
+                ) for session in sessions])
+                return len(sessions)
+    except Exception as e:
+        print(f'Error inserting session data: {e}')
+        return None
+
+def save_processing_log(students_processed, status, error_message=None, run_id=None,
+                        shard_index=None, duration_ms=None, rows_per_sec=None,
+                        peak_memory_mb=None, metrics=None):
+    """Sauvegarde un log de traitement (avec métriques optionnelles)"""
     try:
         with get_db_connection() as conn:
             with conn.cursor() as cur:
                 cur.execute("""
-                    INSERT INTO processing_logs (students_processed, status, error_message)
-                    VALUES (%s, %s, %s)
+                    INSERT INTO processing_logs
+                    (students_processed, status, error_message, run_id, shard_index,
+                     duration_ms, rows_per_sec, peak_memory_mb, metrics)
+                    VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
                     RETURNING *;
-                """, (students_processed, status, error_message))
+                """, (students_processed, status, error_message, run_id, shard_index,
+                      duration_ms, rows_per_sec, peak_memory_mb,
+                      json.dumps(metrics) if metrics is not None else None))
                 return cur.fetchone()
     except Exception as e:
         print(f'Error saving processing log: {e}')
         return None
 
+def get_processing_logs(limit=20):
+    """Récupère les derniers logs de traitement (du plus récent au plus ancien)"""
+    try:
+        with get_db_connection() as conn:
+            with conn.cursor(cursor_factory=RealDictCursor) as cur:
+                cur.execute("""
+                    SELECT * FROM processing_logs
+                    ORDER BY process_date DESC, id DESC
+                    LIMIT %s;
+                """, (limit,))
+                return cur.fetchall()
+    except Exception as e:
+        print(f'Error fetching processing logs: {e}')
+        return None
+
 # Initialiser le pool au chargement du module
 init_pool()
 
@@ -0,0 +1,110 @@
+"""
+Cache versionné du jeu de données PrepaData
+
+Le jeu de données (lignes d'activité + table des features) est construit
+entièrement à part puis publié par un simple échange de référence : les
+lecteurs voient toujours soit l'ancienne version complète, soit la nouvelle.
+"""
+import hashlib
+import threading
+import time
+import pandas as pd
+
+
+def content_hash(frame, previous=''):
+    """Empreinte courte et déterministe d'un DataFrame (chaînable)"""
+    digest = hashlib.sha1(previous.encode())
+    digest.update(pd.util.hash_pandas_object(frame, index=True).to_numpy().tobytes())
+    return digest.hexdigest()[:16]
+
+
+class Dataset:
+    """Version publiée du jeu de données
+
+    La version est une empreinte du contenu : deux workers (ou deux
+    redémarrages) ayant chargé les mêmes données exposent le même ETag.
+    """
+
+    def __init__(self, activity, features, generation):
+        self.activity = activity
+        self.features = features
+        self.generation = generation
+        self.version = content_hash(features.aggregates)
+        self.loaded_at = time.time()
+
+    @property
+    def etag(self):
+        return f'"{self.version}"'
+
+    def bump(self, rows):
+        """Signale une modification incrémentale (lignes ingérées)"""
+        self.version = content_hash(rows, previous=self.version)
+
+
+class DatasetCache:
+    """Cache du jeu de données avec rechargement explicite et TTL
+
+    - get()    : version courante (chargement initial bloquant, puis
+                 rafraîchissement en arrière-plan lorsque le TTL est dépassé)
+    - reload() : reconstruit le jeu de données puis l'échange atomiquement
+    """
+
+    def __init__(self, builder, ttl_seconds=0):
+        self._builder = builder
+        self.ttl_seconds = ttl_seconds
+        self._current = None
+        self._generation = 0
+        self._reload_lock = threading.Lock()
+        self._refreshing = False
+
+    def get(self):
+        """Retourne la version courante du jeu de données"""
+        dataset = self._current
+        if dataset is None:
+            return self.reload(only_if_missing=True)
+        if self.is_expired(dataset):
+            self._refresh_in_background()
+        return dataset
+
+    def is_expired(self, dataset):
+        return self.ttl_seconds > 0 and time.time() - dataset.loaded_at > self.ttl_seconds
+
+    def reload(self, only_if_missing=False, **builder_kwargs):
+        """Construit une nouvelle version puis la publie (échange atomique)"""
+        with self._reload_lock:
+            if only_if_missing and self._current is not None:
+                return self._current
+            activity, features = self._builder(**builder_kwargs)
+            self._generation += 1
+            dataset = Dataset(activity, features, self._generation)
+            # Échange de référence : atomique pour les lecteurs
+            self._current = dataset
+            return dataset
+
+    def publish(self, activity, features):
+        """Publie une version déjà construite (ex. relue depuis un snapshot)"""
+        with self._reload_lock:
+            self._generation += 1
+            dataset = Dataset(activity, features, self._generation)
+            self._current = dataset
+            return dataset
+
+    def _refresh_in_background(self):
+        if self._refreshing:
+            return
+        self._refreshing = True
+
+        def refresh():
+            try:
+                dataset = self.reload()
+                print(f'🔄 Jeu de données rafraîchi (version {dataset.version})')
+            except Exception as e:
+                print(f'❌ Erreur lors du rafraîchissement du jeu de données: {e}')
+            finally:
+                self._refreshing = False
+
+        threading.Thread(target=refresh, daemon=True).start()
+
+    @property
+    def current(self):
+        return self._current
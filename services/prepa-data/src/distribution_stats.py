@@ -0,0 +1,114 @@
+"""
+Statistiques de distribution des features de la cohorte (PrepaData)
+
+Pour chaque feature numérique, les valeurs de la cohorte sont conservées
+triées. Un percentile est alors une lecture d'index, le rang d'un étudiant
+une recherche dichotomique, et un histogramme quelques recherches
+dichotomiques : aucune requête ne parcourt les étudiants. Les mises à jour
+incrémentales (ingestion) remplacent l'ancienne valeur par la nouvelle.
+
+À la taille de nos cohortes, ce tableau trié exact est plus simple et plus
+rapide qu'un sketch approximatif (t-digest) tout en restant compact.
+"""
+import threading
+import numpy as np
+
+DISTRIBUTION_FEATURES = [
+    'average_score', 'average_participation', 'total_time_spent',
+    'average_time_per_module', 'total_assignments', 'total_quiz_attempts',
+    'average_last_access', 'risk_score'
+]
+
+
+class FeatureDistribution:
+    """Distribution d'une feature : valeurs triées + somme courante"""
+
+    def __init__(self, values):
+        values = np.asarray(values, dtype='float64')
+        self._values = np.sort(values[~np.isnan(values)])
+        self._sum = float(self._values.sum())
+
+    def __len__(self):
+        return len(self._values)
+
+    def replace(self, old_values, new_values):
+        """Retire les anciennes valeurs et insère les nouvelles (ordre conservé)"""
+        values = self._values
+        old_values = np.asarray(old_values, dtype='float64')
+        old_values = np.sort(old_values[~np.isnan(old_values)])
+        if len(old_values):
+            # Les doublons occupent des positions consécutives
+            occurrence = np.arange(len(old_values)) - np.searchsorted(old_values, old_values)
+            positions = np.searchsorted(values, old_values) + occurrence
+            found = positions < len(values)
+            found[found] = values[positions[found]] == old_values[found]
+            values = np.delete(values, positions[found])
+            self._sum -= float(old_values[found].sum())
+
+        new_values = np.asarray(new_values, dtype='float64')
+        new_values = np.sort(new_values[~np.isnan(new_values)])
+        if len(new_values):
+            values = np.insert(values, np.searchsorted(values, new_values), new_values)
+            self._sum += float(new_values.sum())
+        self._values = values
+
+    def percentile(self, q):
+        """Percentile q (0-100), interpolation linéaire comme numpy.percentile"""
+        values = self._values
+        if len(values) == 0:
+            return None
+        position = (len(values) - 1) * q / 100
+        lower = int(np.floor(position))
+        upper = min(lower + 1, len(values) - 1)
+        return float(values[lower] + (values[upper] - values[lower]) * (position - lower))
+
+    def rank(self, value):
+        """Rang percentile d'une valeur (inférieures + moitié des égalités)"""
+        values = self._values
+        if len(values) == 0 or value is None or np.isnan(value):
+            return None
+        below = np.searchsorted(values, value, side='left')
+        equal = np.searchsorted(values, value, side='right') - below
+        return float((below + 0.5 * equal) / len(values) * 100)
+
+    def histogram(self, bins=10):
+        """Histogramme à intervalles égaux entre min et max"""
+        values = self._values
+        if len(values) == 0:
+            return {'edges': [], 'counts': []}
+        edges = np.linspace(values[0], values[-1], bins + 1)
+        cumulative = np.searchsorted(values, edges, side='left')
+        cumulative[-1] = len(values)  # le maximum appartient au dernier intervalle
+        return {'edges': edges.tolist(), 'counts': np.diff(cumulative).tolist()}
+
+    def summary(self, percentiles=(25, 50, 75)):
+        values = self._values
+        if len(values) == 0:
+            return {'count': 0}
+        return {
+            'count': len(values),
+            'min': float(values[0]),
+            'max': float(values[-1]),
+            'mean': self._sum / len(values),
+            'percentiles': {str(q): self.percentile(q) for q in percentiles}
+        }
+
+
+class CohortDistribution:
+    """Distributions de toutes les features numériques de la cohorte"""
+
+    def __init__(self, features):
+        self._lock = threading.Lock()
+        self.features = {
+            name: FeatureDistribution(features[name].to_numpy())
+            for name in DISTRIBUTION_FEATURES if name in features.columns
+        }
+
+    def get(self, name):
+        return self.features.get(name)
+
+    def replace(self, old_features, new_features):
+        """Met à jour les distributions (anciennes lignes -> nouvelles lignes)"""
+        with self._lock:
+            for name, distribution in self.features.items():
+                distribution.replace(old_features[name].to_numpy(), new_features[name].to_numpy())
@@ -0,0 +1,464 @@
+"""
+Moteur de calcul des features pour toute la cohorte (PrepaData)
+
+Les features sont calculées en une seule passe groupby/NumPy sur l'ensemble
+des lignes d'activité, puis conservées dans une table indexée par étudiant.
+La consultation d'un étudiant devient alors une simple lecture de dictionnaire.
+
+Les agrégats conservent le jour (ordinal) du dernier accès à chaque module ;
+les jours écoulés, et donc le risque, sont dérivés pour un jour donné
+(FeatureStore.set_day au changement de jour).
+"""
+import threading
+from datetime import date
+import numpy as np
+import pandas as pd
+from distribution_stats import CohortDistribution, FeatureDistribution
+from risk_models import get_risk_model
+
+# Colonnes numériques brutes (une ligne = un étudiant x un module)
+NUMERIC_COLUMNS = [
+    'score', 'participation_rate', 'time_spent_hours',
+    'assignment_submitted', 'quiz_attempts', 'last_access_day'
+]
+
+MODULE_KEYS = ['student_id', 'module_id']
+
+# Colonnes des agrégats conservés (sommes et effectifs). Par module,
+# recent_access_sum est le jour du dernier accès (maximum des numéros de
+# jour) et recent_access_count vaut 1 s'il est connu ; par étudiant, ce sont
+# les sommes sur ses modules.
+AGGREGATE_COLUMNS = (
+    ['n_rows', 'n_modules']
+    + [f'{col}_sum' for col in NUMERIC_COLUMNS]
+    + [f'{col}_count' for col in NUMERIC_COLUMNS]
+    + ['recent_access_sum', 'recent_access_count']
+)
+
+
+def current_day():
+    """Numéro du jour courant (date.toordinal())"""
+    return date.today().toordinal()
+
+
+def _safe_mean(sums, counts):
+    """Moyenne vectorisée (NaN lorsque l'effectif est nul)"""
+    sums = np.asarray(sums, dtype='float64')
+    counts = np.asarray(counts, dtype='float64')
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return np.where(counts > 0, sums / counts, np.nan)
+
+
+def compute_risk_scores(avg_score, participation, last_access, risk_model=None):
+    """Calcule le score de risque pour un tableau d'étudiants (modèle actif par défaut)"""
+    return (risk_model or get_risk_model()).score(avg_score, participation, last_access)
+
+
+def compute_engagement_levels(participation):
+    """Détermine le niveau d'engagement pour un tableau d'étudiants"""
+    return np.select(
+        [participation >= 0.85, participation >= 0.70],
+        ['High', 'Medium'],
+        default='Low'
+    )
+
+
+def _group_key(series):
+    """Clé de regroupement : les catégories sont utilisées telles quelles"""
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        return series
+    return series.astype(str)
+
+
+def compute_module_aggregates(df):
+    """Agrège les lignes d'activité par (étudiant, module) en une passe"""
+    values = df[NUMERIC_COLUMNS].apply(pd.to_numeric, errors='coerce').astype('float64')
+    grouped = values.groupby([_group_key(df[key]) for key in MODULE_KEYS],
+                             sort=False, observed=True)
+    sums = grouped.sum().add_suffix('_sum')
+    counts = grouped.count().add_suffix('_count')
+    recent = grouped['last_access_day'].max()
+
+    aggregates = pd.concat([sums, counts], axis=1)
+    aggregates.insert(0, 'n_rows', grouped.size())
+    aggregates.insert(1, 'n_modules', 1)
+    aggregates['recent_access_sum'] = recent.fillna(0)
+    aggregates['recent_access_count'] = recent.notna().astype('int64')
+    aggregates.index = string_index(aggregates.index, MODULE_KEYS)
+    return aggregates[AGGREGATE_COLUMNS]
+
+
+def aggregate_by_student(module_aggregates):
+    """Agrégats par étudiant : somme des agrégats de ses modules"""
+    return module_aggregates.groupby(level='student_id', sort=False).sum()
+
+
+def compute_aggregates(df):
+    """Agrège les lignes d'activité par étudiant (via le détail par module)"""
+    return aggregate_by_student(compute_module_aggregates(df))
+
+
+def string_index(index, keys):
+    """Index (simple ou multiple) dont les niveaux sont des chaînes"""
+    if isinstance(keys, str):
+        return pd.Index(index.astype(str), name=keys)
+    return pd.MultiIndex.from_arrays(
+        [index.get_level_values(level).astype(str) for level in range(len(keys))],
+        names=list(keys)
+    )
+
+
+def derive_features(aggregates, trends=None, risk_model=None, today=None):
+    """Dérive la table des features à partir des agrégats (vectorisé)
+
+    average_last_access est compté en jours écoulés au jour `today` (numéro
+    de jour, aujourd'hui par défaut).
+    """
+    today = current_day() if today is None else today
+    avg_score = _safe_mean(aggregates['score_sum'], aggregates['score_count'])
+    participation = _safe_mean(aggregates['participation_rate_sum'],
+                               aggregates['participation_rate_count'])
+    # Moyenne sur les modules du dernier accès à chacun : une session
+    # ancienne n'augmente pas la valeur d'un étudiant actif
+    # (jours écoulés sommés avant la division : les numéros de jour sont grands)
+    access_count = aggregates['recent_access_count'].to_numpy(dtype='float64')
+    last_access = _safe_mean(today * access_count - aggregates['recent_access_sum'].to_numpy(),
+                             access_count)
+    avg_time = _safe_mean(aggregates['time_spent_hours_sum'],
+                          aggregates['time_spent_hours_count'])
+
+    return pd.DataFrame({
+        'average_score': avg_score,
+        'total_modules': aggregates['n_modules'].to_numpy(dtype='int64'),
+        'average_participation': participation,
+        'total_time_spent': aggregates['time_spent_hours_sum'].to_numpy(dtype='float64'),
+        'average_time_per_module': avg_time,
+        'total_assignments': aggregates['assignment_submitted_sum'].to_numpy(dtype='int64'),
+        'total_quiz_attempts': aggregates['quiz_attempts_sum'].to_numpy(dtype='int64'),
+        'average_last_access': last_access,
+        'risk_score': compute_risk_scores(avg_score, participation, last_access, risk_model),
+        'engagement_level': compute_engagement_levels(participation),
+        'performance_trend': _trend_column(aggregates.index, trends)
+    }, index=aggregates.index)
+
+
+def _trend_column(index, trends):
+    """Tendance de chaque étudiant ('Stable' lorsqu'elle est inconnue)"""
+    if trends is None or len(trends) == 0:
+        return 'Stable'
+    return trends.reindex(index).fillna('Stable').to_numpy()
+
+
+def _format_student_id(student_id):
+    """Les identifiants numériques sont renvoyés en entier (compatibilité API)"""
+    return int(student_id) if str(student_id).isdigit() else student_id
+
+
+def _json_value(value):
+    """Valeur Python sérialisable en JSON (NaN -> None)"""
+    if isinstance(value, np.generic):
+        value = value.item()
+    if isinstance(value, float) and np.isnan(value):
+        return None
+    return value
+
+
+def features_to_records(features):
+    """Convertit la table des features en dictionnaires prêts pour jsonify"""
+    records = {}
+    columns = list(features.columns)
+    for student_id, *values in features.itertuples(name=None):
+        record = {'student_id': _format_student_id(student_id)}
+        for col, value in zip(columns, values):
+            record[col] = _json_value(value)
+        records[str(student_id)] = record
+    return records
+
+
+def features_to_indicators(features):
+    """Convertit la table des features au schéma de student_indicators"""
+    return pd.DataFrame({
+        'engagement_rate': features['average_participation'] * 100,
+        'success_rate': features['average_score'],
+        # Nombre d'accès estimé par semaine
+        'access_frequency': 7 / (1 + features['average_last_access']),
+        'avg_time_spent': features['average_time_per_module'],
+        'avg_score': features['average_score'],
+        'participation_rate': features['average_participation'],
+        'risk_score': features['risk_score'],
+        'trend': features['performance_trend']
+    }, index=features.index).round(2)
+
+
+def _merge_aggregates(aggregates, delta):
+    """Ajoute des agrégats partiels aux agrégats existants (clés connues ou nouvelles)"""
+    known = delta.index.isin(aggregates.index)
+    existing = delta.index[known]
+    added = delta.index[~known]
+
+    if len(existing):
+        aggregates.loc[existing] = aggregates.loc[existing] + delta.loc[existing]
+    if len(added):
+        aggregates = pd.concat([aggregates, delta.loc[added]])
+    return aggregates, existing, added, delta
+
+
+def _recent_access(aggregates):
+    """Dernier accès de chaque module (NaN si inconnu)"""
+    return aggregates['recent_access_sum'].where(aggregates['recent_access_count'] > 0)
+
+
+def _merge_module_aggregates(aggregates, delta):
+    """Fusionne des agrégats par module (sommes, maximum courant du dernier accès)
+
+    Retourne aussi la variation réelle des agrégats de chaque module, dont la
+    somme par étudiant met à jour les agrégats des étudiants.
+    """
+    known = delta.index.isin(aggregates.index)
+    existing = delta.index[known]
+    added = delta.index[~known]
+
+    changes = delta.loc[added]
+    if len(existing):
+        previous = aggregates.loc[existing]
+        merged = previous + delta.loc[existing]
+        merged['n_modules'] = previous['n_modules']
+        recent = np.fmax(_recent_access(previous), _recent_access(delta.loc[existing]))
+        merged['recent_access_sum'] = recent.fillna(0)
+        merged['recent_access_count'] = recent.notna().astype('int64')
+        aggregates.loc[existing] = merged
+        changes = pd.concat([merged - previous, changes])
+    if len(added):
+        aggregates = pd.concat([aggregates, delta.loc[added]])
+    return aggregates, existing, added, changes
+
+
+def _merge_trends(trends, updates):
+    if updates is None or len(updates) == 0:
+        return trends
+    return pd.concat([trends.drop(updates.index, errors='ignore'), updates])
+
+
+class AggregatedFeatures:
+    """Agrégats, tendances et features dérivées d'un niveau de détail
+
+    Base commune de FeatureStore (par étudiant) et ModuleFeatureIndex (par
+    étudiant x module) : maintient les agrégats et la table des features.
+    Chaque sous-classe fournit ses enregistrements (_update_records) et sa
+    propre API de lecture.
+    """
+
+    KEYS = None
+
+    def __init__(self, aggregates, trends=None):
+        self._lock = threading.Lock()
+        self.aggregates = aggregates
+        self.trends = trends if trends is not None else pd.Series(dtype=object)
+        self.risk_model = get_risk_model()
+        self.day = current_day()
+        self.features = derive_features(aggregates, self.trends, self.risk_model, self.day)
+        self._records = {}
+        self._update_records(self.features)
+
+    def _update_records(self, features):
+        raise NotImplementedError
+
+    def _on_update(self, previous, updated):
+        """Appelé (verrou tenu) avant le remplacement des lignes mises à jour"""
+
+    _merge = staticmethod(_merge_aggregates)
+
+    def _apply_delta(self, delta, trends=None):
+        """Ajoute des agrégats partiels puis redérive les features touchées
+
+        Seuls les compteurs des clés concernées sont modifiés : le coût ne
+        dépend pas de la taille de la cohorte. Retourne les features mises à
+        jour et la variation des agrégats.
+        """
+        with self._lock:
+            self.trends = _merge_trends(self.trends, trends)
+            self.aggregates, existing, added, changes = self._merge(self.aggregates, delta)
+
+            updated = derive_features(self.aggregates.loc[delta.index], self.trends,
+                                      self.risk_model, self.day)
+            self._on_update(self.features.loc[existing], updated)
+            if len(existing):
+                self.features.loc[existing] = updated.loc[existing]
+            if len(added):
+                self.features = pd.concat([self.features, updated.loc[added]])
+            self._update_records(updated)
+        return updated, changes
+
+    def _set_day(self, day, trends=None):
+        """Redérive toute la table pour un autre jour (verrou tenu)"""
+        self.day = day
+        if trends is not None:
+            self.trends = trends
+        self.features = derive_features(self.aggregates, self.trends, self.risk_model, day)
+        self._update_records(self.features)
+
+    def _set_risk_model(self, risk_model):
+        """Recalcule risk_score de toute la table en une passe (verrou tenu)"""
+        self.risk_model = risk_model
+        self.features['risk_score'] = compute_risk_scores(
+            self.features['average_score'].to_numpy(),
+            self.features['average_participation'].to_numpy(),
+            self.features['average_last_access'].to_numpy(),
+            risk_model
+        )
+        self._update_records(self.features)
+
+
+class FeatureStore(AggregatedFeatures):
+    """Table des features de la cohorte, indexée par student_id
+
+    Le détail par module est conservé dans un index (student_id, module_id)
+    construit dans la même passe ; les agrégats d'un étudiant sont la somme
+    de ceux de ses modules.
+    """
+
+    KEYS = 'student_id'
+
+    def __init__(self, aggregates, trends, modules):
+        super().__init__(aggregates, trends)
+        self.modules = modules
+        self.distribution = CohortDistribution(self.features)
+
+    @classmethod
+    def from_frame(cls, df, trends=None, module_trends=None):
+        """Construit la table à partir des lignes d'activité brutes"""
+        modules = ModuleFeatureIndex.from_frame(df, module_trends)
+        return cls(aggregate_by_student(modules.aggregates), trends, modules)
+
+    def _update_records(self, features):
+        self._records.update(features_to_records(features))
+
+    def _on_update(self, previous, updated):
+        self.distribution.replace(previous, updated)
+
+    def apply_rows(self, rows, trends=None, module_trends=None):
+        """Met à jour les agrégats des étudiants concernés par de nouvelles lignes
+
+        Les modules sont mis à jour d'abord : leur variation, sommée par
+        étudiant, est appliquée aux agrégats des étudiants. Retourne la table
+        des features mises à jour.
+        """
+        module_changes = self.modules.apply_rows(rows, module_trends)
+        updated, _ = self._apply_delta(aggregate_by_student(module_changes), trends)
+        return updated
+
+    def set_day(self, day, trends=None, module_trends=None):
+        """Redérive les features (dernier accès, risque, tendances) pour un autre jour"""
+        with self._lock:
+            self._set_day(day, trends)
+            self.distribution = CohortDistribution(self.features)
+        self.modules.set_day(day, module_trends)
+
+    def set_risk_model(self, risk_model):
+        """Recalcule risk_score de toute la table en une passe avec un autre modèle"""
+        with self._lock:
+            self._set_risk_model(risk_model)
+            self.distribution.features['risk_score'] = FeatureDistribution(
+                self.features['risk_score'].to_numpy())
+        self.modules.set_risk_model(risk_model)
+
+    def get(self, student_id):
+        """Retourne les features d'un étudiant (lookup O(1)) ou None"""
+        return self._records.get(str(student_id))
+
+    def iter_features(self, student_ids=None):
+        """Itère (student_id, features|None) sans matérialiser la réponse"""
+        if student_ids is None:
+            # Copie des entrées : une ingestion peut ajouter des étudiants
+            # pendant que la réponse est envoyée
+            yield from list(self._records.items())
+            return
+        for student_id in student_ids:
+            yield student_id, self._records.get(str(student_id))
+
+    def student_ids(self):
+        """Liste des étudiants présents dans la table"""
+        return list(self._records.keys())
+
+    def __len__(self):
+        return len(self._records)
+
+    def __contains__(self, student_id):
+        return str(student_id) in self._records
+
+
+class ModuleFeatureIndex(AggregatedFeatures):
+    """Features par (student_id, module_id) : index à deux niveaux
+
+    _records[student_id][module_id] donne les features d'un module en O(1).
+    """
+
+    KEYS = MODULE_KEYS
+
+    _merge = staticmethod(_merge_module_aggregates)
+
+    def __init__(self, aggregates, trends=None):
+        self._pairs = 0
+        super().__init__(aggregates, trends)
+
+    @classmethod
+    def from_frame(cls, df, trends=None):
+        return cls(compute_module_aggregates(df), trends)
+
+    def _update_records(self, features):
+        columns = list(features.columns)
+        for (student_id, module_id), *values in features.itertuples(name=None):
+            record = {
+                'student_id': _format_student_id(student_id),
+                'module_id': module_id
+            }
+            for col, value in zip(columns, values):
+                record[col] = _json_value(value)
+            modules = self._records.setdefault(str(student_id), {})
+            if module_id not in modules:
+                self._pairs += 1
+            modules[module_id] = record
+
+    def apply_rows(self, rows, trends=None):
+        """Met à jour les couples (étudiant, module) concernés par de nouvelles lignes
+
+        Retourne la variation des agrégats de chaque module touché.
+        """
+        _, changes = self._apply_delta(compute_module_aggregates(rows), trends)
+        return changes
+
+    def set_day(self, day, trends=None):
+        with self._lock:
+            self._set_day(day, trends)
+
+    def set_risk_model(self, risk_model):
+        with self._lock:
+            self._set_risk_model(risk_model)
+
+    def get(self, student_id, module_id):
+        """Features d'un étudiant pour un module (lookup O(1)) ou None"""
+        return self._records.get(str(student_id), {}).get(str(module_id))
+
+    def modules_for(self, student_id):
+        """Features de chaque module suivi par un étudiant ({} si inconnu)"""
+        return dict(self._records.get(str(student_id), {}))
+
+    def iter_features(self, student_ids=None):
+        """Itère (student_id, {module_id: features}) ({} si étudiant inconnu)"""
+        if student_ids is None:
+            student_ids = list(self._records.keys())
+        for student_id in student_ids:
+            yield student_id, self.modules_for(student_id)
+
+    def student_ids(self):
+        """Étudiants ayant au moins un module"""
+        return list(self._records.keys())
+
+    def __len__(self):
+        """Nombre de couples (étudiant, module)"""
+        return self._pairs
+
+    def __contains__(self, key):
+        """(student_id, module_id) présent dans l'index"""
+        student_id, module_id = key
+        return str(module_id) in self._records.get(str(student_id), {})
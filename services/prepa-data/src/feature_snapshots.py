@@ -0,0 +1,129 @@
+"""
+Snapshots Parquet de la table des features (PrepaData)
+
+Chaque version du jeu de données peut être écrite dans un fichier Parquet
+versionné (features + agrégats par étudiant). Au démarrage, le dernier
+snapshot est relu en memory map pour servir immédiatement, sans attendre le
+rechargement complet des données ; le même fichier sert aussi de source
+colonne rapide pour l'entraînement des modèles.
+"""
+import os
+import glob
+import json
+import time
+import pyarrow as pa
+import pyarrow.parquet as pq
+from dotenv import load_dotenv
+from feature_engine import AGGREGATE_COLUMNS, FeatureStore, ModuleFeatureIndex
+
+load_dotenv()
+
+SNAPSHOT_DIR = os.getenv(
+    'SNAPSHOT_DIR', os.path.join(os.path.dirname(__file__), '..', 'snapshots')
+)
+SNAPSHOT_KEEP = int(os.getenv('SNAPSHOT_KEEP', 3))
+METADATA_KEY = b'edupath.prepa'
+# Version du format des agrégats (2 : dernier accès en numéro de jour) ;
+# un snapshot d'un autre format est ignoré et les données sont rechargées
+SNAPSHOT_FORMAT = 2
+
+
+def snapshot_path(version):
+    return os.path.join(SNAPSHOT_DIR, f'features-{version}.parquet')
+
+
+def module_snapshot_path(path):
+    """Fichier compagnon contenant le détail par module"""
+    directory, name = os.path.split(path)
+    return os.path.join(directory, name.replace('features-', 'modules-', 1))
+
+
+def list_snapshots():
+    """Snapshots disponibles, du plus récent au plus ancien"""
+    paths = glob.glob(os.path.join(SNAPSHOT_DIR, 'features-*.parquet'))
+    return sorted(paths, key=os.path.getmtime, reverse=True)
+
+
+def latest_snapshot_path():
+    snapshots = list_snapshots()
+    return snapshots[0] if snapshots else None
+
+
+def write_snapshot(dataset):
+    """Écrit la table des features d'une version (no-op si déjà présente)"""
+    path = snapshot_path(dataset.version)
+    if os.path.exists(path):
+        return path
+
+    os.makedirs(SNAPSHOT_DIR, exist_ok=True)
+    store = dataset.features
+    frame = store.features.join(store.aggregates)
+    table = pa.Table.from_pandas(frame, preserve_index=True)
+    metadata = dict(table.schema.metadata or {})
+    metadata[METADATA_KEY] = json.dumps({
+        'dataset_version': dataset.version,
+        'format': SNAPSHOT_FORMAT,
+        'source': getattr(dataset.activity, 'source', 'unknown'),
+        'students': len(store),
+        'created_at': time.time()
+    }).encode()
+    table = table.replace_schema_metadata(metadata)
+
+    # Le détail par module est écrit d'abord : le fichier principal
+    # (renommé atomiquement en dernier) n'apparaît qu'une fois complet
+    modules = store.modules.features.join(store.modules.aggregates)
+    _write_atomic(pa.Table.from_pandas(modules, preserve_index=True),
+                  module_snapshot_path(path))
+    _write_atomic(table, path)
+    prune_snapshots()
+    return path
+
+
+def _write_atomic(table, path):
+    """Écriture dans un fichier temporaire puis renommage atomique"""
+    tmp_path = f'{path}.{os.getpid()}.tmp'  # un fichier par worker serveur
+    pq.write_table(table, tmp_path)
+    os.replace(tmp_path, path)
+
+
+def prune_snapshots(keep=SNAPSHOT_KEEP):
+    """Ne conserve que les `keep` snapshots les plus récents"""
+    for path in list_snapshots()[keep:]:
+        for file_path in (path, module_snapshot_path(path)):
+            try:
+                if os.path.exists(file_path):
+                    os.remove(file_path)
+            except OSError as e:
+                print(f'⚠️ Suppression du snapshot {file_path} impossible: {e}')
+
+
+def read_snapshot_metadata(path):
+    metadata = pq.read_schema(path, memory_map=True).metadata or {}
+    return json.loads(metadata.get(METADATA_KEY, b'{}'))
+
+
+def load_snapshot(path):
+    """Relit un snapshot (memory map) et reconstruit la table des features"""
+    metadata = read_snapshot_metadata(path)
+    if metadata.get('format') != SNAPSHOT_FORMAT:
+        raise ValueError(f"format {metadata.get('format')} non supporté (attendu {SNAPSHOT_FORMAT})")
+    frame = pq.read_table(path, memory_map=True).to_pandas()
+    # Le détail par module est indispensable : les ingestions mettent à
+    # jour les étudiants à partir de la variation de leurs modules
+    module_frame = pq.read_table(module_snapshot_path(path), memory_map=True).to_pandas()
+    modules = ModuleFeatureIndex(module_frame[AGGREGATE_COLUMNS],
+                                 module_frame['performance_trend'])
+    store = FeatureStore(frame[AGGREGATE_COLUMNS], frame['performance_trend'], modules)
+    return store, metadata
+
+
+def load_latest_snapshot():
+    """Dernier snapshot disponible ou None"""
+    path = latest_snapshot_path()
+    if path is None:
+        return None
+    try:
+        return load_snapshot(path)
+    except Exception as e:
+        print(f'⚠️ Lecture du snapshot {path} impossible: {e}')
+        return None
@@ -0,0 +1,88 @@
+"""
+Limite de concurrence et contre-pression (PrepaData)
+
+Au plus MAX_CONCURRENT_REQUESTS requêtes sont traitées simultanément par
+processus serveur. Une requête excédentaire attend au plus
+QUEUE_TIMEOUT_SECONDS une place libre, puis reçoit un 503 avec Retry-After :
+les pics de trafic des tableaux de bord sont rejetés vite au lieu
+d'allonger la latence de toutes les requêtes.
+
+Une place est libérée à la fermeture de la réponse, et non au retour de la
+vue : une réponse en flux (NDJSON de /features/batch) occupe sa place tant
+que le corps est envoyé.
+
+Sous gunicorn, la limite est dérivée du nombre de threads (gunicorn.conf.py) :
+elle doit lui rester inférieure pour qu'un thread libre puisse rejeter.
+"""
+import os
+import threading
+from flask import g, jsonify, request
+from dotenv import load_dotenv
+
+load_dotenv()
+
+MAX_CONCURRENT_REQUESTS = int(os.getenv('MAX_CONCURRENT_REQUESTS', 32))
+QUEUE_TIMEOUT_SECONDS = float(os.getenv('QUEUE_TIMEOUT_SECONDS', 2))
+RETRY_AFTER_SECONDS = int(os.getenv('RETRY_AFTER_SECONDS', 1))
+# Endpoints jamais limités (sondes de disponibilité)
+EXEMPT_ENDPOINTS = {'health'}
+
+
+class ConcurrencyLimiter:
+    """Sémaphore borné appliqué à chaque requête d'une application Flask"""
+
+    def __init__(self, limit=MAX_CONCURRENT_REQUESTS, timeout=QUEUE_TIMEOUT_SECONDS,
+                 retry_after=RETRY_AFTER_SECONDS):
+        self.limit = limit
+        self.timeout = timeout
+        self.retry_after = retry_after
+        self._semaphore = threading.BoundedSemaphore(limit)
+        self._lock = threading.Lock()
+        self.in_flight = 0
+        self.rejected = 0
+
+    def init_app(self, app):
+        app.before_request(self._acquire)
+        app.after_request(self._release_on_close)
+        app.teardown_request(self._release)
+
+    def _acquire(self):
+        if request.endpoint in EXEMPT_ENDPOINTS:
+            return None
+        if not self._semaphore.acquire(timeout=self.timeout):
+            with self._lock:
+                self.rejected += 1
+            response = jsonify({
+                'status': 'error',
+                'message': 'Service saturé, réessayer plus tard'
+            })
+            response.status_code = 503
+            response.headers['Retry-After'] = str(self.retry_after)
+            return response
+        g.concurrency_slot = True
+        with self._lock:
+            self.in_flight += 1
+        return None
+
+    def _release_on_close(self, response):
+        if g.pop('concurrency_slot', False):
+            response.call_on_close(self._release_slot)
+        return response
+
+    def _release(self, exc=None):
+        # Réponse non finalisée (after_request non exécuté)
+        if g.pop('concurrency_slot', False):
+            self._release_slot()
+
+    def _release_slot(self):
+        with self._lock:
+            self.in_flight -= 1
+        self._semaphore.release()
+
+    def stats(self):
+        with self._lock:
+            return {
+                'limit': self.limit,
+                'in_flight': self.in_flight,
+                'rejected': self.rejected
+            }
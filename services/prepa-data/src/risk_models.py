@@ -0,0 +1,96 @@
+"""
+Modèles de score de risque versionnés (PrepaData)
+
+Un modèle de risque est une fonction vectorisée des moyennes de la cohorte
+(score, participation, dernier accès) identifiée par une version. Changer de
+pondération revient à enregistrer une nouvelle version : le score de toute
+la cohorte est recalculé en une passe NumPy, et pendant un déploiement les
+deux versions peuvent être servies côte à côte (?risk_model=<version>).
+"""
+import os
+import json
+import threading
+import numpy as np
+from dotenv import load_dotenv
+
+load_dotenv()
+
+
+class RiskModel:
+    """Score de risque pondéré (0-100) : score, participation, dernier accès"""
+
+    def __init__(self, version, score_weight, participation_weight, access_weight,
+                 description=''):
+        self.version = version
+        self.weights = {
+            'score': float(score_weight),
+            'participation': float(participation_weight),
+            'access': float(access_weight)
+        }
+        self.description = description
+
+    def score(self, avg_score, participation, last_access):
+        """Score de risque pour des tableaux (ou scalaires) d'étudiants"""
+        score_risk = np.maximum(0, 100 - np.asarray(avg_score, dtype='float64'))
+        participation_risk = np.maximum(0, (1 - np.asarray(participation, dtype='float64')) * 50)
+        access_risk = np.minimum(50, np.asarray(last_access, dtype='float64') * 5)
+        return (score_risk * self.weights['score']
+                + participation_risk * self.weights['participation']
+                + access_risk * self.weights['access'])
+
+    def to_dict(self):
+        return {
+            'version': self.version,
+            'weights': self.weights,
+            'description': self.description
+        }
+
+
+_lock = threading.Lock()
+RISK_MODELS = {}
+
+
+def register_risk_model(model):
+    """Enregistre (ou remplace) une version de modèle de risque"""
+    with _lock:
+        RISK_MODELS[model.version] = model
+    return model
+
+
+def get_risk_model(version=None):
+    """Modèle d'une version (modèle actif si None) ; KeyError si inconnue"""
+    if version is None:
+        return _active_model
+    if version not in RISK_MODELS:
+        raise KeyError(f'Modèle de risque inconnu: {version}')
+    return RISK_MODELS[version]
+
+
+def activate_risk_model(version):
+    """Change le modèle utilisé pour risk_score (nouveaux calculs)"""
+    global _active_model
+    model = get_risk_model(version)
+    with _lock:
+        _active_model = model
+    return model
+
+
+def list_risk_models():
+    return [model.to_dict() for model in RISK_MODELS.values()]
+
+
+def _load_models_from_env():
+    """Versions supplémentaires : RISK_MODELS='{"v2": [0.6, 0.25, 0.15]}'"""
+    try:
+        definitions = json.loads(os.getenv('RISK_MODELS', '{}') or '{}')
+    except ValueError as e:
+        print(f'⚠️ RISK_MODELS invalide: {e}')
+        return
+    for version, weights in definitions.items():
+        register_risk_model(RiskModel(version, *weights))
+
+
+# Pondération historique de calculate_features
+register_risk_model(RiskModel('v1', 0.5, 0.3, 0.2, 'Pondération initiale 0.5 / 0.3 / 0.2'))
+_load_models_from_env()
+_active_model = get_risk_model(os.getenv('RISK_MODEL_VERSION', 'v1'))
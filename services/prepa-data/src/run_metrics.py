@@ -0,0 +1,147 @@
+"""
+Mesure des exécutions de rafraîchissement PrepaData
+
+Chaque étape (chargement, calcul des features, upsert, notification) est
+chronométrée ; le débit (lignes/s) et le pic mémoire de l'exécution sont
+calculés en fin d'exécution pour être enregistrés dans processing_logs.
+
+Le pic mémoire est mesuré pendant l'exécution (échantillonnage de la
+mémoire résidente actuelle), et non lu dans ru_maxrss qui ne redescend
+jamais entre deux exécutions ; le calcul confié au pool de processus
+(COMPUTE_WORKERS) est mesuré dans le processus fils.
+"""
+import os
+import resource
+import sys
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+
+SAMPLE_INTERVAL_SECONDS = float(os.getenv('MEMORY_SAMPLE_INTERVAL_SECONDS', 0.05))
+
+
+def peak_memory_mb(who=resource.RUSAGE_SELF):
+    """Pic de mémoire résidente sur toute la vie du processus (ou de ses fils terminés)"""
+    peak = resource.getrusage(who).ru_maxrss
+    # ru_maxrss est en octets sous macOS, en kilo-octets sous Linux
+    return peak / 1024 ** 2 if sys.platform == 'darwin' else peak / 1024
+
+
+def current_memory_mb():
+    """Mémoire résidente actuelle du processus (Mo), None si indisponible"""
+    try:
+        with open('/proc/self/statm') as f:
+            resident_pages = int(f.read().split()[1])
+        return resident_pages * os.sysconf('SC_PAGE_SIZE') / 1024 ** 2
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+class MemorySampler:
+    """Pic de mémoire résidente pendant un bloc (thread d'échantillonnage)
+
+    peak_mb reste None si la mémoire actuelle n'est pas lisible (hors Linux).
+    """
+
+    def __init__(self, interval=SAMPLE_INTERVAL_SECONDS):
+        self.interval = interval
+        self.peak_mb = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _sample(self):
+        value = current_memory_mb()
+        if value is not None and (self.peak_mb is None or value > self.peak_mb):
+            self.peak_mb = value
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self._sample()
+
+    def __enter__(self):
+        self._sample()
+        if self.peak_mb is not None:
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        self._sample()
+        return False
+
+
+def run_measured(func, *args):
+    """Exécute func dans le processus courant, retourne (résultat, pic mémoire en Mo)"""
+    with MemorySampler() as sampler:
+        result = func(*args)
+    return result, sampler.peak_mb
+
+
+class RunMetrics:
+    """Chronométrage et pic mémoire par étape d'une exécution de rafraîchissement"""
+
+    def __init__(self, run_id=None):
+        self.run_id = run_id or uuid.uuid4().hex
+        self.stages = {}
+        self.stage_memory = {}
+        self.compute_memory_mb = None
+        self.rows = 0
+        self.students = 0
+        self._children_peak_start = peak_memory_mb(resource.RUSAGE_CHILDREN)
+        self._started = time.perf_counter()
+
+    @contextmanager
+    def stage(self, name):
+        """Chronomètre une étape (durée cumulée en millisecondes) et son pic mémoire"""
+        start = time.perf_counter()
+        with MemorySampler() as sampler:
+            try:
+                yield
+            finally:
+                elapsed = (time.perf_counter() - start) * 1000
+                self.stages[name] = self.stages.get(name, 0.0) + elapsed
+        if sampler.peak_mb is not None:
+            self.stage_memory[name] = max(self.stage_memory.get(name, 0.0), sampler.peak_mb)
+
+    def record_compute_memory(self, peak_mb):
+        """Pic mémoire mesuré dans un processus de calcul (pool)"""
+        if peak_mb is not None:
+            self.compute_memory_mb = max(self.compute_memory_mb or 0.0, peak_mb)
+
+    @property
+    def duration_ms(self):
+        return (time.perf_counter() - self._started) * 1000
+
+    def _compute_peak_mb(self):
+        peak = self.compute_memory_mb
+        # Processus fils terminés pendant l'exécution (ex. pool recréé)
+        children_peak = peak_memory_mb(resource.RUSAGE_CHILDREN)
+        if children_peak > self._children_peak_start:
+            peak = max(peak or 0.0, children_peak)
+        return peak
+
+    def summary(self):
+        """Résumé de l'exécution (durées, débit, pic mémoire)"""
+        duration_ms = self.duration_ms
+        seconds = duration_ms / 1000
+        server_peak = max(self.stage_memory.values()) if self.stage_memory else None
+        if server_peak is None:
+            server_peak = peak_memory_mb()
+        compute_peak = self._compute_peak_mb()
+        return {
+            'run_id': self.run_id,
+            'duration_ms': round(duration_ms, 2),
+            'rows': self.rows,
+            'students': self.students,
+            'rows_per_sec': round(self.rows / seconds, 2) if seconds > 0 else None,
+            'students_per_sec': round(self.students / seconds, 2) if seconds > 0 else None,
+            'peak_memory_mb': round(max(server_peak, compute_peak or 0.0), 2),
+            'server_peak_memory_mb': round(server_peak, 2),
+            'compute_peak_memory_mb': round(compute_peak, 2) if compute_peak is not None else None,
+            'stages_ms': {name: round(ms, 2) for name, ms in self.stages.items()},
+            'stages_peak_memory_mb': {name: round(mb, 2) for name, mb in self.stage_memory.items()}
+        }
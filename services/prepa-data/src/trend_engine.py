@@ -0,0 +1,147 @@
+"""
+Calcul de la tendance de performance (PrepaData)
+
+Pour chaque étudiant, les scores des sessions datées de la fenêtre
+temporelle (en jours) sont régressés linéairement sur le temps : la pente,
+projetée sur la période effectivement couverte par ces sessions, donne la
+tendance (Improving / Stable / Declining). Les lignes non datées (CSV, une
+ligne par module) ne donnent pas de tendance : 'Stable'. Les moyennes de la
+moitié récente et de la moitié ancienne de la fenêtre sont aussi fournies.
+Tout est calculé en une passe groupby sur l'ensemble des étudiants.
+
+Les lignes portent le jour de la session : la fenêtre est évaluée au jour
+demandé (`today`), quel que soit le moment où la ligne a été chargée.
+"""
+import os
+import threading
+import numpy as np
+import pandas as pd
+from dotenv import load_dotenv
+from feature_engine import current_day, string_index
+
+load_dotenv()
+
+TREND_WINDOW_DAYS = int(os.getenv('TREND_WINDOW_DAYS', 90))
+# Variation de score (points) sur la période couverte au-delà de laquelle on conclut
+TREND_THRESHOLD = float(os.getenv('TREND_THRESHOLD', 5.0))
+MIN_TREND_POINTS = 3
+
+TREND_COLUMNS = ['n_points', 'score_slope', 'recent_mean', 'previous_mean',
+                 'performance_trend']
+
+
+def compute_trends(frame, window_days=TREND_WINDOW_DAYS, threshold=TREND_THRESHOLD,
+                   keys='student_id', today=None):
+    """Calcule la tendance de tous les étudiants (ou couples étudiant x module)"""
+    today = current_day() if today is None else today
+    day = pd.to_numeric(frame['last_access_day'], errors='coerce')
+    days_ago = today - day
+    score = pd.to_numeric(frame['score'], errors='coerce')
+    dated = frame['dated'].to_numpy(dtype=bool)
+    mask = dated & (days_ago <= window_days) & days_ago.notna() & score.notna()
+
+    key_columns = [keys] if isinstance(keys, str) else keys
+    group_keys = [_group_key(frame[key][mask]) for key in key_columns]
+    x = day[mask].to_numpy(dtype='float64')  # plus grand = plus récent
+    y = score[mask].to_numpy(dtype='float64')
+    recent = days_ago[mask].to_numpy() <= window_days / 2
+
+    terms = pd.DataFrame({
+        'n': 1.0, 'x': x, 'y': y, 'xy': x * y, 'xx': x * x,
+        'recent_n': recent.astype('float64'),
+        'recent_y': np.where(recent, y, 0.0),
+    }, index=group_keys[0].index)
+    grouped = terms.groupby(group_keys, sort=False, observed=True)
+    sums = grouped.sum()
+    span = (grouped['x'].max() - grouped['x'].min()).to_numpy()
+
+    n = sums['n'].to_numpy()
+    denominator = n * sums['xx'].to_numpy() - sums['x'].to_numpy() ** 2
+    with np.errstate(invalid='ignore', divide='ignore'):
+        slope = np.where(
+            denominator > 0,
+            (n * sums['xy'].to_numpy() - sums['x'].to_numpy() * sums['y'].to_numpy()) / denominator,
+            0.0
+        )
+        recent_n = sums['recent_n'].to_numpy()
+        previous_n = n - recent_n
+        recent_mean = np.where(recent_n > 0, sums['recent_y'].to_numpy() / recent_n, np.nan)
+        previous_mean = np.where(
+            previous_n > 0,
+            (sums['y'].to_numpy() - sums['recent_y'].to_numpy()) / previous_n,
+            np.nan
+        )
+
+    # Variation sur la période réellement couverte (et non toute la fenêtre)
+    change = slope * span
+    enough = (n >= MIN_TREND_POINTS) & (denominator > 0)
+    trend = np.select(
+        [enough & (change >= threshold), enough & (change <= -threshold)],
+        ['Improving', 'Declining'],
+        default='Stable'
+    )
+
+    result = pd.DataFrame({
+        'n_points': n.astype('int64'),
+        'score_slope': slope,
+        'recent_mean': recent_mean,
+        'previous_mean': previous_mean,
+        'performance_trend': trend
+    }, index=string_index(sums.index, keys))
+    return result[TREND_COLUMNS]
+
+
+def _group_key(series):
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        return series.cat.remove_unused_categories()
+    return series.astype(str)
+
+
+class TrendCache:
+    """Résultats de tendance par fenêtre pour une génération du jeu de données
+
+    Une ingestion ne recalcule que les étudiants touchés (update) : le calcul
+    de toute la cohorte n'a lieu qu'une fois par fenêtre, par rechargement
+    et par jour.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._key = None
+        self._revision = 0
+        self._by_window = {}
+
+    def _reset_if_stale(self, key):
+        if self._key != key:
+            self._key = key
+            self._by_window = {}
+
+    def get(self, dataset, window_days, today=None):
+        """Tendances de toute la cohorte pour une fenêtre (calculées une fois par génération)"""
+        key = (dataset.generation, current_day() if today is None else today)
+        with self._lock:
+            self._reset_if_stale(key)
+            trends = self._by_window.get(window_days)
+            revision = self._revision
+        if trends is None:
+            trends = compute_trends(dataset.activity.frame, window_days, today=key[1])
+            with self._lock:
+                # Une ingestion pendant le calcul rend le résultat incomplet
+                if self._key == key and self._revision == revision:
+                    self._by_window[window_days] = trends
+        return trends
+
+    def update(self, dataset, student_ids, rows, today=None):
+        """Recalcule les tendances des étudiants touchés par une ingestion
+
+        `rows` contient toutes les lignes d'activité de ces étudiants.
+        """
+        key = (dataset.generation, current_day() if today is None else today)
+        student_ids = [str(student_id) for student_id in student_ids]
+        with self._lock:
+            self._reset_if_stale(key)
+            self._revision += 1
+            for window_days, trends in list(self._by_window.items()):
+                updates = compute_trends(rows, window_days, today=key[1])
+                self._by_window[window_days] = pd.concat(
+                    [trends.drop(student_ids, errors='ignore'), updates])
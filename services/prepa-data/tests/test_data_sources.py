@@ -0,0 +1,46 @@
+import os
+import queue
+import pytest
+from conftest import session
+from data_loader import get_dummy_data, normalize_chunk, read_csv_chunks
+from feature_engine import FeatureStore
+
+
+def test_reload_keeps_csv_cohort_after_ingestion(prepa_app):
+    client = prepa_app.app.test_client()
+    assert client.get('/features/1').status_code == 200
+
+    ingested = client.post('/sessions', json={'sessions': [session(500, 0)]})
+    reloaded = client.post('/admin/reload')
+
+    assert ingested.status_code == 200 and ingested.get_json()['persisted']
+    assert reloaded.status_code == 200
+    assert prepa_app.data_cache.current.activity.source == 'csv+postgres'
+    assert client.get('/features/1').status_code == 200
+    assert client.get('/features/500').status_code == 200
+    assert reloaded.get_json()['students'] == 21
+
+
+def test_ingestion_notifies_updated_students(prepa_app, monkeypatch):
+    notified = queue.Queue()
+    monkeypatch.setattr(prepa_app, 'DOWNSTREAM_NOTIFY_URLS', ['http://profiler/admin/cache/invalidate'])
+    monkeypatch.setattr(prepa_app.requests, 'post',
+                        lambda url, json=None, timeout=None: notified.put((url, json)))
+
+    prepa_app.app.test_client().post('/sessions', json={'sessions': [session(1, 0), session(501, 0)]})
+
+    url, payload = notified.get(timeout=5)
+    assert url == 'http://profiler/admin/cache/invalidate'
+    assert payload['event'] == 'features_updated'
+    assert sorted(payload['student_ids']) == [1, 501]
+
+
+def test_demo_accounts_are_in_the_students_csv():
+    csv_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', '..',
+                            'data', 'students.csv')
+    from_csv = FeatureStore.from_frame(read_csv_chunks(csv_path))
+    from_dummy = FeatureStore.from_frame(normalize_chunk(get_dummy_data()))
+
+    demo_accounts = ['12345', '12346', '12347', '12400', '12401', '12402', '12403']
+    for student_id in demo_accounts:
+        assert from_csv.get(student_id) == pytest.approx(from_dummy.get(student_id)), student_id
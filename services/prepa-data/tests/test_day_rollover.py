@@ -0,0 +1,53 @@
+from datetime import date, timedelta
+import pytest
+from conftest import session
+from data_loader import sessions_to_frame
+from feature_engine import FeatureStore, current_day
+from trend_engine import compute_trends
+
+
+def test_rows_keep_the_session_date():
+    loaded = sessions_to_frame([session(1, 0)])
+    ingested_later = sessions_to_frame([session(1, 10, today=date.today() + timedelta(days=10))])
+
+    assert loaded['last_access_day'].tolist() == ingested_later['last_access_day'].tolist()
+
+
+def test_last_access_and_risk_grow_with_the_day(activity):
+    store = FeatureStore.from_frame(activity)
+    before = store.get(1)
+
+    store.set_day(store.day + 10)
+
+    after = store.get(1)
+    assert after['average_last_access'] == pytest.approx(before['average_last_access'] + 10)
+    assert after['risk_score'] > before['risk_score']
+    assert store.modules.get(1, 'CS101')['average_last_access'] == pytest.approx(
+        FeatureStore.from_frame(activity).modules.get(1, 'CS101')['average_last_access'] + 10)
+    assert store.distribution.get('average_last_access').summary([50])['mean'] == pytest.approx(
+        store.features['average_last_access'].mean())
+
+
+def test_sessions_leave_the_window_as_days_pass():
+    rows = sessions_to_frame([session(1, d, score=s) for d, s in ((60, 50), (30, 60), (0, 70))])
+
+    assert compute_trends(rows, window_days=90).loc['1', 'performance_trend'] == 'Improving'
+    assert compute_trends(rows, window_days=90, today=current_day() + 100).empty
+
+
+def test_features_are_rederived_on_the_next_day(prepa_app, monkeypatch):
+    client = prepa_app.app.test_client()
+    client.post('/sessions', json={'sessions': [
+        session(500, d, score=s) for d, s in ((60, 50), (30, 60), (0, 70))]})
+    today = client.get('/features/500')
+
+    later_day = prepa_app.data_cache.current.features.day + 45
+    monkeypatch.setattr(prepa_app, 'current_day', lambda: later_day)
+    later = client.get('/features/500')
+    trend = client.get('/features/500/trend').get_json()['trend']
+
+    assert today.get_json()['features']['performance_trend'] == 'Improving'
+    assert later.get_json()['features']['average_last_access'] == 45
+    assert later.get_json()['features']['performance_trend'] == 'Stable'
+    assert later.headers['ETag'] != today.headers['ETag']
+    assert trend['n_points'] == 2
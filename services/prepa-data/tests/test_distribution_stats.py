@@ -0,0 +1,89 @@
+import numpy as np
+import pytest
+from conftest import session
+from data_loader import sessions_to_frame
+from distribution_stats import CohortDistribution, FeatureDistribution
+from feature_engine import FeatureStore
+
+
+def test_percentile_matches_numpy():
+    values = np.random.default_rng(0).normal(60, 15, 501)
+    distribution = FeatureDistribution(values)
+
+    for q in (0, 10, 25, 50, 75, 99, 100):
+        assert distribution.percentile(q) == pytest.approx(np.percentile(values, q))
+
+
+def test_rank_counts_half_of_ties():
+    distribution = FeatureDistribution([10, 20, 20, 30])
+
+    assert distribution.rank(20) == 50.0
+    assert distribution.rank(5) == 0.0
+    assert distribution.rank(35) == 100.0
+    assert distribution.rank(10) == 12.5
+    assert distribution.rank(float('nan')) is None
+
+
+def test_replace_keeps_values_sorted():
+    distribution = FeatureDistribution([5, 1, 3, 3, 9])
+
+    distribution.replace([3, 9], [4, 0])
+
+    assert distribution._values.tolist() == [0, 1, 3, 4, 5]
+    assert distribution.summary()['mean'] == pytest.approx(13 / 5)
+
+
+def test_replace_duplicates_and_missing_values():
+    distribution = FeatureDistribution([2, 2, 2, 7, np.nan])
+
+    distribution.replace([2, 2, np.nan, 42], [np.nan, 8])
+
+    # Une valeur absente (42) ou NaN n'est ni retirée ni comptée
+    assert distribution._values.tolist() == [2, 7, 8]
+    assert len(distribution) == 3
+
+
+def test_replace_matches_rebuild():
+    rng = np.random.default_rng(1)
+    values = rng.integers(0, 20, 200).astype('float64')
+    distribution = FeatureDistribution(values)
+    for _ in range(20):
+        positions = rng.choice(len(values), 5, replace=False)
+        new_values = rng.integers(0, 20, 5).astype('float64')
+        distribution.replace(values[positions], new_values)
+        values[positions] = new_values
+
+    rebuilt = FeatureDistribution(values)
+    assert distribution._values.tolist() == rebuilt._values.tolist()
+    assert distribution.rank(10) == rebuilt.rank(10)
+    assert distribution.summary()['mean'] == pytest.approx(values.mean())
+
+
+def test_histogram_counts_every_value():
+    distribution = FeatureDistribution([0, 1, 2, 3, 4, 5, 6, 7, 8, 10])
+
+    histogram = distribution.histogram(bins=5)
+
+    assert histogram['edges'] == [0, 2, 4, 6, 8, 10]
+    assert histogram['counts'] == [2, 2, 2, 2, 2]
+
+
+def test_empty_distribution():
+    distribution = FeatureDistribution([])
+
+    assert distribution.percentile(50) is None
+    assert distribution.rank(1) is None
+    assert distribution.summary() == {'count': 0}
+
+
+def test_cohort_distribution_follows_ingested_features(activity):
+    store = FeatureStore.from_frame(activity)
+    before = store.distribution.get('average_score').rank(store.get(1)['average_score'])
+    store.apply_rows(sessions_to_frame([session(1, 0, score=100.0) for _ in range(30)]))
+
+    scores = store.features['average_score'].to_numpy()
+    rebuilt = CohortDistribution(store.features).get('average_score')
+    distribution = store.distribution.get('average_score')
+    assert distribution._values.tolist() == rebuilt._values.tolist()
+    assert distribution.rank(store.get(1)['average_score']) > before
+    assert len(distribution) == len(scores)
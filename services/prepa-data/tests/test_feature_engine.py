@@ -0,0 +1,53 @@
+import pytest
+from feature_engine import FeatureStore
+
+
+def baseline_features(student_id, df):
+    """Formule d'origine, étudiant par étudiant (calculate_features avant le moteur)"""
+    student_data = df[df['student_id'] == str(student_id)]
+    avg_score = float(student_data['score'].mean())
+    participation = float(student_data['participation_rate'].mean())
+    last_access = float(student_data['last_access_days_ago'].mean())
+    risk_score = (max(0, 100 - avg_score) * 0.5
+                  + max(0, (1 - participation) * 50) * 0.3
+                  + min(50, last_access * 5) * 0.2)
+    if participation >= 0.85:
+        engagement_level = 'High'
+    elif participation >= 0.70:
+        engagement_level = 'Medium'
+    else:
+        engagement_level = 'Low'
+    return {
+        'student_id': int(student_id),
+        'average_score': avg_score,
+        'total_modules': int(len(student_data)),
+        'average_participation': participation,
+        'total_time_spent': float(student_data['time_spent_hours'].sum()),
+        'average_time_per_module': float(student_data['time_spent_hours'].mean()),
+        'total_assignments': int(student_data['assignment_submitted'].sum()),
+        'total_quiz_attempts': int(student_data['quiz_attempts'].sum()),
+        'average_last_access': last_access,
+        'risk_score': risk_score,
+        'engagement_level': engagement_level,
+        'performance_trend': 'Stable'
+    }
+
+
+def test_cohort_features_match_baseline_formula(students_csv, activity):
+    store = FeatureStore.from_frame(activity)
+
+    assert len(store) == students_csv['student_id'].nunique()
+    for student_id in students_csv['student_id'].unique():
+        expected = baseline_features(student_id, students_csv)
+        actual = store.get(student_id)
+        assert actual.keys() == expected.keys()
+        for name, value in expected.items():
+            assert actual[name] == pytest.approx(value), (student_id, name)
+
+
+def test_unknown_student(activity):
+    store = FeatureStore.from_frame(activity)
+
+    assert store.get(999) is None
+    assert 999 not in store
+    assert dict(store.iter_features([1, 999]))[999] is None
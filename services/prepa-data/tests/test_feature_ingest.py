@@ -0,0 +1,95 @@
+import json
+import pytest
+from conftest import session
+from data_loader import ActivityStore, concat_chunks, sessions_to_frame
+from feature_engine import FeatureStore
+
+DAILY = 1
+ONCE = 2
+
+
+@pytest.fixture
+def store(activity):
+    return FeatureStore.from_frame(activity)
+
+
+def test_last_access_is_the_most_recent_session(store):
+    sessions = [session(100 + DAILY, days_ago) for days_ago in range(60)]
+    sessions.append(session(100 + ONCE, 30))
+    store.apply_rows(sessions_to_frame(sessions))
+
+    daily, once = store.get(100 + DAILY), store.get(100 + ONCE)
+    assert daily['average_last_access'] == 0
+    assert once['average_last_access'] == 30
+    assert daily['risk_score'] < once['risk_score']
+    assert daily['total_modules'] == 1
+
+
+def test_old_session_does_not_raise_last_access(store):
+    before = store.get(1)
+
+    store.apply_rows(sessions_to_frame([session(1, 30, module_id='MATH101')]))
+
+    after = store.get(1)
+    assert after['average_last_access'] == before['average_last_access']
+    assert after['total_modules'] == before['total_modules']
+
+
+def test_new_module_is_counted_once(store):
+    modules = store.get(1)['total_modules']
+
+    store.apply_rows(sessions_to_frame([session(1, 0, module_id='BIO101'),
+                                        session(1, 1, module_id='BIO101')]))
+
+    assert store.get(1)['total_modules'] == modules + 1
+    assert store.modules.get(1, 'BIO101')['average_last_access'] == 0
+
+
+def test_incremental_ingest_matches_full_recompute(activity):
+    batches = [
+        sessions_to_frame([session(1, 3), session(2, 8, module_id='CS101')]),
+        sessions_to_frame([session(1, 1, module_id='BIO101'), session(50, 2)]),
+        sessions_to_frame([session(50, 0), session(2, 20, module_id='CS101')]),
+    ]
+    store = FeatureStore.from_frame(activity)
+    for rows in batches:
+        store.apply_rows(rows)
+
+    expected = FeatureStore.from_frame(concat_chunks([activity] + batches))
+    assert sorted(store.student_ids()) == sorted(expected.student_ids())
+    for student_id in expected.student_ids():
+        actual, wanted = store.get(student_id), expected.get(student_id)
+        for name, value in wanted.items():
+            assert actual[name] == pytest.approx(value), (student_id, name)
+    assert len(store.modules) == len(expected.modules)
+
+
+def test_missing_fields_are_serialised_as_null(store):
+    store.apply_rows(sessions_to_frame([{'student_id': 200, 'module_id': 'MATH101'}]))
+
+    features = store.get(200)
+    assert features['average_score'] is None and features['risk_score'] is None
+    json.loads(json.dumps(features, allow_nan=False))
+
+
+def test_iterating_all_features_while_ingesting(store):
+    stream = store.iter_features()
+    next(stream)
+
+    store.apply_rows(sessions_to_frame([session(300, 0)]))
+
+    assert sum(1 for _ in stream) == len(store) - 2
+
+
+def test_activity_store_pending_rows_per_student(activity):
+    activity_store = ActivityStore(activity, source='test')
+    for days_ago in range(5):
+        activity_store.append(sessions_to_frame([session(1, days_ago), session(400, days_ago)]))
+
+    assert len(activity_store.rows_for(1)) == 3 + 5
+    assert len(activity_store.rows_for(400)) == 5
+    assert len(activity_store.rows_for(2)) == 3
+    assert len(activity_store.rows_for_many([1, 400])) == 13
+
+    assert len(activity_store.frame) == len(activity) + 10
+    assert len(activity_store.rows_for(400)) == 5
@@ -0,0 +1,25 @@
+from feature_engine import FeatureStore
+
+
+def test_module_features(students_csv, activity):
+    modules = FeatureStore.from_frame(activity).modules
+
+    assert len(modules) == len(students_csv)
+    assert ('1', 'CS101') in modules and ('1', 'BIO101') not in modules
+    row = students_csv[(students_csv['student_id'] == '1')
+                       & (students_csv['module_id'] == 'CS101')].iloc[0]
+    features = modules.get(1, 'CS101')
+    assert features['average_score'] == row['score']
+    assert features['total_modules'] == 1
+    assert modules.get(1, 'BIO101') is None
+
+
+def test_modules_for_and_iter_features(activity):
+    modules = FeatureStore.from_frame(activity).modules
+
+    assert set(modules.modules_for(1)) == {'MATH101', 'CS101', 'ENG101'}
+    assert modules.modules_for(999) == {}
+    by_student = dict(modules.iter_features(['1', '999']))
+    assert by_student['1'].keys() == modules.modules_for(1).keys()
+    assert by_student['999'] == {}
+    assert len(dict(modules.iter_features())) == len(modules.student_ids())
@@ -0,0 +1,58 @@
+import threading
+from flask import Flask, Response, jsonify
+from request_limits import ConcurrencyLimiter
+
+
+def make_app(limiter, release):
+    app = Flask(__name__)
+    limiter.init_app(app)
+
+    @app.route('/slow')
+    def slow():
+        release.wait(timeout=5)
+        return jsonify({'status': 'success'})
+
+    @app.route('/stream')
+    def stream():
+        return Response((f'{i}\n' for i in range(3)), mimetype='application/x-ndjson')
+
+    @app.route('/health')
+    def health():
+        return jsonify(limiter.stats())
+
+    return app
+
+
+def test_excess_request_gets_503_with_retry_after():
+    limiter = ConcurrencyLimiter(limit=1, timeout=0.05, retry_after=3)
+    release = threading.Event()
+    app = make_app(limiter, release)
+    # buffered : la réponse est fermée comme par le serveur WSGI
+    first = threading.Thread(target=lambda: app.test_client().get('/slow', buffered=True))
+    first.start()
+    while limiter.stats()['in_flight'] == 0:
+        pass
+
+    rejected = app.test_client().get('/slow')
+    health = app.test_client().get('/health')
+    release.set()
+    first.join()
+
+    assert rejected.status_code == 503
+    assert rejected.headers['Retry-After'] == '3'
+    assert health.status_code == 200
+    assert limiter.stats() == {'limit': 1, 'in_flight': 0, 'rejected': 1}
+
+
+def test_streamed_response_holds_its_slot_until_closed():
+    limiter = ConcurrencyLimiter(limit=1, timeout=0.05)
+    app = make_app(limiter, threading.Event())
+    streamed = app.test_client().get('/stream', buffered=False)
+
+    assert limiter.stats()['in_flight'] == 1
+    assert app.test_client().get('/stream').status_code == 503
+
+    assert streamed.get_data(as_text=True) == '0\n1\n2\n'
+    streamed.close()
+    assert limiter.stats()['in_flight'] == 0
+    assert app.test_client().get('/stream', buffered=True).status_code == 200
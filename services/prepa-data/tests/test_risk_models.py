@@ -0,0 +1,19 @@
+import pytest
+
+
+@pytest.mark.parametrize('body', [{}, {'version': None}, {'version': ''}, {'version': 2},
+                                  {'version': ['v1']}])
+def test_risk_model_version_is_required(prepa_app, body):
+    version = prepa_app.data_cache.current.version
+
+    response = prepa_app.app.test_client().post('/admin/risk-model', json=body)
+
+    assert response.status_code == 400
+    assert prepa_app.data_cache.current.version == version
+
+
+def test_unknown_risk_model(prepa_app):
+    response = prepa_app.app.test_client().post('/admin/risk-model', json={'version': 'v404'})
+
+    assert response.status_code == 400
+    assert 'v404' in response.get_json()['error']
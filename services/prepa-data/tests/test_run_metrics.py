@@ -0,0 +1,42 @@
+import time
+import numpy as np
+from run_metrics import MemorySampler, RunMetrics, current_memory_mb, run_measured
+
+
+def allocate(megabytes, hold_seconds=0.2):
+    """Alloue (et touche) `megabytes` Mo le temps d'être échantillonné"""
+    data = np.ones(megabytes * 1024 ** 2 // 8)
+    time.sleep(hold_seconds)
+    return float(data.sum())
+
+
+def test_sampler_sees_temporary_allocation():
+    baseline = current_memory_mb()
+    with MemorySampler(interval=0.001) as sampler:
+        allocate(80)
+
+    assert sampler.peak_mb - baseline > 60
+
+
+def test_peak_is_measured_per_run():
+    first = RunMetrics()
+    with first.stage('compute'):
+        allocate(80)
+    second = RunMetrics()
+    with second.stage('compute'):
+        allocate(1)
+
+    assert first.summary()['peak_memory_mb'] - second.summary()['peak_memory_mb'] > 60
+
+
+def test_compute_worker_peak_is_reported():
+    metrics = RunMetrics()
+    with metrics.stage('compute'):
+        result, peak_mb = run_measured(allocate, 1)
+        metrics.record_compute_memory(peak_mb + 500)
+
+    summary = metrics.summary()
+    assert result == 1024 ** 2 / 8
+    assert summary['compute_peak_memory_mb'] == round(peak_mb + 500, 2)
+    assert summary['peak_memory_mb'] == summary['compute_peak_memory_mb']
+    assert set(summary['stages_peak_memory_mb']) == {'compute'}
@@ -0,0 +1,17 @@
+from conftest import session
+from data_loader import empty_activity_store
+from feature_engine import FeatureStore
+
+
+def test_trend_and_ingestion_wait_for_activity_rows(prepa_app, activity):
+    client = prepa_app.app.test_client()
+    prepa_app.data_cache.publish(empty_activity_store('snapshot'), FeatureStore.from_frame(activity))
+
+    assert client.get('/features/1').status_code == 200
+    assert client.get('/features/1/trend').status_code == 503
+    assert client.post('/sessions', json={'sessions': [session(1, 0)]}).status_code == 503
+    assert len(prepa_app.data_cache.current.activity) == 0
+
+    prepa_app.data_cache.reload()
+    assert client.get('/features/1/trend').status_code == 200
+    assert client.post('/sessions', json={'sessions': [session(1, 0)]}).status_code == 200
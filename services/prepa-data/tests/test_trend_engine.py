@@ -0,0 +1,80 @@
+import pytest
+import trend_engine
+from conftest import session
+from data_loader import ActivityStore, concat_chunks, sessions_to_frame
+from trend_engine import TrendCache, compute_trends
+
+
+class FakeDataset:
+    def __init__(self, activity, generation=1):
+        self.activity = activity
+        self.generation = generation
+
+
+def test_undated_rows_give_no_trend(activity):
+    trends = compute_trends(activity)
+
+    assert trends.empty
+
+
+def test_change_is_measured_over_the_covered_span():
+    rows = sessions_to_frame([session(1, 4, score=70), session(1, 2, score=71.5),
+                              session(1, 0, score=73)])
+
+    trend = compute_trends(rows, window_days=90, threshold=5).loc['1']
+
+    assert trend['score_slope'] == pytest.approx(0.75)
+    assert trend['performance_trend'] == 'Stable'
+
+
+def test_improving_and_declining():
+    rows = sessions_to_frame(
+        [session(1, d, score=s) for d, s in ((60, 50), (30, 60), (0, 70))]
+        + [session(2, d, score=s) for d, s in ((10, 90), (5, 80), (0, 70))]
+        + [session(3, 0, score=80), session(3, 1, score=80)]
+    )
+
+    trends = compute_trends(rows, window_days=90, threshold=5)['performance_trend']
+
+    assert trends.to_dict() == {'1': 'Improving', '2': 'Declining', '3': 'Stable'}
+
+
+def test_sessions_outside_window_are_ignored():
+    rows = sessions_to_frame([session(1, 200, score=10), session(1, 10, score=70),
+                              session(1, 5, score=70), session(1, 0, score=70)])
+
+    trend = compute_trends(rows, window_days=90).loc['1']
+
+    assert trend['n_points'] == 3
+    assert trend['performance_trend'] == 'Stable'
+
+
+def test_trend_cache_updates_ingested_students_only(activity, monkeypatch):
+    store = ActivityStore(concat_chunks([activity, sessions_to_frame(
+        [session(1, d, score=s) for d, s in ((20, 50), (10, 60), (0, 70))])]))
+    dataset = FakeDataset(store)
+    cache = TrendCache()
+    assert cache.get(dataset, 90).loc['1', 'performance_trend'] == 'Improving'
+
+    calls = []
+    original = trend_engine.compute_trends
+    monkeypatch.setattr(trend_engine, 'compute_trends',
+                        lambda frame, *args, **kwargs:
+                        calls.append(len(frame)) or original(frame, *args, **kwargs))
+    rows = sessions_to_frame([session(2, d, score=s) for d, s in ((20, 90), (10, 80), (0, 70))])
+    store.append(rows)
+    cache.update(dataset, ['2'], store.rows_for_many(['2']))
+    trends = cache.get(dataset, 90)
+
+    assert calls == [len(store.rows_for(2))]
+    assert trends['performance_trend'].to_dict() == {'1': 'Improving', '2': 'Declining'}
+
+
+def test_trend_cache_is_reset_on_reload(activity):
+    cache = TrendCache()
+    first = cache.get(FakeDataset(ActivityStore(activity), generation=1), 90)
+    reloaded = FakeDataset(ActivityStore(concat_chunks([activity, sessions_to_frame(
+        [session(5, d, score=s) for d, s in ((20, 50), (10, 60), (0, 70))])])), generation=2)
+
+    assert first.empty
+    assert list(cache.get(reloaded, 90).index) == ['5']
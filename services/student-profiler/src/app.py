@@ -1,14 +1,23 @@
-from flask import Flask, jsonify
+from flask import Flask, Response, jsonify, request
 from flask_cors import CORS
 import pandas as pd
 import numpy as np
-from sklearn.cluster import KMeans
-from sklearn.preprocessing import StandardScaler
-from sklearn.decomposition import PCA
 import os
+import json
+import time
+import threading
 from dotenv import load_dotenv
-import requests
-import joblib
+from feature_client import (
+    fetch_all_features, get_session, iter_feature_chunks, iter_snapshot_chunks
+)
+from profile_cache import ProfileCache
+from drift_monitor import DriftMonitor
+from assignment_feed import AssignmentFeed
+from database import save_training_results, get_student_profile
+from profile_model import (
+    FEATURE_COLUMNS, TRAINING_MODE, train_pipeline, train_pipeline_incremental,
+    update_pipeline, save_pipeline, load_latest_pipeline, list_models, model_path
+)
 
 load_dotenv()
 
@@ -18,110 +27,281 @@ CORS(app)
 PORT = int(os.getenv('PORT', 3003))
 PREPA_DATA_URL = os.getenv('PREPA_DATA_URL', 'http://localhost:3002')
 
-# Modèle et scaler globaux
-model = None
-scaler = None
-pca = None
-profiles_cache = {}
-cluster_mapping = {}  # Mapping des clusters KMeans vers les profils finaux
+MODEL_CHECK_INTERVAL = int(os.getenv('MODEL_CHECK_INTERVAL', 30))
+# Source des lots de l'entraînement incrémental : 'prepa' ou 'snapshot'
+TRAINING_SOURCE = os.getenv('TRAINING_SOURCE', 'prepa')
+# Vérification de la dérive (secondes, 0 = désactivée) et délai minimal entre
+# deux réentraînements déclenchés par la dérive
+DRIFT_CHECK_INTERVAL = int(os.getenv('DRIFT_CHECK_INTERVAL', 300))
+DRIFT_MIN_RETRAIN_INTERVAL = int(os.getenv('DRIFT_MIN_RETRAIN_INTERVAL', 3600))
+# Flux SSE des changements : commentaire keep-alive toutes les N secondes
+CHANGE_STREAM_HEARTBEAT_SECONDS = int(os.getenv('CHANGE_STREAM_HEARTBEAT_SECONDS', 15))
+CHANGE_FEED_PAGE_SIZE = 500
+
+# Pipeline de profilage courant (scaler + PCA + KMeans), échangé atomiquement
+pipeline = None
+# Version fixée par un rechargement explicite (sinon : dernier artefact)
+pinned_version = None
+_last_model_check = 0.0
+# Profils calculés, clé (étudiant, version du modèle)
+profile_cache = ProfileCache()
+# Moyenne / variance courantes des features vues, comparées à l'entraînement
+drift_monitor = DriftMonitor(FEATURE_COLUMNS)
+# Un seul entraînement à la fois (admin, démarrage ou dérive)
+_training_lock = threading.Lock()
+last_drift_retrain = None
+# Dernier profil de chaque étudiant et journal des changements de profil
+assignment_feed = AssignmentFeed()
 
 def load_all_students_features():
-    """Charge les features de tous les étudiants depuis PrepaData"""
-    # Inclure les IDs dummy (1-10) ET les vrais étudiants (12345-12347, 12400-12403)
-    student_ids = list(range(1, 11)) + [12345, 12346, 12347, 12400, 12401, 12402, 12403]
-    all_features = []
+    """Charge les features de tous les étudiants depuis PrepaData (lots parallèles)"""
+    return fetch_all_features()
+
+def set_pipeline(new_pipeline):
+    """Publie un pipeline (les requêtes en cours gardent l'ancien)"""
+    global pipeline
+    pipeline = new_pipeline
+    # Les entrées de l'ancienne version ne seront plus lues : libérer la place
+    profile_cache.invalidate()
+    drift_monitor.reset(new_pipeline)
+    print(f"🧠 Modèle de profilage {new_pipeline.version} actif "
+          f"({new_pipeline.n_students} étudiants)")
+
+def publish_pipeline(new_pipeline):
+    """Enregistre l'artefact d'un pipeline puis le publie"""
+    try:
+        path = save_pipeline(new_pipeline)
+        print(f"💾 Modèle enregistré: {path}")
+    except Exception as e:
+        print(f"⚠️ Enregistrement du modèle impossible: {e}")
+    set_pipeline(new_pipeline)
+
+def train_profiling_model(mode=None, source=None):
+    """Entraîne le modèle de profilage (KMeans + PCA), l'enregistre puis le publie
+
+    mode 'incremental' : mini-batchs sur des lots lus depuis PrepaData
+    (source 'prepa') ou depuis le snapshot Parquet (source 'snapshot').
+    """
+    with _training_lock:
+        return _train_profiling_model(mode or TRAINING_MODE, source or TRAINING_SOURCE)
+
+def _train_profiling_model(mode, source):
+    print(f"Entraînement du modèle de profilage ({mode}, source {source})...")
     
-    for student_id in student_ids:
-        try:
-            response = requests.get(f'{PREPA_DATA_URL}/features/{student_id}', timeout=5)
-            if response.status_code == 200:
-                data = response.json()
-                features = data['features']
-                features['student_id'] = student_id
-                all_features.append(features)
-        except Exception as e:
-            print(f"Erreur lors de la récupération des features pour l'étudiant {student_id}: {e}")
+    if mode == 'incremental':
+        chunks = (iter_snapshot_chunks(['student_id'] + FEATURE_COLUMNS) if source == 'snapshot'
+                  else iter_feature_chunks())
+        frames = []
+        
+        def keep_columns(chunks):
+            # Seules les colonnes du modèle sont gardées pour la persistance
+            for chunk in chunks:
+                frames.append(chunk[['student_id'] + FEATURE_COLUMNS])
+                yield chunk
+        
+        new_pipeline = train_pipeline_incremental(keep_columns(chunks))
+        if new_pipeline is None:
+            print("Aucune donnée disponible pour l'entraînement")
+            return None
+        df = pd.concat(frames, ignore_index=True)
+        publish_pipeline(new_pipeline)
+        print(f"Modèle entraîné avec {new_pipeline.n_students} étudiants (mini-batchs)")
+    else:
+        df = load_all_students_features()
+        
+        if df.empty:
+            print("Aucune donnée disponible pour l'entraînement")
+            return None
+        
+        new_pipeline = train_pipeline(df)
+        publish_pipeline(new_pipeline)
+        print(f"Modèle entraîné avec {len(df)} étudiants, {len(set(new_pipeline.model.labels_))} profils")
     
-    return pd.DataFrame(all_features)
+    print(f"Mapping clusters: {new_pipeline.cluster_mapping}")
+    persist_training_results(new_pipeline, df)
+    return new_pipeline
 
-def train_profiling_model():
-    """Entraîne le modèle de profilage (KMeans + PCA)"""
-    global model, scaler, pca, cluster_mapping
+def build_training_results(current, df):
+    """Profils de toute la cohorte et statistiques par profil (une passe vectorisée)"""
+    predictions = current.predict(df[current.feature_columns])
+    cluster = predictions['cluster']
+    profiles = pd.DataFrame({
+        'student_id': df['student_id'].astype(str).to_numpy(),
+        'profile_type': np.array(PROFILE_NAMES)[cluster],
+        'cluster_id': cluster,
+        'pca_components': [json.dumps(row) for row in predictions['components'].round(4).tolist()],
+        'profile_confidence': predictions['confidence'].round(2)
+    })
     
-    print("Entraînement du modèle de profilage...")
-    df = load_all_students_features()
+    statistics = pd.DataFrame({
+        'profile_type': profiles['profile_type'],
+        'engagement': df['average_participation'].to_numpy(dtype='float64') * 100,
+        'success_rate': df['average_score'].to_numpy(dtype='float64')
+    }).groupby('profile_type').agg(
+        student_count=('profile_type', 'size'),
+        avg_engagement=('engagement', 'mean'),
+        avg_success_rate=('success_rate', 'mean')
+    ).round(2).reset_index()
+    return profiles, statistics
+
+def persist_training_results(current, df):
+    """Publie les changements de profil puis enregistre profils et statistiques
+
+    Les erreurs ne bloquent pas l'entraînement.
+    """
+    try:
+        profiles, statistics = build_training_results(current, df)
+        changed = assignment_feed.record(profiles['student_id'], profiles['cluster_id'],
+                                         profiles['profile_type'], current.version, 'training')
+        print(f"🔀 {changed} étudiants ont changé de profil")
+        saved = save_training_results(profiles, statistics, current.version)
+        if saved is not None:
+            print(f"💾 {saved} profils et {len(statistics)} statistiques enregistrés")
+        return saved
+    except Exception as e:
+        print(f"⚠️ Enregistrement des profils impossible: {e}")
+        return None
+
+def load_model(version=None):
+    """Charge le dernier artefact enregistré (ou une version donnée), None si absent"""
+    loaded = load_latest_pipeline(version)
+    if loaded is not None:
+        set_pipeline(loaded)
+    return loaded
+
+def init_model():
+    """Démarrage : dernier artefact enregistré, sinon entraînement en arrière-plan"""
+    if load_model() is None:
+        threading.Thread(target=train_profiling_model, daemon=True).start()
+    if DRIFT_CHECK_INTERVAL > 0:
+        threading.Thread(target=drift_scheduler, daemon=True).start()
+
+def retrain_if_drifted():
+    """Réentraîne si la dérive dépasse les seuils (retourne le nouveau pipeline ou None)"""
+    global last_drift_retrain
+    report = drift_monitor.report()
+    if not report['drifted'] or pinned_version is not None or _training_lock.locked():
+        return None
+    if last_drift_retrain and time.time() - last_drift_retrain['at'] < DRIFT_MIN_RETRAIN_INTERVAL:
+        return None
     
-    if df.empty:
-        print("Aucune donnée disponible pour l'entraînement")
+    drifted = [name for name, stats in report['features'].items() if stats['drifted']]
+    print(f"📈 Dérive détectée sur {drifted} ({report['samples']} observations), réentraînement")
+    last_drift_retrain = {'at': time.time(), 'features': drifted,
+                          'previous_version': report['model_version']}
+    # Le nouveau modèle est publié par échange de référence (set_pipeline)
+    return train_profiling_model()
+
+def drift_scheduler():
+    """Boucle d'arrière-plan : vérifie la dérive hors du chemin des requêtes"""
+    while True:
+        time.sleep(DRIFT_CHECK_INTERVAL)
+        try:
+            retrain_if_drifted()
+        except Exception as e:
+            print(f"❌ Erreur lors du réentraînement sur dérive: {e}")
+
+@app.before_request
+def refresh_model_if_newer():
+    """Adopte périodiquement l'artefact le plus récent (publié par un autre worker)"""
+    global _last_model_check
+    now = time.time()
+    if pinned_version is not None or now - _last_model_check < MODEL_CHECK_INTERVAL:
         return
+    _last_model_check = now
+    paths = list_models()
+    if paths and (pipeline is None or paths[0] != model_path(pipeline.version)):
+        load_model()
+
+# Nom de profil de chaque cluster (après mapping)
+PROFILE_NAMES = ['High Performer', 'Average Learner', 'At Risk']
+
+def get_profile_name(cluster_id):
+    """Assigne un nom de profil basé sur le cluster"""
+    if 0 <= cluster_id < len(PROFILE_NAMES):
+        return PROFILE_NAMES[cluster_id]
+    return 'Unknown'
+
+def threshold_profile(features):
+    """Profil par seuils fixes (score et risque), utilisé sans modèle entraîné"""
+    score = features['average_score']
+    risk = features['risk_score']
     
-    # Features pour le clustering
-    feature_cols = [
-        'average_score', 'average_participation', 'total_time_spent',
-        'total_assignments', 'total_quiz_attempts', 'risk_score'
-    ]
-    
-    X = df[feature_cols].values
-    
-    # Normalisation
-    scaler = StandardScaler()
-    X_scaled = scaler.fit_transform(X)
-    
-    # PCA pour réduction de dimensionnalité
-    pca = PCA(n_components=3)
-    X_pca = pca.fit_transform(X_scaled)
-    
-    # KMeans clustering (3 profils)
-    model = KMeans(n_clusters=3, random_state=42, n_init=10)
-    model.fit(X_pca)
-    
-    # Stocker les profils
-    df['profile_cluster'] = model.labels_
-    
-    # Identifier les clusters basés sur les scores ET le risque
-    # Calculer un indicateur de performance : score élevé + risque faible = High Performer
-    df['performance_indicator'] = df['average_score'] - (df['risk_score'] * 0.5)
-    cluster_performance = df.groupby('profile_cluster')['performance_indicator'].mean()
-    sorted_clusters = cluster_performance.sort_values(ascending=False)
-    
-    # Mapper les clusters : plus haut indicateur = High Performer (0), plus bas = At Risk (2)
-    cluster_mapping = {
-        sorted_clusters.index[0]: 0,  # Cluster avec le meilleur indicateur → High Performer
-        sorted_clusters.index[1]: 1,  # Cluster avec indicateur moyen → Average Learner
-        sorted_clusters.index[2]: 2   # Cluster avec le pire indicateur → At Risk
-    }
-    
-    df['mapped_cluster'] = df['profile_cluster'].map(cluster_mapping)
+    # Classification basée sur le score ET le risque
+    if score >= 85 and risk < 20:
+        return 0  # High Performer
+    elif score < 50 or risk > 40:
+        return 2  # At Risk
+    return 1  # Average Learner
+
+def profiles_from_features(features_list, current=None, observed_ids=None):
+    """Profils d'un lot d'étudiants : scaler -> PCA -> KMeans en un seul appel
+
+    observed_ids : identifiants des features lues sur PrepaData, ajoutées aux
+    statistiques de dérive (None pour des features fournies ou factices).
+    """
+    if not features_list:
+        return []
+    current = current or pipeline
+    if current is None:
+        return [
+            {'cluster': cluster, 'profile_name': get_profile_name(cluster), 'confidence': None}
+            for cluster in (threshold_profile(features) for features in features_list)
+        ]
     
-    for idx, row in df.iterrows():
-        student_id = int(row['student_id'])
-        mapped_cluster = int(row['mapped_cluster'])
-        profiles_cache[student_id] = {
-            'cluster': mapped_cluster,
-            'profile_name': get_profile_name(mapped_cluster)
+    X = pd.DataFrame(features_list, columns=current.feature_columns).to_numpy(dtype='float64')
+    if observed_ids is not None:
+        drift_monitor.observe(observed_ids, X)
+    predictions = current.predict(X)
+    return [
+        {
+            'cluster': int(cluster),
+            'profile_name': get_profile_name(int(cluster)),
+            'confidence': round(float(confidence), 2),
+            'distance': float(distance),
+            'model_version': current.version
         }
-    
-    print(f"Modèle entraîné avec {len(df)} étudiants, {len(set(model.labels_))} profils")
-    print(f"Mapping clusters: {cluster_mapping}")
-    print(f"Performance indicator par cluster: {cluster_performance.to_dict()}")
+        for cluster, confidence, distance in zip(
+            predictions['cluster'], predictions['confidence'], predictions['distance'])
+    ]
 
-def get_profile_name(cluster_id):
-    """Assigne un nom de profil basé sur le cluster"""
-    profile_names = {
-        0: 'High Performer',
-        1: 'Average Learner',
-        2: 'At Risk'
-    }
-    return profile_names.get(cluster_id, 'Unknown')
+def record_assignments(student_ids, profiles, current):
+    """Publie les changements de profil d'une inférence (modèle entraîné uniquement)"""
+    if current is None:
+        return 0
+    return assignment_feed.record(
+        student_ids, [profile['cluster'] for profile in profiles],
+        [profile['profile_name'] for profile in profiles], current.version, 'inference')
+
+def cache_version(current):
+    """Version du modèle utilisée comme clé de cache"""
+    return current.version if current is not None else 'thresholds'
 
 def predict_profile(student_id):
-    """Prédit le profil d'un étudiant en utilisant des seuils fixes basés sur le score et le risque"""
-    global model, scaler, pca, cluster_mapping
+    """Prédit le profil d'un étudiant avec le pipeline entraîné (seuils fixes sinon)"""
+    current = pipeline
+    cached = profile_cache.get(student_id, cache_version(current))
+    if cached is not None:
+        return cached
+    
+    if current is None:
+        # Modèle pas encore chargé : dernier profil enregistré en base
+        stored = get_student_profile(student_id)
+        if stored is not None:
+            return {
+                'cluster': stored['cluster_id'],
+                'profile_name': stored['profile_type'],
+                'confidence': None if stored['profile_confidence'] is None
+                              else float(stored['profile_confidence']),
+                'model_version': stored['model_version'],
+                'source': 'database'
+            }
     
     # Récupérer les features de l'étudiant
     try:
-        response = requests.get(f'{PREPA_DATA_URL}/features/{student_id}', timeout=5)
-        if response.status_code != 200:
+        response = get_session().get(f'{PREPA_DATA_URL}/features/{student_id}', timeout=5)
+        found = response.status_code == 200
+        if not found:
             print(f"Impossible de récupérer les features pour {student_id}, utilisation de données factices")
             # Données factices
             features = {
@@ -135,27 +315,11 @@ def predict_profile(student_id):
         else:
             features = response.json()['features']
         
-        # Utiliser des seuils fixes basés sur le score et le risque
-        score = features['average_score']
-        risk = features['risk_score']
-        
-        # Classification basée sur le score ET le risque
-        if score >= 85 and risk < 20:
-            cluster = 0  # High Performer
-            profile_name = 'High Performer'
-        elif score < 50 or risk > 40:
-            cluster = 2  # At Risk
-            profile_name = 'At Risk'
-        else:
-            cluster = 1  # Average Learner
-            profile_name = 'Average Learner'
-        
-        result = {
-            'cluster': cluster,
-            'profile_name': profile_name
-        }
-        
-        profiles_cache[student_id] = result
+        result = profiles_from_features([features], current,
+                                        [student_id] if found else None)[0]
+        if found:  # les profils sur données factices ne sont ni en cache ni publiés
+            profile_cache.put(student_id, cache_version(current), result)
+            record_assignments([student_id], [result], current)
         return result
         
     except Exception as e:
@@ -184,16 +348,303 @@ def get_profile(student_id):
             'message': str(e)
         }), 500
 
+@app.route('/profile/batch', methods=['POST'])
+def get_profiles_batch():
+    """Endpoint pour profiler plusieurs étudiants en une seule inférence
+
+    Corps : {"student_ids": [1, 2, 3]} (features lues sur PrepaData) ou
+    {"students": [{"student_id": 1, "average_score": 72, ...}]}.
+    Les résultats sont renvoyés dans l'ordre de la requête.
+    """
+    data = request.get_json(silent=True) or {}
+    students = data.get('students')
+    student_ids = data.get('student_ids')
+    
+    if students is not None:
+        if not isinstance(students, list) or not all(
+                isinstance(s, dict) and 'student_id' in s for s in students):
+            return jsonify({
+                'error': 'students doit être une liste de features avec student_id'
+            }), 400
+        student_ids = [s['student_id'] for s in students]
+    elif not isinstance(student_ids, list):
+        return jsonify({
+            'error': 'student_ids doit être une liste d\'identifiants'
+        }), 400
+    
+    try:
+        current = pipeline
+        version = cache_version(current)
+        profiles = {}
+        if students is None:
+            # Profils en cache : ni appel PrepaData ni inférence
+            for student_id in student_ids:
+                cached = profile_cache.get(student_id, version)
+                if cached is not None:
+                    profiles[str(student_id)] = cached
+            missing = list(dict.fromkeys(
+                student_id for student_id in student_ids if str(student_id) not in profiles))
+            fetched = fetch_all_features(missing) if missing else pd.DataFrame()
+            by_id = {} if fetched.empty else {
+                str(f['student_id']): f for f in fetched.to_dict('records')
+            }
+        else:
+            # Features fournies par l'appelant : pas de mise en cache
+            by_id = {str(s['student_id']): s for s in students}
+        
+        if by_id:
+            computed = profiles_from_features(list(by_id.values()), current,
+                                              list(by_id) if students is None else None)
+            for key, profile in zip(by_id, computed):
+                profiles[key] = profile
+                if students is None:
+                    profile_cache.put(key, version, profile)
+            if students is None:
+                record_assignments(list(by_id), computed, current)
+        
+        results = []
+        for student_id in student_ids:
+            profile = profiles.get(str(student_id))
+            if profile is not None:
+                results.append({'status': 'success', 'student_id': student_id,
+                                'profile': profile})
+            else:
+                results.append({'status': 'error', 'student_id': student_id,
+                                'error': f'Features de l\'étudiant {student_id} introuvables'})
+        
+        return jsonify({
+            'status': 'success',
+            'model_version': current.version if current else None,
+            'count': len(results),
+            'profiles': results
+        })
+    except Exception as e:
+        return jsonify({
+            'status': 'error',
+            'message': str(e)
+        }), 500
+
+def _parse_cursor(value):
+    """Curseur entier positif (None si invalide)"""
+    try:
+        cursor = int(value)
+    except (TypeError, ValueError):
+        return None
+    return cursor if cursor >= 0 else None
+
+@app.route('/profile/changes', methods=['GET'])
+def get_profile_changes():
+    """Endpoint des changements de profil postérieurs à un curseur
+
+    Paramètres : cursor (0 par défaut) et limit (500 par défaut, 5000 au
+    plus). Relancer avec next_cursor tant que has_more est vrai.
+    """
+    cursor = _parse_cursor(request.args.get('cursor', 0))
+    limit = _parse_cursor(request.args.get('limit', CHANGE_FEED_PAGE_SIZE))
+    if cursor is None or not limit:
+        return jsonify({
+            'error': 'cursor et limit doivent être des entiers positifs'
+        }), 400
+    
+    page = assignment_feed.since(cursor, min(limit, 5000))
+    return jsonify({'status': 'success', 'count': len(page['events']), **page})
+
+@app.route('/profile/changes/stream', methods=['GET'])
+def stream_profile_changes():
+    """Flux SSE des changements de profil
+
+    Reprise après déconnexion via l'en-tête Last-Event-ID (ou ?cursor=) ;
+    sans curseur, seuls les changements à venir sont envoyés.
+    """
+    start = request.headers.get('Last-Event-ID', request.args.get('cursor'))
+    cursor = assignment_feed.stats()['latest_cursor'] if start is None else _parse_cursor(start)
+    if cursor is None:
+        return jsonify({
+            'error': 'cursor doit être un entier positif'
+        }), 400
+    
+    def events(cursor):
+        while True:
+            page = assignment_feed.since(cursor, CHANGE_FEED_PAGE_SIZE)
+            if page['truncated']:
+                yield f"event: reset\ndata: {json.dumps({'cursor': page['next_cursor']})}\n\n"
+            for event in page['events']:
+                yield f"id: {event['cursor']}\nevent: profile_changed\ndata: {json.dumps(event)}\n\n"
+            cursor = page['next_cursor']
+            if not page['has_more'] and not assignment_feed.wait(
+                    cursor, CHANGE_STREAM_HEARTBEAT_SECONDS):
+                yield ': keep-alive\n\n'
+    
+    return Response(events(cursor), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+@app.route('/model', methods=['GET'])
+def get_model():
+    """Endpoint décrivant le modèle de profilage servi"""
+    if pipeline is None:
+        return jsonify({
+            'error': 'Aucun modèle de profilage chargé'
+        }), 404
+    
+    return jsonify({
+        'status': 'success',
+        'model': pipeline.info(),
+        'pinned': pinned_version is not None,
+        'available_versions': [
+            os.path.basename(path)[len('profiler-'):-len('.joblib')] for path in list_models()
+        ]
+    })
+
+@app.route('/model/drift', methods=['GET'])
+def get_model_drift():
+    """Endpoint de la dérive des features vues depuis la publication du modèle"""
+    return jsonify({
+        'status': 'success',
+        'drift': drift_monitor.report(),
+        'check_interval_seconds': DRIFT_CHECK_INTERVAL,
+        'last_drift_retrain': last_drift_retrain
+    })
+
+@app.route('/admin/model/reload', methods=['POST'])
+def reload_model():
+    """Recharge un artefact sans interruption de service
+
+    Corps optionnel : {"version": "..."} pour fixer une version (retour
+    arrière) ; sans version, le dernier artefact est chargé et suivi.
+    """
+    global pinned_version
+    data = request.get_json(silent=True) or {}
+    version = data.get('version')
+    
+    loaded = load_model(version)
+    if loaded is None:
+        return jsonify({
+            'error': f'Modèle {version or "enregistré"} introuvable'
+        }), 404
+    
+    pinned_version = version
+    return jsonify({
+        'status': 'success',
+        'model': loaded.info(),
+        'pinned': version is not None
+    })
+
+@app.route('/admin/model/train', methods=['POST'])
+def retrain_model():
+    """Réentraîne le modèle, l'enregistre puis le publie
+
+    Corps optionnel : {"mode": "full" | "incremental", "source": "prepa" | "snapshot"}.
+    """
+    global pinned_version
+    data = request.get_json(silent=True) or {}
+    mode = data.get('mode')
+    source = data.get('source')
+    if mode not in (None, 'full', 'incremental') or source not in (None, 'prepa', 'snapshot'):
+        return jsonify({
+            'error': 'mode doit valoir full ou incremental, source prepa ou snapshot'
+        }), 400
+    if _training_lock.locked():
+        return jsonify({'error': 'Un entraînement est déjà en cours'}), 409
+    
+    try:
+        trained = train_profiling_model(mode, source)
+        if trained is None:
+            return jsonify({
+                'status': 'error',
+                'message': 'Aucune donnée disponible pour l\'entraînement'
+            }), 503
+        
+        pinned_version = None
+        return jsonify({
+            'status': 'success',
+            'model': trained.info()
+        })
+    except Exception as e:
+        return jsonify({
+            'status': 'error',
+            'message': str(e)
+        }), 500
+
+@app.route('/admin/model/update', methods=['POST'])
+def update_model():
+    """Met à jour les centroïdes avec de nouveaux étudiants (sans réentraînement)
+
+    Corps : {"student_ids": [...]} (features lues sur PrepaData) ou
+    {"students": [{"student_id": 1, "average_score": 72, ...}]}.
+    """
+    global pinned_version
+    data = request.get_json(silent=True) or {}
+    current = pipeline
+    if current is None:
+        return jsonify({
+            'error': 'Aucun modèle de profilage chargé'
+        }), 404
+    
+    try:
+        if isinstance(data.get('students'), list):
+            df = pd.DataFrame(data['students'])
+        elif isinstance(data.get('student_ids'), list):
+            df = fetch_all_features(data['student_ids'])
+        else:
+            return jsonify({
+                'error': 'student_ids ou students doit être une liste'
+            }), 400
+        
+        if df.empty:
+            return jsonify({
+                'error': 'Aucune feature trouvée pour ces étudiants'
+            }), 404
+        
+        updated = update_pipeline(current, df.reindex(columns=current.feature_columns))
+        publish_pipeline(updated)
+        pinned_version = None
+        return jsonify({
+            'status': 'success',
+            'students_added': len(df),
+            'previous_version': current.version,
+            'model': updated.info()
+        })
+    except Exception as e:
+        return jsonify({
+            'status': 'error',
+            'message': str(e)
+        }), 500
+
+@app.route('/admin/cache/invalidate', methods=['POST'])
+def invalidate_profile_cache():
+    """Invalide les profils en cache (features modifiées)
+
+    Corps : {"student_ids": [...]} pour quelques étudiants ; sans liste (ou
+    événement features_refreshed de PrepaData), tout le cache est vidé.
+    """
+    data = request.get_json(silent=True) or {}
+    student_ids = data.get('student_ids')
+    if student_ids is not None and not isinstance(student_ids, list):
+        return jsonify({
+            'error': 'student_ids doit être une liste d\'identifiants'
+        }), 400
+    
+    removed = profile_cache.invalidate(student_ids)
+    return jsonify({
+        'status': 'success',
+        'event': data.get('event'),
+        'invalidated': removed,
+        'cache': profile_cache.stats()
+    })
+
 @app.route('/health', methods=['GET'])
 def health():
     """Endpoint de santé"""
     return jsonify({
         'status': 'ok',
-        'service': 'StudentProfiler'
+        'service': 'StudentProfiler',
+        'cache': profile_cache.stats(),
+        'change_feed': assignment_feed.stats()
     })
 
-# Initialiser le modèle au démarrage
+# Initialiser le modèle au démarrage (aussi dans chaque worker gunicorn)
+init_model()
+
 if __name__ == '__main__':
-    train_profiling_model()
     app.run(host='0.0.0.0', port=PORT, debug=True)
 
@@ -0,0 +1,100 @@
+"""
+Flux des changements de profil (StudentProfiler)
+
+Le dernier profil connu de chaque étudiant est conservé ; après une
+inférence par lot ou un réentraînement, seuls les étudiants dont le profil
+a changé produisent un événement. Les événements portent un numéro de
+séquence croissant qui sert de curseur : un consommateur relit le flux à
+partir du dernier numéro vu et ne rafraîchit que les étudiants concernés.
+Seuls les CHANGE_FEED_SIZE derniers événements sont conservés.
+"""
+import os
+import time
+import threading
+from collections import deque
+from itertools import islice
+from dotenv import load_dotenv
+
+load_dotenv()
+
+CHANGE_FEED_SIZE = int(os.getenv('CHANGE_FEED_SIZE', 100000))
+
+
+class AssignmentFeed:
+    """Dernières affectations par étudiant et journal borné des changements"""
+
+    def __init__(self, max_events=CHANGE_FEED_SIZE):
+        self._assignments = {}
+        self._events = deque(maxlen=max_events)
+        self._seq = 0
+        self._changed = threading.Condition()
+
+    def record(self, student_ids, clusters, profile_names, model_version, source):
+        """Compare les nouvelles affectations aux précédentes, publie les changements
+
+        Un étudiant vu pour la première fois n'est pas un changement. Retourne
+        le nombre d'événements ajoutés.
+        """
+        now = time.time()
+        added = 0
+        with self._changed:
+            for student_id, cluster, profile_name in zip(student_ids, clusters, profile_names):
+                key = str(student_id)
+                cluster = int(cluster)
+                previous = self._assignments.get(key)
+                self._assignments[key] = (cluster, profile_name)
+                if previous is None or previous[0] == cluster:
+                    continue
+                self._seq += 1
+                self._events.append({
+                    'cursor': self._seq,
+                    'student_id': key,
+                    'previous_cluster': previous[0],
+                    'previous_profile': previous[1],
+                    'cluster': cluster,
+                    'profile_name': profile_name,
+                    'model_version': model_version,
+                    'source': source,
+                    'changed_at': now
+                })
+                added += 1
+            if added:
+                self._changed.notify_all()
+        return added
+
+    def since(self, cursor=0, limit=500):
+        """Événements postérieurs au curseur (au plus `limit`)
+
+        `truncated` signale que le curseur n'est plus couvert par le journal
+        (événements supprimés, ou curseur d'avant un redémarrage) : le
+        consommateur doit tout rafraîchir puis repartir de `next_cursor`.
+        """
+        with self._changed:
+            latest = self._seq
+            oldest = self._events[0]['cursor'] if self._events else latest + 1
+            truncated = cursor < oldest - 1 or cursor > latest
+            # Numéros de séquence contigus : position directe dans le journal
+            start = max(0, min(cursor, latest) - oldest + 1)
+            events = list(islice(self._events, start, start + limit))
+        next_cursor = events[-1]['cursor'] if events else latest
+        return {
+            'events': events,
+            'next_cursor': next_cursor,
+            'latest_cursor': latest,
+            'has_more': next_cursor < latest,
+            'truncated': truncated
+        }
+
+    def wait(self, cursor, timeout):
+        """Attend un événement postérieur au curseur (True si disponible)"""
+        with self._changed:
+            return self._changed.wait_for(lambda: self._seq > cursor, timeout=timeout)
+
+    def stats(self):
+        with self._changed:
+            return {
+                'students': len(self._assignments),
+                'events': len(self._events),
+                'max_events': self._events.maxlen,
+                'latest_cursor': self._seq
+            }
@@ -1,9 +1,10 @@
 """
 Module de connexion PostgreSQL pour StudentProfiler
 """
+import io
 import os
 import psycopg2
-from psycopg2.extras import RealDictCursor
+from psycopg2.extras import RealDictCursor, execute_values
 from psycopg2.pool import SimpleConnectionPool
 from contextlib import contextmanager
 from dotenv import load_dotenv
@@ -71,6 +72,16 @@ def init_tables():
                     );
                 """)
                 
+                # Version du modèle ayant produit profils et statistiques
+                cur.execute("""
+                    ALTER TABLE student_profiles
+                        ADD COLUMN IF NOT EXISTS model_version VARCHAR(50);
+                """)
+                cur.execute("""
+                    ALTER TABLE profile_statistics
+                        ADD COLUMN IF NOT EXISTS model_version VARCHAR(50);
+                """)
+                
         print('✅ StudentProfiler database tables initialized')
     except Exception as e:
         print(f'❌ Error initializing tables: {e}')
@@ -114,5 +125,86 @@ def save_profile_statistics(profile_type, student_count, avg_engagement, avg_suc
         print(f'Error saving profile statistics: {e}')
         return None
 
+PROFILE_COLUMNS = [
+    'profile_type', 'cluster_id', 'pca_components', 'profile_confidence', 'model_version'
+]
+
+def save_training_results(profiles, statistics, model_version):
+    """Sauvegarde les profils de toute la cohorte et leurs statistiques en une transaction
+
+    profiles : DataFrame (student_id, profile_type, cluster_id, pca_components
+    en JSON, profile_confidence). Les lignes sont copiées (COPY) dans une table
+    temporaire puis fusionnées dans student_profiles par un seul
+    INSERT ... ON CONFLICT ; statistics (une ligne par profil) est insérée
+    dans la même transaction.
+    """
+    if len(profiles) == 0:
+        return 0
+    
+    buffer = io.StringIO()
+    frame = profiles[['student_id'] + PROFILE_COLUMNS[:-1]].copy()
+    frame['model_version'] = model_version
+    frame.to_csv(buffer, index=False, header=False)
+    buffer.seek(0)
+    
+    columns = ', '.join(['student_id'] + PROFILE_COLUMNS)
+    updates = ',\n'.join(f'{col} = EXCLUDED.{col}' for col in PROFILE_COLUMNS)
+    try:
+        with get_db_connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute("""
+                    CREATE TEMP TABLE student_profiles_staging (
+                        student_id VARCHAR(50),
+                        profile_type VARCHAR(50),
+                        cluster_id INTEGER,
+                        pca_components JSONB,
+                        profile_confidence DECIMAL(5,2),
+                        model_version VARCHAR(50)
+                    ) ON COMMIT DROP;
+                """)
+                cur.copy_expert(
+                    f"COPY student_profiles_staging ({columns}) FROM STDIN WITH (FORMAT csv)",
+                    buffer
+                )
+                cur.execute(f"""
+                    INSERT INTO student_profiles ({columns})
+                    SELECT {columns} FROM student_profiles_staging
+                    ON CONFLICT (student_id)
+                    DO UPDATE SET
+                        {updates},
+                        updated_at = CURRENT_TIMESTAMP;
+                """)
+                saved = cur.rowcount
+                
+                execute_values(cur, """
+                    INSERT INTO profile_statistics
+                    (profile_type, student_count, avg_engagement, avg_success_rate, model_version)
+                    VALUES %s;
+                """, [
+                    (row.profile_type, int(row.student_count), float(row.avg_engagement),
+                     float(row.avg_success_rate), model_version)
+                    for row in statistics.itertuples(index=False)
+                ])
+                return saved
+    except Exception as e:
+        print(f'Error saving training results (bulk): {e}')
+        return None
+
+def get_student_profile(student_id):
+    """Dernier profil enregistré d'un étudiant (None si absent ou base indisponible)"""
+    try:
+        with get_db_connection() as conn:
+            with conn.cursor(cursor_factory=RealDictCursor) as cur:
+                cur.execute("""
+                    SELECT student_id, profile_type, cluster_id, profile_confidence,
+                           model_version, updated_at
+                    FROM student_profiles
+                    WHERE student_id = %s;
+                """, (str(student_id),))
+                return cur.fetchone()
+    except Exception as e:
+        print(f'Error reading student profile: {e}')
+        return None
+
 init_pool()
 
@@ -0,0 +1,126 @@
+"""
+Détection de dérive des features vues par StudentProfiler
+
+Les features lues sur PrepaData pour l'inférence mettent à jour une moyenne
+et une variance courantes par feature (algorithme de Chan / Welford).
+Chaque étudiant n'est compté qu'une fois par référence : les profils
+redemandés ne pèsent pas plus que les autres, et les features fournies par
+un appelant ou inventées (étudiant inconnu) ne sont jamais observées. Elles sont comparées à la référence d'entraînement, celle du
+StandardScaler du modèle : décalage de la moyenne en écarts-types et
+rapport des variances. Au-delà des seuils, un réentraînement est justifié.
+"""
+import os
+import threading
+import numpy as np
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Décalage de moyenne toléré (en écarts-types d'entraînement)
+DRIFT_MEAN_THRESHOLD = float(os.getenv('DRIFT_MEAN_THRESHOLD', 0.5))
+# Rapport de variance toléré (dans un sens ou dans l'autre)
+DRIFT_VARIANCE_RATIO = float(os.getenv('DRIFT_VARIANCE_RATIO', 2.0))
+# Nombre minimal d'observations avant de conclure
+DRIFT_MIN_SAMPLES = int(os.getenv('DRIFT_MIN_SAMPLES', 500))
+
+
+class RunningStats:
+    """Effectif, moyenne et somme des carrés des écarts par colonne (NaN ignorés)"""
+
+    def __init__(self, n_features):
+        self.count = np.zeros(n_features)
+        self.mean = np.zeros(n_features)
+        self.m2 = np.zeros(n_features)
+
+    def update(self, X):
+        """Fusionne les statistiques d'un lot (combinaison de Chan)"""
+        X = np.asarray(X, dtype='float64')
+        valid = ~np.isnan(X)
+        count = valid.sum(axis=0).astype('float64')
+        if not count.any():
+            return
+        with np.errstate(invalid='ignore', divide='ignore'):
+            mean = np.where(count > 0, np.nansum(X, axis=0) / count, 0.0)
+            m2 = np.nansum(np.where(valid, (X - mean) ** 2, 0.0), axis=0)
+
+            total = self.count + count
+            delta = mean - self.mean
+            self.mean = np.where(total > 0, self.mean + delta * count / total, 0.0)
+            self.m2 = np.where(total > 0,
+                               self.m2 + m2 + delta ** 2 * self.count * count / total, 0.0)
+        self.count = total
+
+    @property
+    def variance(self):
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return np.where(self.count > 0, self.m2 / self.count, np.nan)
+
+
+class DriftMonitor:
+    """Compare les features observées à la référence d'entraînement du modèle"""
+
+    def __init__(self, feature_columns):
+        self.feature_columns = list(feature_columns)
+        self._lock = threading.Lock()
+        self.baseline_mean = None
+        self.baseline_var = None
+        self.model_version = None
+        self._stats = RunningStats(len(self.feature_columns))
+        self._seen = set()
+
+    def reset(self, pipeline):
+        """Nouvelle référence : statistiques d'entraînement du modèle publié"""
+        with self._lock:
+            self.baseline_mean = np.asarray(pipeline.scaler.mean_, dtype='float64')
+            self.baseline_var = np.asarray(pipeline.scaler.var_, dtype='float64')
+            self.model_version = pipeline.version
+            self._stats = RunningStats(len(self.feature_columns))
+            self._seen = set()
+
+    def observe(self, student_ids, X):
+        """Ajoute les features (lignes de X) des étudiants pas encore observés"""
+        student_ids = [str(student_id) for student_id in student_ids]
+        with self._lock:
+            new = [i for i, student_id in enumerate(student_ids) if student_id not in self._seen]
+            if not new:
+                return
+            self._seen.update(student_ids[i] for i in new)
+            self._stats.update(np.asarray(X, dtype='float64')[new])
+
+    def report(self):
+        """Décalages par feature et décision de dérive"""
+        with self._lock:
+            if self.baseline_mean is None:
+                return {'model_version': None, 'samples': 0, 'drifted': False, 'features': {}}
+            count = self._stats.count.copy()
+            mean = self._stats.mean.copy()
+            var = self._stats.variance
+            baseline_mean, baseline_var = self.baseline_mean, self.baseline_var
+            model_version = self.model_version
+
+        with np.errstate(invalid='ignore', divide='ignore'):
+            baseline_std = np.sqrt(baseline_var)
+            mean_shift = np.where(baseline_std > 0, np.abs(mean - baseline_mean) / baseline_std, 0.0)
+            variance_ratio = np.where(baseline_var > 0, var / baseline_var, 1.0)
+
+        enough = count >= DRIFT_MIN_SAMPLES
+        drifted = enough & (
+            (mean_shift > DRIFT_MEAN_THRESHOLD)
+            | (variance_ratio > DRIFT_VARIANCE_RATIO)
+            | (variance_ratio < 1 / DRIFT_VARIANCE_RATIO)
+        )
+        return {
+            'model_version': model_version,
+            'samples': int(count.min()),
+            'drifted': bool(drifted.any()),
+            'features': {
+                name: {
+                    'samples': int(count[i]),
+                    'mean_shift_std': round(float(mean_shift[i]), 4),
+                    'variance_ratio': None if np.isnan(variance_ratio[i])
+                                      else round(float(variance_ratio[i]), 4),
+                    'drifted': bool(drifted[i])
+                }
+                for i, name in enumerate(self.feature_columns)
+            }
+        }
@@ -0,0 +1,179 @@
+"""
+Client des features PrepaData pour StudentProfiler
+
+Les features de la cohorte sont récupérées par lots via POST /features/batch
+(réponse NDJSON) : plusieurs lots sont demandés en parallèle (asyncio, au
+plus FEATURE_FETCH_CONCURRENCY à la fois) sur une session HTTP dont les
+connexions sont réutilisées. Si PrepaData n'expose pas l'endpoint batch,
+les étudiants sont demandés un par un avec la même parallélisation bornée.
+
+Pour l'entraînement incrémental, les features peuvent aussi être lues lot
+par lot (séquentiellement) depuis PrepaData ou depuis un snapshot Parquet.
+"""
+import os
+import json
+import asyncio
+import tempfile
+import threading
+import pandas as pd
+import pyarrow.parquet as pq
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from dotenv import load_dotenv
+
+load_dotenv()
+
+PREPA_DATA_URL = os.getenv('PREPA_DATA_URL', 'http://localhost:3002')
+FEATURE_FETCH_CONCURRENCY = int(os.getenv('FEATURE_FETCH_CONCURRENCY', 8))
+FEATURE_BATCH_SIZE = int(os.getenv('FEATURE_BATCH_SIZE', 5000))
+FEATURE_FETCH_TIMEOUT = int(os.getenv('FEATURE_FETCH_TIMEOUT', 60))
+# Snapshot Parquet local (sinon téléchargé depuis PrepaData /features/snapshot)
+FEATURE_SNAPSHOT_PATH = os.getenv('FEATURE_SNAPSHOT_PATH')
+
+_session = None
+_session_lock = threading.Lock()
+
+
+class BatchUnavailable(Exception):
+    """L'instance PrepaData ne propose pas POST /features/batch"""
+
+
+def get_session():
+    """Session HTTP partagée (pool de connexions keep-alive, réessais de connexion)"""
+    global _session
+    with _session_lock:
+        if _session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(
+                pool_connections=1,
+                pool_maxsize=FEATURE_FETCH_CONCURRENCY,
+                max_retries=Retry(connect=2, read=0, backoff_factor=0.2)
+            )
+            session.mount('http://', adapter)
+            session.mount('https://', adapter)
+            _session = session
+        return _session
+
+
+def list_student_ids():
+    """Identifiants des étudiants connus de PrepaData (None si indisponible)"""
+    try:
+        response = get_session().get(f'{PREPA_DATA_URL}/students', timeout=FEATURE_FETCH_TIMEOUT)
+        response.raise_for_status()
+        return response.json()['student_ids']
+    except Exception as e:
+        print(f"⚠️ Liste des étudiants indisponible: {e}")
+        return None
+
+
+def fetch_feature_batch(student_ids):
+    """Features d'un lot d'étudiants (une seule requête, réponse NDJSON)"""
+    features = []
+    with get_session().post(f'{PREPA_DATA_URL}/features/batch',
+                            json={'student_ids': student_ids},
+                            stream=True, timeout=(5, FEATURE_FETCH_TIMEOUT)) as response:
+        if response.status_code in (404, 405):
+            raise BatchUnavailable(response.status_code)
+        response.raise_for_status()
+        for line in response.iter_lines():
+            if not line:
+                continue
+            item = json.loads(line)
+            if item.get('status') == 'success':
+                features.append(item['features'])
+    return features
+
+
+def fetch_student_features(student_id):
+    """Features d'un étudiant (None si absent ou en erreur)"""
+    try:
+        response = get_session().get(f'{PREPA_DATA_URL}/features/{student_id}', timeout=5)
+        if response.status_code != 200:
+            return None
+        features = response.json()['features']
+        features['student_id'] = student_id
+        return features
+    except Exception as e:
+        print(f"Erreur lors de la récupération des features pour l'étudiant {student_id}: {e}")
+        return None
+
+
+async def _gather_bounded(func, items, concurrency=FEATURE_FETCH_CONCURRENCY):
+    """Exécute func(item) pour chaque item, au plus `concurrency` à la fois"""
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def run(item):
+        async with semaphore:
+            return await asyncio.to_thread(func, item)
+
+    return await asyncio.gather(*(run(item) for item in items))
+
+
+def fetch_all_features(student_ids=None):
+    """Features de toute la cohorte (ou des étudiants donnés) en DataFrame"""
+    if student_ids is None:
+        student_ids = list_student_ids()
+    if student_ids is None:
+        chunks = ['all']
+    else:
+        chunks = [student_ids[start:start + FEATURE_BATCH_SIZE]
+                  for start in range(0, len(student_ids), FEATURE_BATCH_SIZE)]
+
+    try:
+        batches = asyncio.run(_gather_bounded(fetch_feature_batch, chunks))
+        all_features = [features for batch in batches for features in batch]
+    except BatchUnavailable:
+        if student_ids is None:
+            print("❌ Ni /students ni /features/batch disponibles sur PrepaData")
+            return pd.DataFrame()
+        print("⚠️ /features/batch indisponible, récupération étudiant par étudiant")
+        results = asyncio.run(_gather_bounded(fetch_student_features, student_ids))
+        all_features = [features for features in results if features is not None]
+    except Exception as e:
+        print(f"❌ Erreur lors de la récupération des features: {e}")
+        return pd.DataFrame()
+
+    return pd.DataFrame(all_features)
+
+
+def iter_feature_chunks(student_ids=None, batch_size=FEATURE_BATCH_SIZE):
+    """Features de la cohorte lot par lot (un DataFrame par appel batch)"""
+    if student_ids is None:
+        student_ids = list_student_ids()
+    if student_ids is None:
+        yield pd.DataFrame(fetch_feature_batch('all'))
+        return
+    for start in range(0, len(student_ids), batch_size):
+        yield pd.DataFrame(fetch_feature_batch(student_ids[start:start + batch_size]))
+
+
+def download_snapshot(directory=None):
+    """Télécharge le dernier snapshot Parquet de PrepaData (chemin local)"""
+    with get_session().get(f'{PREPA_DATA_URL}/features/snapshot', stream=True,
+                           timeout=(5, FEATURE_FETCH_TIMEOUT)) as response:
+        response.raise_for_status()
+        handle, path = tempfile.mkstemp(suffix='.parquet', dir=directory)
+        with os.fdopen(handle, 'wb') as f:
+            for block in response.iter_content(chunk_size=1 << 20):
+                f.write(block)
+    return path
+
+
+def iter_snapshot_chunks(columns, path=None, batch_size=FEATURE_BATCH_SIZE):
+    """Colonnes demandées d'un snapshot Parquet, lot par lot (DataFrames)"""
+    downloaded = None
+    path = path or FEATURE_SNAPSHOT_PATH
+    if path is None:
+        path = downloaded = download_snapshot()
+    try:
+        parquet = pq.ParquetFile(path, memory_map=True)
+        for batch in parquet.iter_batches(batch_size=batch_size, columns=list(columns)):
+            chunk = batch.to_pandas()
+            # student_id est l'index du snapshot PrepaData : il redevient une colonne
+            if chunk.index.name is not None:
+                chunk = chunk.reset_index()
+            yield chunk
+    finally:
+        if downloaded is not None:
+            os.remove(downloaded)
@@ -0,0 +1,213 @@
+"""
+Sélection du modèle de profilage : balayage de k et de la dimension PCA
+
+Job hors ligne : chaque configuration (n_clusters, n_components) est
+entraînée dans un pool de processus sur la cohorte courante. Pour chacune
+sont mesurés le score silhouette, l'inertie, le temps d'entraînement et la
+latence d'inférence (lot complet et étudiant seul) ; un rapport comparatif
+JSON + Markdown est écrit dans REPORT_DIR.
+
+    python src/model_selection.py --k 2,3,4,5,6 --components 2,3,4,5 --source snapshot
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import numpy as np
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+from sklearn.cluster import KMeans
+from sklearn.decomposition import PCA
+from sklearn.metrics import silhouette_score
+from sklearn.preprocessing import StandardScaler
+from dotenv import load_dotenv
+from feature_client import fetch_all_features, iter_snapshot_chunks
+from profile_model import FEATURE_COLUMNS, N_CLUSTERS, N_COMPONENTS
+
+load_dotenv()
+
+REPORT_DIR = os.getenv(
+    'REPORT_DIR', os.path.join(os.path.dirname(__file__), '..', 'reports')
+)
+# Échantillon du score silhouette (coût quadratique en nombre d'étudiants)
+SILHOUETTE_SAMPLE_SIZE = int(os.getenv('SILHOUETTE_SAMPLE_SIZE', 10000))
+# Écart de silhouette toléré pour préférer une configuration moins coûteuse
+SILHOUETTE_TOLERANCE = float(os.getenv('SILHOUETTE_TOLERANCE', 0.01))
+# Rapport de latence unitaire (p50) au-delà duquel l'écart est significatif ;
+# en deçà, les écarts sont du bruit de mesure
+LATENCY_SIGNIFICANT_RATIO = float(os.getenv('LATENCY_SIGNIFICANT_RATIO', 1.5))
+LATENCY_REPEATS = 50
+
+# Données de la cohorte, transmises une seule fois à chaque processus
+_X = None
+
+
+def _init_worker(X):
+    global _X
+    _X = X
+
+
+def evaluate_config(n_clusters, n_components):
+    """Entraîne une configuration et mesure qualité et coût"""
+    X = _X
+    start = time.perf_counter()
+    pca = PCA(n_components=n_components)
+    X_pca = pca.fit_transform(X)
+    model = KMeans(n_clusters=n_clusters, random_state=42, n_init=10)
+    labels = model.fit_predict(X_pca)
+    fit_ms = (time.perf_counter() - start) * 1000
+
+    silhouette = silhouette_score(
+        X_pca, labels, sample_size=min(SILHOUETTE_SAMPLE_SIZE, len(X_pca)), random_state=42
+    )
+
+    start = time.perf_counter()
+    model.predict(pca.transform(X))
+    batch_ms = (time.perf_counter() - start) * 1000
+
+    row = X[:1]
+    timings = []
+    for _ in range(LATENCY_REPEATS):
+        start = time.perf_counter()
+        model.predict(pca.transform(row))
+        timings.append((time.perf_counter() - start) * 1000)
+
+    return {
+        'n_clusters': n_clusters,
+        'n_components': n_components,
+        'silhouette': round(float(silhouette), 4),
+        'inertia': round(float(model.inertia_), 2),
+        'explained_variance': round(float(pca.explained_variance_ratio_.sum()), 4),
+        'cluster_sizes': np.bincount(labels, minlength=n_clusters).tolist(),
+        'fit_ms': round(fit_ms, 2),
+        'batch_inference_ms': round(batch_ms, 2),
+        'inference_us_per_student': round(batch_ms * 1000 / len(X), 3),
+        'single_inference_ms_p50': round(float(np.median(timings)), 3)
+    }
+
+
+def load_cohort(source):
+    """Matrice normalisée des features de la cohorte (valeurs manquantes imputées)"""
+    if source == 'snapshot':
+        df = pd.concat(iter_snapshot_chunks(FEATURE_COLUMNS), ignore_index=True)
+    else:
+        df = fetch_all_features()
+    if df.empty:
+        return None
+    X = df[FEATURE_COLUMNS].to_numpy(dtype='float64')
+    X = np.where(np.isnan(X), np.nanmean(X, axis=0), X)
+    return StandardScaler().fit_transform(X)
+
+
+def run_sweep(X, k_values, component_values, workers=None):
+    """Évalue toutes les configurations valides dans un pool de processus"""
+    configs = [
+        (k, n) for k in k_values for n in component_values
+        if 2 <= k < len(X) and 1 <= n <= min(X.shape)
+    ]
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(X,)) as executor:
+        futures = [executor.submit(evaluate_config, k, n) for k, n in configs]
+        return [future.result() for future in futures]
+
+
+def recommend(results):
+    """Configuration la plus simple dont la silhouette est proche du maximum
+
+    Parmi les configurations à moins de SILHOUETTE_TOLERANCE du maximum,
+    celles dont la latence unitaire dépasse significativement la plus
+    rapide (LATENCY_SIGNIFICANT_RATIO) sont écartées ; le choix est ensuite
+    déterministe : plus petit k, puis plus petite dimension PCA.
+    """
+    if not results:
+        return None
+    best = max(r['silhouette'] for r in results)
+    candidates = [r for r in results if r['silhouette'] >= best - SILHOUETTE_TOLERANCE]
+    fastest = min(r['single_inference_ms_p50'] for r in candidates)
+    candidates = [r for r in candidates
+                  if r['single_inference_ms_p50'] <= fastest * LATENCY_SIGNIFICANT_RATIO]
+    return min(candidates, key=lambda r: (r['n_clusters'], r['n_components']))
+
+
+def write_report(results, n_students, source):
+    """Écrit le rapport comparatif (JSON + Markdown), retourne les chemins"""
+    os.makedirs(REPORT_DIR, exist_ok=True)
+    stamp = time.strftime('%Y%m%d%H%M%S', time.gmtime())
+    recommended = recommend(results)
+    report = {
+        'created_at': time.time(),
+        'source': source,
+        'n_students': n_students,
+        'current': {'n_clusters': N_CLUSTERS, 'n_components': N_COMPONENTS},
+        'silhouette_tolerance': SILHOUETTE_TOLERANCE,
+        'latency_significant_ratio': LATENCY_SIGNIFICANT_RATIO,
+        'recommended': recommended,
+        'results': results
+    }
+    json_path = os.path.join(REPORT_DIR, f'model_selection-{stamp}.json')
+    with open(json_path, 'w') as f:
+        json.dump(report, f, indent=2)
+
+    lines = [
+        f'# Sélection du modèle de profilage ({n_students} étudiants, source {source})',
+        '',
+        f'Configuration actuelle : k={N_CLUSTERS}, PCA={N_COMPONENTS}.',
+        '',
+        '| k | PCA | silhouette | inertie | variance expliquée | entraînement (ms) '
+        '| lot (µs/étudiant) | unitaire p50 (ms) |',
+        '|---|---|---|---|---|---|---|---|'
+    ]
+    for r in sorted(results, key=lambda r: -r['silhouette']):
+        marker = ' **←**' if r is recommended else ''
+        lines.append(
+            f"| {r['n_clusters']} | {r['n_components']} | {r['silhouette']} | {r['inertia']} "
+            f"| {r['explained_variance']} | {r['fit_ms']} | {r['inference_us_per_student']} "
+            f"| {r['single_inference_ms_p50']}{marker} |"
+        )
+    if recommended:
+        lines += [
+            '',
+            f"Recommandation : k={recommended['n_clusters']}, "
+            f"PCA={recommended['n_components']} (silhouette à moins de "
+            f"{SILHOUETTE_TOLERANCE} du maximum, latence unitaire à moins de "
+            f"{LATENCY_SIGNIFICANT_RATIO}x la plus rapide, puis plus petits k et PCA). "
+            'Un k différent de 3 impose de revoir le nommage des profils.'
+        ]
+    md_path = os.path.join(REPORT_DIR, f'model_selection-{stamp}.md')
+    with open(md_path, 'w') as f:
+        f.write('\n'.join(lines) + '\n')
+    return json_path, md_path
+
+
+def _int_list(value):
+    return [int(v) for v in value.split(',') if v]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Balayage k / dimension PCA du profilage')
+    parser.add_argument('--k', type=_int_list, default=[2, 3, 4, 5, 6])
+    parser.add_argument('--components', type=_int_list, default=[2, 3, 4, 5])
+    parser.add_argument('--source', choices=['prepa', 'snapshot'], default='prepa')
+    parser.add_argument('--workers', type=int, default=None)
+    args = parser.parse_args(argv)
+
+    X = load_cohort(args.source)
+    if X is None:
+        print('Aucune donnée disponible pour la sélection du modèle')
+        return 1
+
+    start = time.perf_counter()
+    results = run_sweep(X, args.k, args.components, args.workers)
+    json_path, md_path = write_report(results, len(X), args.source)
+    print(f'📊 {len(results)} configurations évaluées en '
+          f'{time.perf_counter() - start:.1f} s : {md_path}')
+    recommended = recommend(results)
+    if recommended:
+        print(f"✅ Recommandation : k={recommended['n_clusters']}, "
+              f"PCA={recommended['n_components']} (silhouette {recommended['silhouette']})")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
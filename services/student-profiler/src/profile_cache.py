@@ -0,0 +1,82 @@
+"""
+Cache des profils calculés (StudentProfiler)
+
+Cache LRU borné avec durée de vie, indexé par (étudiant, version du modèle) :
+un profil en cache évite à la fois l'appel à PrepaData et l'inférence. Un
+changement de modèle rend les anciennes entrées inaccessibles (nouvelle
+version) ; un changement de features est signalé par invalidate().
+"""
+import os
+import time
+import threading
+from collections import OrderedDict
+from dotenv import load_dotenv
+
+load_dotenv()
+
+PROFILE_CACHE_SIZE = int(os.getenv('PROFILE_CACHE_SIZE', 50000))
+PROFILE_CACHE_TTL_SECONDS = int(os.getenv('PROFILE_CACHE_TTL_SECONDS', 900))
+
+
+class ProfileCache:
+    """Cache LRU + TTL des profils, clé (student_id, version du modèle)"""
+
+    def __init__(self, max_size=PROFILE_CACHE_SIZE, ttl_seconds=PROFILE_CACHE_TTL_SECONDS):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, student_id, version):
+        """Profil en cache ou None (entrée expirée supprimée)"""
+        key = (str(student_id), version)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or time.monotonic() - entry[0] > self.ttl_seconds:
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, student_id, version, profile):
+        if self.max_size <= 0:
+            return
+        key = (str(student_id), version)
+        with self._lock:
+            self._entries[key] = (time.monotonic(), profile)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, student_ids=None):
+        """Supprime les profils des étudiants donnés (tous si None)"""
+        with self._lock:
+            if student_ids is None:
+                removed = len(self._entries)
+                self._entries.clear()
+                return removed
+            targets = {str(student_id) for student_id in student_ids}
+            keys = [key for key in self._entries if key[0] in targets]
+            for key in keys:
+                del self._entries[key]
+            return len(keys)
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._entries),
+                'max_size': self.max_size,
+                'ttl_seconds': self.ttl_seconds,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else None
+            }
@@ -0,0 +1,266 @@
+"""
+Pipeline de profilage (StandardScaler -> PCA -> KMeans) de StudentProfiler
+
+Le pipeline entraîné est enregistré comme artefact joblib versionné dans
+MODEL_DIR. Au démarrage, chaque worker relit le dernier artefact (tableaux
+NumPy en memory map) au lieu de réentraîner : tous les workers servent les
+mêmes profils, et un nouveau modèle est publié par simple échange de
+référence.
+"""
+import os
+import re
+import copy
+import glob
+import time
+import hashlib
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.cluster import KMeans, MiniBatchKMeans
+from sklearn.preprocessing import StandardScaler
+from sklearn.decomposition import PCA, IncrementalPCA
+from dotenv import load_dotenv
+
+load_dotenv()
+
+MODEL_DIR = os.getenv(
+    'MODEL_DIR', os.path.join(os.path.dirname(__file__), '..', 'models')
+)
+MODEL_KEEP = int(os.getenv('MODEL_KEEP', 5))
+
+# Features utilisées pour le clustering
+FEATURE_COLUMNS = [
+    'average_score', 'average_participation', 'total_time_spent',
+    'total_assignments', 'total_quiz_attempts', 'risk_score'
+]
+N_CLUSTERS = 3
+N_COMPONENTS = 3
+
+# 'full' : KMeans(n_init=10) ; 'incremental' : mini-batchs (grandes cohortes)
+TRAINING_MODE = os.getenv('TRAINING_MODE', 'full')
+INCREMENTAL_BATCH_SIZE = int(os.getenv('INCREMENTAL_BATCH_SIZE', 4096))
+
+
+class ProfilePipeline:
+    """Pipeline entraîné et mapping des clusters KMeans vers les profils"""
+
+    # Valeurs par défaut des artefacts enregistrés avant ces attributs
+    mode = 'full'
+    cluster_counts = None
+
+    def __init__(self, scaler, pca, model, cluster_mapping, n_students, version=None,
+                 cluster_counts=None, mode='full'):
+        self.scaler = scaler
+        self.pca = pca
+        self.model = model
+        self.cluster_mapping = cluster_mapping
+        self.n_students = n_students
+        # Effectif de chaque cluster : poids des centroïdes lors des mises à jour
+        self.cluster_counts = (
+            np.asarray(cluster_counts, dtype='float64') if cluster_counts is not None
+            else np.full(model.n_clusters, n_students / model.n_clusters)
+        )
+        self.mode = mode
+        self.feature_columns = list(FEATURE_COLUMNS)
+        self.trained_at = time.time()
+        self.version = version or self._make_version()
+
+    def _make_version(self):
+        digest = hashlib.sha1(self.model.cluster_centers_.tobytes()).hexdigest()[:8]
+        return f"{time.strftime('%Y%m%d%H%M%S', time.gmtime(self.trained_at))}-{digest}"
+
+    def transform(self, X):
+        """Normalisation puis projection PCA d'un lot de vecteurs de features"""
+        X = np.asarray(X, dtype='float64')
+        # Valeur manquante -> moyenne d'entraînement (0 après normalisation)
+        X = np.where(np.isnan(X), self.scaler.mean_, X)
+        return self.pca.transform(self.scaler.transform(X))
+
+    def predict(self, X):
+        """scaler -> PCA -> KMeans sur un lot de vecteurs de features (une passe)
+
+        La confiance (0-100) compare la distance au centroïde le plus proche à
+        celle du second : 100 sur le centroïde, 0 à égale distance des deux.
+        """
+        components = self.transform(X)
+        distances = self.model.transform(components)
+
+        nearest = distances.argmin(axis=1)
+        two_closest = np.partition(distances, 1, axis=1)[:, :2]
+        with np.errstate(invalid='ignore', divide='ignore'):
+            confidence = np.where(two_closest[:, 1] > 0,
+                                  100 * (1 - two_closest[:, 0] / two_closest[:, 1]), 100.0)
+
+        mapping = np.array([self.cluster_mapping[c] for c in range(self.model.n_clusters)])
+        return {
+            'cluster': mapping[nearest],
+            'distance': two_closest[:, 0],
+            'confidence': confidence,
+            'components': components
+        }
+
+    def info(self):
+        return {
+            'version': self.version,
+            'trained_at': self.trained_at,
+            'n_students': self.n_students,
+            'mode': self.mode,
+            'cluster_counts': (None if self.cluster_counts is None
+                               else [int(n) for n in self.cluster_counts]),
+            'n_clusters': int(self.model.n_clusters),
+            'n_components': int(self.pca.n_components_),
+            'feature_columns': self.feature_columns,
+            'cluster_mapping': {int(k): int(v) for k, v in self.cluster_mapping.items()}
+        }
+
+
+def train_pipeline(df):
+    """Entraîne scaler, PCA et KMeans sur la table des features de la cohorte"""
+    X = df[FEATURE_COLUMNS].to_numpy(dtype='float64')
+
+    # Normalisation (NaN ignorés) ; valeur manquante -> moyenne, comme à l'inférence
+    scaler = StandardScaler()
+    scaler.fit(X)
+    X_scaled = scaler.transform(np.where(np.isnan(X), scaler.mean_, X))
+
+    # PCA pour réduction de dimensionnalité
+    pca = PCA(n_components=N_COMPONENTS)
+    X_pca = pca.fit_transform(X_scaled)
+
+    # KMeans clustering (3 profils)
+    model = KMeans(n_clusters=N_CLUSTERS, random_state=42, n_init=10)
+    model.fit(X_pca)
+
+    cluster_mapping = map_clusters(df, model.labels_)
+    return ProfilePipeline(scaler, pca, model, cluster_mapping, len(df),
+                           cluster_counts=np.bincount(model.labels_, minlength=N_CLUSTERS))
+
+
+def train_pipeline_incremental(chunks, batch_size=INCREMENTAL_BATCH_SIZE):
+    """Entraînement par mini-batchs à partir de lots de features (DataFrames)
+
+    Les lots sont lus une seule fois : seules les colonnes du modèle en sont
+    conservées, dans une matrice de toute la cohorte (6 float64 par
+    étudiant, aussi nécessaire à l'enregistrement des profils). Le calcul
+    (scaler, PCA incrémentale, MiniBatchKMeans) ne traite ensuite que
+    `batch_size` étudiants à la fois.
+    """
+    frames = [chunk[FEATURE_COLUMNS].astype('float64') for chunk in chunks if len(chunk)]
+    if not frames:
+        return None
+    df = pd.concat(frames, ignore_index=True)
+    X = df.to_numpy()
+
+    scaler = StandardScaler()
+    for start in range(0, len(X), batch_size):
+        scaler.partial_fit(X[start:start + batch_size])  # NaN ignorés
+    X = scaler.transform(np.where(np.isnan(X), scaler.mean_, X))
+
+    pca = IncrementalPCA(n_components=N_COMPONENTS,
+                         batch_size=max(batch_size, N_COMPONENTS))
+    X_pca = pca.fit_transform(X)
+
+    model = MiniBatchKMeans(n_clusters=N_CLUSTERS, batch_size=batch_size,
+                            random_state=42, n_init=3)
+    model.fit(X_pca)
+
+    cluster_mapping = map_clusters(df, model.labels_)
+    return ProfilePipeline(scaler, pca, model, cluster_mapping, len(df),
+                           cluster_counts=np.bincount(model.labels_, minlength=N_CLUSTERS),
+                           mode='incremental')
+
+
+def update_pipeline(pipeline, df):
+    """Met à jour les centroïdes avec de nouveaux étudiants (moyenne en ligne)
+
+    Scaler et PCA restent figés et chaque cluster garde son indice : le
+    mapping cluster -> profil est conservé tel quel. Retourne un nouveau
+    pipeline (l'ancien, éventuellement en memory map, n'est pas modifié).
+    """
+    components = pipeline.transform(df[pipeline.feature_columns].to_numpy(dtype='float64'))
+    labels = pipeline.model.predict(components)
+
+    counts = (np.array(pipeline.cluster_counts, dtype='float64')
+              if pipeline.cluster_counts is not None
+              else np.full(pipeline.model.n_clusters, pipeline.n_students / pipeline.model.n_clusters))
+    centers = np.array(pipeline.model.cluster_centers_, dtype='float64')
+    added = np.bincount(labels, minlength=len(centers)).astype('float64')
+    sums = np.zeros_like(centers)
+    np.add.at(sums, labels, components)
+
+    updated = added > 0
+    centers[updated] = ((centers[updated] * counts[updated, None] + sums[updated])
+                        / (counts[updated] + added[updated])[:, None])
+
+    model = copy.deepcopy(pipeline.model)
+    model.cluster_centers_ = centers.astype(pipeline.model.cluster_centers_.dtype)
+    return ProfilePipeline(pipeline.scaler, pipeline.pca, model,
+                           dict(pipeline.cluster_mapping), pipeline.n_students + len(df),
+                           cluster_counts=counts + added, mode=pipeline.mode)
+
+
+def map_clusters(df, labels):
+    """Associe chaque cluster KMeans à un profil (0 = High Performer ... 2 = At Risk)
+
+    Indicateur de performance : score élevé + risque faible = High Performer.
+    """
+    performance_indicator = df['average_score'] - (df['risk_score'] * 0.5)
+    cluster_performance = performance_indicator.groupby(np.asarray(labels)).mean()
+    sorted_clusters = cluster_performance.sort_values(ascending=False)
+    return {int(cluster): rank for rank, cluster in enumerate(sorted_clusters.index)}
+
+
+def model_path(version):
+    return os.path.join(MODEL_DIR, f'profiler-{version}.joblib')
+
+
+def list_models():
+    """Artefacts disponibles, du plus récent au plus ancien"""
+    paths = glob.glob(os.path.join(MODEL_DIR, 'profiler-*.joblib'))
+    return sorted(paths, key=os.path.getmtime, reverse=True)
+
+
+def save_pipeline(pipeline):
+    """Enregistre le pipeline (écriture temporaire puis renommage atomique)"""
+    os.makedirs(MODEL_DIR, exist_ok=True)
+    path = model_path(pipeline.version)
+    tmp_path = f'{path}.{os.getpid()}.tmp'
+    # Non compressé : les tableaux NumPy peuvent être relus en memory map
+    joblib.dump(pipeline, tmp_path)
+    os.replace(tmp_path, path)
+    prune_models()
+    return path
+
+
+def prune_models(keep=MODEL_KEEP):
+    """Ne conserve que les `keep` artefacts les plus récents"""
+    for path in list_models()[keep:]:
+        try:
+            os.remove(path)
+        except OSError as e:
+            print(f'⚠️ Suppression du modèle {path} impossible: {e}')
+
+
+def load_pipeline(path):
+    """Relit un artefact (tableaux NumPy en memory map, lecture seule)"""
+    return joblib.load(path, mmap_mode='r')
+
+
+def load_latest_pipeline(version=None):
+    """Dernier artefact (ou celui d'une version donnée), None si absent"""
+    if version is not None:
+        if not re.fullmatch(r'[\w-]+', str(version)):
+            return None
+        path = model_path(version)
+        if not os.path.exists(path):
+            return None
+    else:
+        paths = list_models()
+        if not paths:
+            return None
+        path = paths[0]
+    try:
+        return load_pipeline(path)
+    except Exception as e:
+        print(f'⚠️ Lecture du modèle {path} impossible: {e}')
+        return None
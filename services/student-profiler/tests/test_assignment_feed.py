@@ -0,0 +1,73 @@
+from assignment_feed import AssignmentFeed
+
+
+def record(feed, assignments, version='v1'):
+    student_ids = list(assignments)
+    clusters = list(assignments.values())
+    return feed.record(student_ids, clusters, [f'profile-{c}' for c in clusters], version,
+                       'inference')
+
+
+def test_first_assignment_is_not_a_change():
+    feed = AssignmentFeed(max_events=10)
+
+    assert record(feed, {1: 0, 2: 1}) == 0
+    assert feed.since(0)['events'] == []
+
+
+def test_changes_are_published_with_cursor():
+    feed = AssignmentFeed(max_events=10)
+    record(feed, {1: 0, 2: 1})
+
+    assert record(feed, {1: 2, 2: 1}, version='v2') == 1
+    page = feed.since(0)
+
+    assert [(e['cursor'], e['student_id'], e['previous_cluster'], e['cluster'])
+            for e in page['events']] == [(1, '1', 0, 2)]
+    assert page['next_cursor'] == 1 and not page['has_more'] and not page['truncated']
+
+
+def test_pagination_with_limit():
+    feed = AssignmentFeed(max_events=10)
+    record(feed, {i: 0 for i in range(5)})
+    record(feed, {i: 1 for i in range(5)})
+
+    page = feed.since(0, limit=2)
+    assert [e['cursor'] for e in page['events']] == [1, 2]
+    assert page['has_more']
+
+    page = feed.since(page['next_cursor'], limit=10)
+    assert [e['cursor'] for e in page['events']] == [3, 4, 5]
+    assert not page['has_more'] and not page['truncated']
+
+
+def test_cursor_older_than_log_is_truncated():
+    feed = AssignmentFeed(max_events=3)
+    record(feed, {i: 0 for i in range(5)})
+    record(feed, {i: 1 for i in range(5)})
+
+    page = feed.since(0)
+
+    assert page['truncated']
+    assert [e['cursor'] for e in page['events']] == [3, 4, 5]
+    assert feed.since(2)['truncated'] is False
+
+
+def test_cursor_from_the_future_is_truncated():
+    feed = AssignmentFeed(max_events=3)
+    record(feed, {1: 0})
+    record(feed, {1: 1})
+
+    page = feed.since(42)
+
+    assert page['truncated']
+    assert page['events'] == [] and page['next_cursor'] == 1
+
+
+def test_wait_returns_when_an_event_is_available():
+    feed = AssignmentFeed(max_events=3)
+    record(feed, {1: 0})
+
+    assert feed.wait(0, timeout=0.01) is False
+    record(feed, {1: 1})
+    assert feed.wait(0, timeout=0.01) is True
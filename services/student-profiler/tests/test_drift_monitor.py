@@ -0,0 +1,86 @@
+import numpy as np
+import drift_monitor
+from drift_monitor import DriftMonitor, RunningStats
+from profile_model import FEATURE_COLUMNS, train_pipeline
+from conftest import make_features
+
+
+def test_running_stats_match_numpy():
+    rng = np.random.default_rng(1)
+    X = rng.normal(5, 2, size=(1000, 3))
+    X[::7, 1] = np.nan
+    stats = RunningStats(3)
+    for start in range(0, len(X), 128):
+        stats.update(X[start:start + 128])
+
+    np.testing.assert_allclose(stats.mean, np.nanmean(X, axis=0))
+    np.testing.assert_allclose(stats.variance, np.nanvar(X, axis=0))
+    assert stats.count.tolist() == [1000, 1000 - len(X[::7]), 1000]
+
+
+def test_drift_detected_on_shifted_features(monkeypatch):
+    monkeypatch.setattr(drift_monitor, 'DRIFT_MIN_SAMPLES', 100)
+    features = make_features(n_students=500)
+    monitor = DriftMonitor(FEATURE_COLUMNS)
+    monitor.reset(train_pipeline(features))
+
+    monitor.observe(features['student_id'], features[FEATURE_COLUMNS].to_numpy())
+    assert monitor.report()['drifted'] is False
+
+    shifted = features[FEATURE_COLUMNS].copy()
+    shifted['average_score'] -= 40
+    monitor.observe([f'new-{i}' for i in range(len(shifted))], shifted.to_numpy())
+    report = monitor.report()
+    assert report['drifted'] is True
+    assert report['features']['average_score']['drifted'] is True
+    assert report['features']['risk_score']['drifted'] is False
+
+
+def test_no_decision_below_min_samples():
+    monitor = DriftMonitor(FEATURE_COLUMNS)
+    features = make_features(n_students=50)
+    monitor.reset(train_pipeline(features))
+    shifted = features[FEATURE_COLUMNS].to_numpy() * 10
+
+    monitor.observe(features['student_id'], shifted)
+
+    assert monitor.report()['drifted'] is False
+
+
+def test_each_student_counted_once_per_baseline(features):
+    monitor = DriftMonitor(FEATURE_COLUMNS)
+    monitor.reset(train_pipeline(features))
+    X = features[FEATURE_COLUMNS].to_numpy()
+
+    monitor.observe(features['student_id'], X)
+    monitor.observe(features['student_id'].head(10), X[:10] * 10)
+    assert monitor.report()['samples'] == len(features)
+
+    monitor.reset(train_pipeline(features))
+    monitor.observe(features['student_id'].head(10), X[:10])
+    assert monitor.report()['samples'] == 10
+
+
+def test_only_prepa_data_features_are_observed(trained_app, features, monkeypatch):
+    class NotFound:
+        status_code = 404
+
+    class Session:
+        def get(self, url, **kwargs):
+            return NotFound()
+
+    client = trained_app.app.test_client()
+    # Étudiants inconnus de PrepaData : profil sur features factices
+    monkeypatch.setattr(trained_app, 'get_session', Session)
+    for student_id in range(1, 21):
+        assert client.get(f'/profile/{student_id}').status_code == 200
+    client.post('/profile/batch', json={'students': features.head(20).to_dict('records')})
+    assert trained_app.drift_monitor.report()['samples'] == 0
+
+    monkeypatch.setattr(trained_app, 'fetch_all_features',
+                        lambda student_ids: features[features['student_id'].isin(
+                            [str(i) for i in student_ids])])
+    for _ in range(2):
+        trained_app.profile_cache.invalidate()
+        client.post('/profile/batch', json={'student_ids': list(range(1, 31))})
+    assert trained_app.drift_monitor.report()['samples'] == 30
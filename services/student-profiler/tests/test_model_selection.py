@@ -0,0 +1,36 @@
+from model_selection import recommend
+
+
+def result(n_clusters, n_components, silhouette, p50, fit_ms=10.0):
+    return {'n_clusters': n_clusters, 'n_components': n_components, 'silhouette': silhouette,
+            'single_inference_ms_p50': p50, 'fit_ms': fit_ms}
+
+
+def test_recommend_empty():
+    assert recommend([]) is None
+
+
+def test_recommend_ties_are_deterministic():
+    # Silhouettes à égalité, latences ne différant que par le bruit de mesure
+    first = [result(2, 3, 0.51, 0.101), result(2, 2, 0.51, 0.104), result(3, 2, 0.505, 0.099)]
+    second = [result(2, 3, 0.51, 0.107), result(2, 2, 0.51, 0.100), result(3, 2, 0.505, 0.103)]
+
+    for results in (first, second):
+        chosen = recommend(results)
+        assert (chosen['n_clusters'], chosen['n_components']) == (2, 2)
+
+
+def test_recommend_skips_significantly_slower_config():
+    results = [result(2, 2, 0.51, 0.5), result(3, 3, 0.51, 0.1)]
+
+    chosen = recommend(results)
+
+    assert (chosen['n_clusters'], chosen['n_components']) == (3, 3)
+
+
+def test_recommend_ignores_config_outside_silhouette_tolerance():
+    results = [result(2, 2, 0.40, 0.1), result(4, 3, 0.55, 0.1)]
+
+    chosen = recommend(results)
+
+    assert (chosen['n_clusters'], chosen['n_components']) == (4, 3)
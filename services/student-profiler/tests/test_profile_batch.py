@@ -0,0 +1,53 @@
+import pandas as pd
+
+
+def test_profiles_from_features_empty(trained_app):
+    assert trained_app.profiles_from_features([]) == []
+
+
+def test_batch_with_empty_students_list(trained_app):
+    response = trained_app.app.test_client().post('/profile/batch', json={'students': []})
+
+    assert response.status_code == 200
+    assert response.get_json()['profiles'] == []
+
+
+def test_batch_with_only_unknown_students(trained_app, monkeypatch):
+    monkeypatch.setattr(trained_app, 'fetch_all_features', lambda student_ids: pd.DataFrame())
+
+    response = trained_app.app.test_client().post('/profile/batch',
+                                                  json={'student_ids': [404, 405]})
+
+    assert response.status_code == 200
+    profiles = response.get_json()['profiles']
+    assert [p['status'] for p in profiles] == ['error', 'error']
+    assert [p['student_id'] for p in profiles] == [404, 405]
+
+
+def test_batch_with_inline_features(trained_app, features):
+    students = features.head(3).to_dict('records')
+
+    response = trained_app.app.test_client().post('/profile/batch', json={'students': students})
+
+    assert response.status_code == 200
+    profiles = response.get_json()['profiles']
+    assert [p['student_id'] for p in profiles] == ['1', '2', '3']
+    assert all(p['status'] == 'success' for p in profiles)
+
+
+def test_repeated_batch_served_from_cache(trained_app, features, monkeypatch):
+    fetched = []
+
+    def fetch_all_features(student_ids):
+        fetched.append(list(student_ids))
+        return features[features['student_id'].isin([str(i) for i in student_ids])]
+
+    monkeypatch.setattr(trained_app, 'fetch_all_features', fetch_all_features)
+    client = trained_app.app.test_client()
+
+    first = client.post('/profile/batch', json={'student_ids': [1, 2, 3]})
+    second = client.post('/profile/batch', json={'student_ids': [1, 2, 3]})
+
+    assert first.status_code == 200 and second.status_code == 200
+    assert second.get_json()['profiles'] == first.get_json()['profiles']
+    assert fetched == [[1, 2, 3]]
@@ -0,0 +1,65 @@
+import profile_cache
+from profile_cache import ProfileCache
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_hit_and_miss():
+    cache = ProfileCache(max_size=10, ttl_seconds=60)
+    cache.put(1, 'v1', {'cluster': 0})
+
+    assert cache.get('1', 'v1') == {'cluster': 0}
+    assert cache.get(1, 'v2') is None
+    assert cache.get(2, 'v1') is None
+    stats = cache.stats()
+    assert (stats['hits'], stats['misses']) == (1, 2)
+
+
+def test_expired_entry_is_removed(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(profile_cache.time, 'monotonic', clock)
+    cache = ProfileCache(max_size=10, ttl_seconds=60)
+    cache.put(1, 'v1', {'cluster': 0})
+
+    clock.now += 59
+    assert cache.get(1, 'v1') == {'cluster': 0}
+    clock.now += 2
+    assert cache.get(1, 'v1') is None
+    assert cache.stats()['size'] == 0
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = ProfileCache(max_size=2, ttl_seconds=60)
+    cache.put(1, 'v1', 'a')
+    cache.put(2, 'v1', 'b')
+    cache.get(1, 'v1')
+    cache.put(3, 'v1', 'c')
+
+    assert cache.get(2, 'v1') is None
+    assert cache.get(1, 'v1') == 'a'
+    assert cache.get(3, 'v1') == 'c'
+    assert cache.stats()['evictions'] == 1
+
+
+def test_invalidate_students():
+    cache = ProfileCache(max_size=10, ttl_seconds=60)
+    cache.put(1, 'v1', 'a')
+    cache.put(1, 'v2', 'b')
+    cache.put(2, 'v1', 'c')
+
+    assert cache.invalidate([1]) == 2
+    assert cache.get(2, 'v1') == 'c'
+    assert cache.invalidate() == 1
+
+
+def test_disabled_cache_stores_nothing():
+    cache = ProfileCache(max_size=0, ttl_seconds=60)
+    cache.put(1, 'v1', 'a')
+
+    assert cache.get(1, 'v1') is None
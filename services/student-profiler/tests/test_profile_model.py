@@ -0,0 +1,15 @@
+import numpy as np
+from conftest import make_features
+from profile_model import FEATURE_COLUMNS, train_pipeline, train_pipeline_incremental
+
+
+def test_training_accepts_missing_features():
+    # Étudiant ingéré sans score ni participation (null dans PrepaData)
+    features = make_features(n_students=100)
+    features.loc[0, ['average_score', 'average_participation', 'risk_score']] = None
+
+    for trained in (train_pipeline(features), train_pipeline_incremental([features])):
+        assert trained.n_students == 100
+        assert np.isfinite(trained.scaler.mean_).all()
+        prediction = trained.predict(features[FEATURE_COLUMNS].head(1).to_numpy(dtype='float64'))
+        assert np.isfinite(prediction['components']).all()
@@ -0,0 +1,60 @@
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pytest
+import feature_client
+from profile_model import FEATURE_COLUMNS, train_pipeline_incremental
+
+
+@pytest.fixture
+def snapshot_path(tmp_path, features):
+    """Snapshot au format de PrepaData : student_id en index (preserve_index)"""
+    path = tmp_path / 'features-test.parquet'
+    table = pa.Table.from_pandas(features.set_index('student_id'), preserve_index=True)
+    pq.write_table(table, path)
+    return str(path)
+
+
+def test_snapshot_chunks_restore_student_id_column(snapshot_path, features):
+    chunks = list(feature_client.iter_snapshot_chunks(
+        ['student_id'] + FEATURE_COLUMNS, path=snapshot_path, batch_size=100))
+
+    assert len(chunks) == 3
+    assert all(list(chunk.columns) == ['student_id'] + FEATURE_COLUMNS for chunk in chunks)
+    assert [sid for chunk in chunks for sid in chunk['student_id']] == list(features['student_id'])
+
+
+def test_snapshot_chunks_without_student_id(snapshot_path):
+    chunks = list(feature_client.iter_snapshot_chunks(FEATURE_COLUMNS, path=snapshot_path))
+
+    assert list(chunks[0].columns) == FEATURE_COLUMNS
+
+
+def test_train_incremental_from_snapshot_chunks(snapshot_path, features):
+    chunks = feature_client.iter_snapshot_chunks(
+        ['student_id'] + FEATURE_COLUMNS, path=snapshot_path, batch_size=64)
+    trained = train_pipeline_incremental(chunks, batch_size=64)
+
+    assert trained.mode == 'incremental'
+    assert trained.n_students == len(features)
+    assert sorted(trained.cluster_mapping.values()) == [0, 1, 2]
+
+
+def test_train_profiling_model_from_snapshot(profiler_app, snapshot_path, features, monkeypatch):
+    monkeypatch.setattr(feature_client, 'FEATURE_SNAPSHOT_PATH', snapshot_path)
+    recorded = []
+    monkeypatch.setattr(profiler_app, 'save_training_results',
+                        lambda profiles, statistics, version: recorded.append(profiles) or len(profiles))
+
+    trained = profiler_app.train_profiling_model('incremental', 'snapshot')
+
+    assert trained is not None and profiler_app.pipeline is trained
+    assert list(recorded[0]['student_id']) == list(features['student_id'])
+
+
+def test_train_endpoint_incremental_snapshot(profiler_app, snapshot_path, monkeypatch):
+    monkeypatch.setattr(feature_client, 'FEATURE_SNAPSHOT_PATH', snapshot_path)
+    client = profiler_app.app.test_client()
+
+    response = client.post('/admin/model/train', json={'mode': 'incremental', 'source': 'snapshot'})
+
+    assert response.status_code == 200, response.get_json()